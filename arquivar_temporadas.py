@@ -0,0 +1,57 @@
+"""
+Arquiva as temporadas encerradas de registros_visita
+
+Move os registros dos anos encerrados para <banco>_arquivo.db, mantendo o
+banco principal pequeno; as consultas continuam enxergando os registros
+arquivados. Faça um backup antes de arquivar.
+
+Uso:
+    python arquivar_temporadas.py --db abrolhos_ingressos.db --listar
+    python arquivar_temporadas.py --db abrolhos_ingressos.db [--ano 2021 --ano 2022] [--compactar]
+"""
+import argparse
+import sys
+
+from models.arquivamento import ArquivamentoService, caminho_arquivo
+from models.database import init_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Arquiva temporadas encerradas de registros de visita')
+    parser.add_argument('--db', default='abrolhos_ingressos.db', help='Arquivo do banco de dados')
+    parser.add_argument('--ano', type=int, action='append',
+                        help='Ano a arquivar (pode repetir; padrão: temporadas com tabela de preços encerrada)')
+    parser.add_argument('--listar', action='store_true', help='Apenas lista temporadas arquivadas e candidatas')
+    parser.add_argument('--compactar', action='store_true',
+                        help='Executa VACUUM no banco principal após arquivar')
+    args = parser.parse_args()
+
+    engine, SessionLocal = init_db(args.db)
+    session = SessionLocal()
+    try:
+        if args.listar:
+            print(f"Banco de arquivo: {caminho_arquivo(args.db)}")
+            for temporada in ArquivamentoService.listar(session):
+                print(f"  {temporada.ano}: {temporada.registros} registros arquivados "
+                      f"(R$ {temporada.valor_total:,.2f}) em {temporada.arquivado_em:%d/%m/%Y %H:%M}")
+            candidatas = ArquivamentoService.temporadas_fechadas(session)
+            print(f"Temporadas encerradas no banco principal: {', '.join(map(str, candidatas)) or 'nenhuma'}")
+            return
+
+        try:
+            movidos = ArquivamentoService.arquivar(session, args.ano, compactar=args.compactar)
+        except ValueError as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        if not movidos:
+            print('Nenhuma temporada encerrada a arquivar.')
+        for ano, quantidade in movidos.items():
+            print(f"{ano}: {quantidade} registros arquivados")
+    finally:
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Backup e restauração do banco pela linha de comando
+
+Backups completos usam a API de backup online do SQLite e podem ser feitos
+com o sistema em uso. Backups incrementais gravam apenas as páginas alteradas
+desde o backup anterior da cadeia, o que permite agendá-los a cada hora
+(ex.: pelo Agendador de Tarefas do Windows). O banco de arquivo das
+temporadas arquivadas, se existir, entra no backup e é restaurado junto.
+
+Uso:
+    python backup_banco.py completo backups/abrolhos.db.gz
+    python backup_banco.py incremental backups/ [--novo]
+    python backup_banco.py listar backups/
+    python backup_banco.py restaurar backups/abrolhos_inc_20250101_120000_000000.json restaurado.db
+"""
+import argparse
+import os
+import sys
+
+from models.arquivamento import caminho_arquivo
+from models.backup import BackupBanco, BackupIncremental, EXTENSOES_COMPRESSAO, restaurar
+
+
+def _tamanho(bytes_: int) -> str:
+    return f'{bytes_ / 1024 / 1024:.1f} MB'
+
+
+def comando_completo(args):
+    compressao = next((c for c, ext in EXTENSOES_COMPRESSAO.items() if ext and args.destino.endswith(ext)), None)
+    resultado = BackupBanco.executar(args.db, args.destino, compressao)
+    print(f"Backup completo: {resultado['arquivo']} ({_tamanho(resultado['tamanho'])}, "
+          f"{resultado['duracao']:.1f} s, integridade {resultado['integridade']})")
+    if resultado['arquivo_temporadas']:
+        arquivo = resultado['arquivo_temporadas']
+        print(f"  Temporadas arquivadas: {arquivo['arquivo']} ({_tamanho(arquivo['tamanho'])})")
+
+
+def comando_incremental(args):
+    resultado = BackupIncremental(args.pasta).executar(args.db, completo=args.novo)
+    print(f"Backup {resultado['tipo']}: {resultado['manifesto']}")
+    print(f"  {resultado['paginas_gravadas']} de {resultado['total_paginas']} páginas gravadas "
+          f"({_tamanho(resultado['tamanho'])}, {resultado['duracao']:.1f} s)")
+    if resultado['arquivo_temporadas']:
+        arquivo = resultado['arquivo_temporadas']
+        print(f"  Temporadas arquivadas: {arquivo['paginas_gravadas']} de {arquivo['total_paginas']} páginas gravadas")
+
+
+def comando_listar(args):
+    manifestos = BackupIncremental(args.pasta).manifestos()
+    if not manifestos:
+        print('Nenhum backup incremental encontrado.')
+        return
+    print(f"{'Manifesto':<45} {'Tipo':<12} {'Páginas':>16}")
+    for caminho in manifestos:
+        dados = BackupIncremental.ler_manifesto(caminho)
+        paginas = f"{dados['paginas_gravadas']}/{dados['total_paginas']}"
+        print(f"{os.path.basename(caminho):<45} {dados['tipo']:<12} {paginas:>16}")
+
+
+def comando_restaurar(args):
+    for caminho in (args.destino, caminho_arquivo(args.destino)):
+        if os.path.exists(caminho) and not args.substituir:
+            print(f"{caminho} já existe (use --substituir para sobrescrever).", file=sys.stderr)
+            sys.exit(1)
+    resultado = restaurar(args.origem, args.destino)
+    print(f"Banco restaurado em {resultado['arquivo']} ({_tamanho(resultado['tamanho'])}, "
+          f"{resultado['backups_aplicados']} backup(s) aplicado(s), integridade {resultado['integridade']})")
+    if resultado['arquivo_temporadas']:
+        print(f"  Temporadas arquivadas restauradas em {resultado['arquivo_temporadas']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backup e restauração do banco de dados')
+    parser.add_argument('--db', default='abrolhos_ingressos.db', help='Arquivo do banco de dados')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    completo = comandos.add_parser('completo', help='Backup completo (.db, .db.gz ou .db.zst)')
+    completo.add_argument('destino')
+    completo.set_defaults(funcao=comando_completo)
+
+    incremental = comandos.add_parser('incremental', help='Backup das páginas alteradas desde o anterior')
+    incremental.add_argument('pasta')
+    incremental.add_argument('--novo', action='store_true', help='Inicia uma nova cadeia (backup completo)')
+    incremental.set_defaults(funcao=comando_incremental)
+
+    listar = comandos.add_parser('listar', help='Lista os backups incrementais de uma pasta')
+    listar.add_argument('pasta')
+    listar.set_defaults(funcao=comando_listar)
+
+    restauracao = comandos.add_parser('restaurar', help='Restaura um backup completo ou uma cadeia incremental')
+    restauracao.add_argument('origem', help='Backup completo ou manifesto (.json) do backup incremental')
+    restauracao.add_argument('destino')
+    restauracao.add_argument('--substituir', action='store_true', help='Sobrescreve o destino se existir')
+    restauracao.set_defaults(funcao=comando_restaurar)
+
+    args = parser.parse_args()
+    args.funcao(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark do log de auditoria: commit próprio vs. mesma transação vs. gravador em lote
+
+Cada "salvamento" cria um registro de visita e registra a ação de auditoria,
+como em RegistrosTab.salvar_registro. Usa um banco em arquivo temporário para
+que o custo de cada commit (fsync) apareça na medição.
+
+Uso:
+    python -m benchmarks.bench_auditoria [--salvamentos 500]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+from models.database import init_db, LogAuditoria, RegistroVisita
+from models.services import (
+    EmpresaService, EmbarcacaoService, TabelaPrecoService, LogService
+)
+from models.auditoria import GravadorAuditoria
+
+
+def preparar_banco(caminho: str):
+    engine, SessionLocal = init_db(caminho)
+    session = SessionLocal()
+    empresa = EmpresaService.criar(session, 'Empresa Benchmark')
+    embarcacao = EmbarcacaoService.criar(session, empresa.id, 'Lancha Benchmark', 'Lancha', comprimento_m=10.0)
+    TabelaPrecoService.criar(session, 2020, {'valor_brasileiro': 5.0, 'valor_fundeio_8a15': 28.0})
+    ids = (empresa.id, embarcacao.id)
+    session.close()
+    return engine, SessionLocal, ids
+
+
+def salvar(session, ids: tuple, i: int, commit_log: bool):
+    """Um salvamento: registro + entrada de auditoria"""
+    registro = RegistroVisita(
+        data=date(2024, 1, 1 + i % 28), empresa_id=ids[0], embarcacao_id=ids[1],
+        permanencia=1, qtde_brasileiros=i % 10, valor_total=0.0
+    )
+    session.add(registro)
+    if commit_log:
+        session.commit()
+        LogService.registrar(session, 'benchmark', 'INSERT', 'registros_visita',
+                             registro_id=registro.id, descricao='Benchmark')
+    else:
+        session.flush()
+        LogService.registrar(session, 'benchmark', 'INSERT', 'registros_visita',
+                             registro_id=registro.id, descricao='Benchmark', commit=False)
+        session.commit()
+
+
+def medir(nome: str, n: int, commit_log: bool, usar_gravador: bool):
+    with tempfile.TemporaryDirectory() as pasta:
+        engine, SessionLocal, ids = preparar_banco(os.path.join(pasta, 'bench.db'))
+        gravador = None
+        if usar_gravador:
+            gravador = GravadorAuditoria(SessionLocal)
+            gravador.iniciar()
+            LogService.configurar_gravador(gravador)
+
+        session = SessionLocal()
+        inicio = time.perf_counter()
+        try:
+            for i in range(n):
+                salvar(session, ids, i, commit_log)
+        finally:
+            session.close()
+        tempo = time.perf_counter() - inicio
+
+        if gravador:
+            gravador.parar()
+            LogService.configurar_gravador(None)
+
+        session = SessionLocal()
+        logs = session.query(LogAuditoria).count()
+        session.close()
+        engine.dispose()
+
+    print(f"{nome:<28} {n / tempo:8.0f} salvamentos/s  ({logs} entradas de log)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do log de auditoria')
+    parser.add_argument('--salvamentos', type=int, default=500, help='Número de salvamentos')
+    args = parser.parse_args()
+
+    medir('Commit próprio (2 commits)', args.salvamentos, commit_log=True, usar_gravador=False)
+    medir('Mesma transação (1 commit)', args.salvamentos, commit_log=False, usar_gravador=False)
+    medir('Gravador em lote', args.salvamentos, commit_log=True, usar_gravador=True)
+
+
+if __name__ == '__main__':
+    main()
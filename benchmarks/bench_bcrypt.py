@@ -0,0 +1,59 @@
+"""
+Benchmark do custo do bcrypt: tempo de verificação da senha por fator de custo
+
+Ajuda a escolher ABROLHOS_BCRYPT_CUSTO para o hardware em uso: o custo
+recomendado é o maior cuja verificação (o que o login executa) fica dentro
+do tempo-alvo. Hashes gravados com outro custo são atualizados no próximo
+login (UsuarioService.autenticar).
+
+Uso:
+    python -m benchmarks.bench_bcrypt [--custos 10 11 12 13 14] [--alvo-ms 300]
+"""
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+from models.services import UsuarioService
+
+
+def medir_custo(custo: int, repeticoes: int) -> dict:
+    senha = b'senha-de-benchmark'
+    inicio = time.perf_counter()
+    password_hash = bcrypt.hashpw(senha, bcrypt.gensalt(rounds=custo))
+    tempo_hash = time.perf_counter() - inicio
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        bcrypt.checkpw(senha, password_hash)
+        tempos.append(time.perf_counter() - inicio)
+    return {'custo': custo, 'hash_ms': tempo_hash * 1000, 'verificacao_ms': statistics.median(tempos) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do fator de custo do bcrypt')
+    parser.add_argument('--custos', type=int, nargs='+', default=[10, 11, 12, 13, 14])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--alvo-ms', type=float, default=300,
+                        help='Tempo máximo aceitável para verificar a senha no login')
+    args = parser.parse_args()
+
+    print(f"Custo configurado: {UsuarioService.CUSTO_BCRYPT} (ABROLHOS_BCRYPT_CUSTO)\n")
+    print(f"{'Custo':>5} {'Hash (ms)':>12} {'Verificação (ms)':>18}")
+    recomendado = None
+    for custo in sorted(args.custos):
+        resultado = medir_custo(custo, args.repeticoes)
+        print(f"{custo:>5} {resultado['hash_ms']:>12.1f} {resultado['verificacao_ms']:>18.1f}")
+        if resultado['verificacao_ms'] <= args.alvo_ms:
+            recomendado = custo
+
+    if recomendado is None:
+        print(f"\nNenhum custo testado verifica em até {args.alvo_ms:.0f} ms.")
+    else:
+        print(f"\nCusto recomendado para até {args.alvo_ms:.0f} ms: {recomendado}")
+
+
+if __name__ == '__main__':
+    main()
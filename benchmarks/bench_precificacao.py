@@ -0,0 +1,95 @@
+"""
+Benchmark do motor de precificação: cálculo unitário vs. vetorizado
+
+Uso:
+    python -m benchmarks.bench_precificacao [--linhas 1000000]
+"""
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+
+from models.precificacao import MotorPrecos, COLUNAS_QUANTIDADE
+
+
+def tabelas_exemplo() -> list:
+    """Snapshots equivalentes às tabelas criadas pelo seed_data"""
+    tabelas = []
+    for i, ano in enumerate(range(2020, 2026), start=1):
+        fator = 1 + (ano - 2020) * 0.05
+        tabelas.append({
+            'id': i,
+            'ano_inicio': ano,
+            'ano_fim': ano,
+            'valor_estrangeiro': round(80.0 * fator, 2),
+            'valor_mercosul': round(60.0 * fator, 2),
+            'valor_brasileiro': round(4.0 * fator, 2),
+            'valor_entorno': round(10.0 * fator, 2),
+            'valor_isento': 0.0,
+            'valor_fundeio_ate8': round(20.0 * fator, 2),
+            'valor_fundeio_8a15': round(28.0 * fator, 2),
+            'valor_fundeio_acima15': round(43.0 * fator, 2),
+        })
+    return tabelas
+
+
+def gerar_dados(n: int, semente: int = 42) -> dict:
+    """Gera n registros sintéticos (datas, quantidades, permanências, comprimentos)"""
+    rng = np.random.default_rng(semente)
+    inicio = np.datetime64('2019-06-01')
+    dias = rng.integers(0, 7 * 365, n)
+    comprimentos = rng.uniform(5, 25, n).round(1)
+    comprimentos[rng.random(n) < 0.05] = np.nan
+    return {
+        'datas': inicio + dias.astype('timedelta64[D]'),
+        'quantidades': {col: rng.integers(0, 12, n) for col in COLUNAS_QUANTIDADE},
+        'permanencias': rng.integers(1, 4, n),
+        'comprimentos': comprimentos,
+    }
+
+
+def calcular_unitario(tabelas: list, dados: dict) -> list:
+    """Cálculo linha a linha, como no laço de importação original"""
+    n = len(dados['datas'])
+    datas = dados['datas'].astype(date).tolist()
+    colunas = {col: valores.tolist() for col, valores in dados['quantidades'].items()}
+    permanencias = dados['permanencias'].tolist()
+    comprimentos = [None if c != c else c for c in dados['comprimentos'].tolist()]
+
+    valores = []
+    for i in range(n):
+        tabela = MotorPrecos.tabela_vigente(tabelas, datas[i])
+        quantidades = {col: colunas[col][i] for col in COLUNAS_QUANTIDADE}
+        valores.append(MotorPrecos.calcular_valor(tabela, quantidades, permanencias[i], comprimentos[i]))
+    return valores
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do motor de precificação')
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='Número de registros')
+    args = parser.parse_args()
+
+    tabelas = tabelas_exemplo()
+    dados = gerar_dados(args.linhas)
+    print(f"Registros: {args.linhas:,}".replace(',', '.'))
+
+    inicio = time.perf_counter()
+    lote = MotorPrecos.calcular_lote(
+        tabelas, dados['datas'], dados['quantidades'],
+        dados['permanencias'], dados['comprimentos']
+    )
+    tempo_lote = time.perf_counter() - inicio
+    print(f"Vetorizado: {tempo_lote:.3f}s")
+
+    inicio = time.perf_counter()
+    unitario = calcular_unitario(tabelas, dados)
+    tempo_unitario = time.perf_counter() - inicio
+    print(f"Unitário:   {tempo_unitario:.3f}s")
+
+    divergencias = int(np.count_nonzero(lote['valor_total'] != np.array(unitario)))
+    print(f"Ganho: {tempo_unitario / tempo_lote:.1f}x | Divergências: {divergencias}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark de transações: commits por operação com e sem unidade de trabalho
+
+Uso:
+    python -m benchmarks.bench_transacoes [--registros 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from models.database import init_db
+from models.services import (
+    EmpresaService, EmbarcacaoService, TabelaPrecoService, RegistroVisitaService,
+    LogService, unidade_de_trabalho
+)
+from seed_data import seed_database
+
+
+class ContadorCommits:
+    """Conta os commits emitidos por qualquer engine enquanto ativo"""
+
+    def __init__(self):
+        self.total = 0
+
+    def _contar(self, conn):
+        self.total += 1
+
+    def __enter__(self):
+        event.listen(Engine, 'commit', self._contar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, 'commit', self._contar)
+
+
+def criar_empresa_com_frota(session, sufixo: str):
+    """Empresa + 3 embarcações + log (operação composta)"""
+    empresa = EmpresaService.criar(session, f'Empresa {sufixo}')
+    for i, comprimento in enumerate((7.5, 12.0, 18.0)):
+        EmbarcacaoService.criar(session, empresa.id, f'Barco {sufixo}-{i}', 'Lancha', comprimento_m=comprimento)
+    LogService.registrar(session, 'benchmark', 'INSERT', 'empresas', empresa.id, 'Empresa com frota')
+    return empresa
+
+
+def salvar_registros(session, empresa, n: int):
+    """n registros individuais + log, como o endpoint POST /registros"""
+    embarcacao = empresa.embarcacoes[0]
+    for i in range(n):
+        registro = RegistroVisitaService.criar(
+            session, date(2024, 1, 1 + i % 28), empresa.id, embarcacao.id, 1,
+            {'qtde_brasileiros': i % 10}
+        )
+        LogService.registrar(session, 'benchmark', 'INSERT', 'registros_visita', registro.id, 'Benchmark')
+
+
+def medir(nome: str, SessionLocal, operacao, usar_unidade: bool):
+    with ContadorCommits() as contador:
+        inicio = time.perf_counter()
+        if usar_unidade:
+            with unidade_de_trabalho(SessionLocal) as session:
+                operacao(session)
+        else:
+            session = SessionLocal()
+            try:
+                operacao(session)
+            finally:
+                session.close()
+        tempo = time.perf_counter() - inicio
+    modo = 'unidade de trabalho' if usar_unidade else 'autocommit'
+    print(f"{nome:<32} {modo:<20} {contador.total:6d} commits  {tempo * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de transações')
+    parser.add_argument('--registros', type=int, default=200, help='Registros salvos individualmente')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        engine, SessionLocal = init_db(os.path.join(pasta, 'bench.db'))
+        session = SessionLocal()
+        TabelaPrecoService.criar(session, 2020, {'valor_brasileiro': 5.0, 'valor_fundeio_8a15': 28.0})
+        session.close()
+
+        for usar_unidade in (False, True):
+            sufixo = 'UT' if usar_unidade else 'AC'
+            medir('Empresa + 3 embarcações + log', SessionLocal,
+                  lambda s: criar_empresa_com_frota(s, sufixo), usar_unidade)
+            medir(f'{args.registros} registros + log', SessionLocal,
+                  lambda s: salvar_registros(s, criar_empresa_com_frota(s, sufixo + 'R'), args.registros),
+                  usar_unidade)
+        engine.dispose()
+
+        with ContadorCommits() as contador:
+            seed_database(os.path.join(pasta, 'seed.db'))
+        print(f"\nseed_data.seed_database: {contador.total} commit(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Executa a suíte de benchmarks sobre conjuntos de dados sintéticos e grava os
+resultados em JSON (para comparação entre commits)
+
+Uso:
+    python -m benchmarks.executar
+    python -m benchmarks.executar --tamanhos 10000 --filtro api
+    python -m benchmarks.executar --comparar benchmarks/resultados/base.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import func
+
+from benchmarks.suite import BENCHMARKS
+from gerar_dados_sinteticos import gerar_dados
+from models.database import init_db, RegistroVisita
+from models.services import unidade_de_trabalho
+
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+PASTA_DADOS = os.path.join(PASTA_BENCHMARKS, '.dados')
+PASTA_RESULTADOS = os.path.join(PASTA_BENCHMARKS, 'resultados')
+
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+
+
+class Contexto:
+    """Banco de trabalho (cópia do conjunto de dados) e atalhos usados pelos benchmarks"""
+
+    def __init__(self, tamanho: int, db_path: str, pasta: str):
+        self.tamanho = tamanho
+        self.db_path = db_path
+        self.pasta = pasta
+        self.engine, self.SessionLocal = init_db(db_path)
+        self._cliente = None
+
+        # Empresa/embarcação com mais registros (usadas em nota e API)
+        session = self.SessionLocal()
+        try:
+            self.empresa_principal, self.embarcacao_principal = session.query(
+                RegistroVisita.empresa_id, RegistroVisita.embarcacao_id
+            ).group_by(RegistroVisita.empresa_id, RegistroVisita.embarcacao_id).order_by(
+                func.count().desc()
+            ).first()
+        finally:
+            session.close()
+
+    def cliente_api(self):
+        """TestClient da API usando a sessão deste conjunto de dados"""
+        if self._cliente is None:
+            # O módulo da API abre o banco apontado por ABROLHOS_DB_PATH ao ser importado
+            os.environ.setdefault('ABROLHOS_DB_PATH', os.path.join(self.pasta, 'api.db'))
+            from fastapi.testclient import TestClient
+            from server.api import app, get_session, usuario_autenticado
+            from server.autenticacao import Principal
+
+            def sessao_benchmark():
+                with unidade_de_trabalho(self.SessionLocal) as session:
+                    yield session
+
+            # A validação do token é medida à parte (api.validar_token)
+            principal = Principal(0, 'benchmark', True, datetime.max, '')
+            app.dependency_overrides[get_session] = sessao_benchmark
+            app.dependency_overrides[usuario_autenticado] = lambda: principal
+            self._cliente = TestClient(app)
+        return self._cliente
+
+    def fechar(self):
+        if self._cliente is not None:
+            from server.api import app
+            app.dependency_overrides.clear()
+        self.engine.dispose()
+
+
+def conjunto_de_dados(tamanho: int) -> str:
+    """Caminho do banco sintético com `tamanho` registros (gerado uma vez e reutilizado)"""
+    os.makedirs(PASTA_DADOS, exist_ok=True)
+    caminho = os.path.join(PASTA_DADOS, f'carga_{tamanho}.db')
+    if not os.path.exists(caminho):
+        print(f"Gerando conjunto de dados com {tamanho:,} registros...".replace(',', '.'))
+        temporario = caminho + '.tmp'
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        gerar_dados(temporario, tamanho, ano_inicio=2020, ano_fim=2025, semente=42)
+        os.replace(temporario, caminho)
+    return caminho
+
+
+def commit_atual() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=PASTA_BENCHMARKS, check=True
+        ).stdout.strip()
+    except Exception:
+        return 'desconhecido'
+
+
+def medir(funcao, repeticoes: int) -> dict:
+    tempos = []
+    itens = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        itens = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    mediana = statistics.median(tempos)
+    return {
+        'min': min(tempos),
+        'mediana': mediana,
+        'media': statistics.fmean(tempos),
+        'repeticoes': repeticoes,
+        'itens': itens,
+        'itens_por_segundo': itens / mediana if mediana else None,
+    }
+
+
+def executar_tamanho(tamanho: int, repeticoes: int, filtro: str) -> dict:
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, 'bench.db')
+        shutil.copy2(conjunto_de_dados(tamanho), db_path)
+        ctx = Contexto(tamanho, db_path, pasta)
+        try:
+            for nome, fabrica in BENCHMARKS:
+                if filtro and filtro not in nome:
+                    continue
+                resultado = medir(fabrica(ctx), repeticoes)
+                chave = f'{nome}[{tamanho}]'
+                resultados[chave] = resultado
+                print(f"{chave:<45} {resultado['mediana'] * 1000:10.1f} ms  "
+                      f"({resultado['itens']} itens)")
+        finally:
+            ctx.fechar()
+    return resultados
+
+
+def comparar(atual: dict, base: dict, tolerancia: float) -> list:
+    """Imprime a razão atual/base por benchmark e retorna as regressões"""
+    regressoes = []
+    print(f"\nComparação com {base.get('commit', '?')} (tolerância {tolerancia:.0%}):")
+    for chave, resultado in atual['resultados'].items():
+        anterior = base.get('resultados', {}).get(chave)
+        if not anterior:
+            continue
+        razao = resultado['mediana'] / anterior['mediana'] if anterior['mediana'] else float('inf')
+        marca = ''
+        if razao > 1 + tolerancia:
+            marca = '  <-- REGRESSÃO'
+            regressoes.append(chave)
+        print(f"{chave:<45} {razao:6.2f}x{marca}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suíte de benchmarks do Abrolhos Ingressos')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                        help='Tamanhos dos conjuntos de dados (registros)')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Repetições por benchmark')
+    parser.add_argument('--filtro', default='', help='Executa apenas benchmarks cujo nome contém o texto')
+    parser.add_argument('--saida', help='Arquivo JSON de resultados (padrão: benchmarks/resultados/<commit>.json)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparação')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='Aumento relativo da mediana considerado regressão (padrão 0.2)')
+    args = parser.parse_args()
+
+    commit = commit_atual()
+    atual = {
+        'commit': commit,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'resultados': {},
+    }
+    for tamanho in args.tamanhos:
+        atual['resultados'].update(executar_tamanho(tamanho, args.repeticoes, args.filtro))
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(atual, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        if comparar(atual, base, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+Benchmarks da suíte de desempenho (executados por benchmarks.executar)
+
+Cada benchmark recebe o Contexto do conjunto de dados e devolve a função a ser
+cronometrada; essa função retorna a quantidade de itens processados. O que
+vem antes do `return` é preparação e não entra na medição.
+"""
+import os
+from calendar import monthrange
+from datetime import date
+
+from models.database import RegistroVisita
+from models.precificacao import MotorPrecos, COLUNAS_QUANTIDADE
+from models.services import (
+    RegistroVisitaService, TabelaPrecoService, RelatorioService
+)
+from utils.validators import Validadores
+
+
+BENCHMARKS = []
+
+# Mês usado nas consultas por período (os dados sintéticos cobrem 2020-2025)
+MES_REFERENCIA = (2024, 1)
+
+
+def benchmark(nome: str):
+    """Registra uma função na suíte"""
+    def decorador(funcao):
+        BENCHMARKS.append((nome, funcao))
+        return funcao
+    return decorador
+
+
+def periodo_referencia() -> tuple:
+    ano, mes = MES_REFERENCIA
+    return date(ano, mes, 1), date(ano, mes, monthrange(ano, mes)[1])
+
+
+@benchmark('precificacao.calcular_valor_total')
+def bench_calcular_valor_total(ctx):
+    """1.000 cálculos unitários (uma consulta à tabela de preços cada)"""
+    casos = [
+        (date(2020 + i % 6, 1 + i % 12, 1 + i % 28), {'qtde_brasileiros': i % 10, 'qtde_estrangeiros': i % 3},
+         1 + i % 3, 6.0 + i % 15)
+        for i in range(1000)
+    ]
+
+    def executar():
+        session = ctx.SessionLocal()
+        try:
+            for data_visita, quantidades, permanencia, comprimento in casos:
+                RegistroVisitaService.calcular_valor_total(session, data_visita, quantidades, permanencia, comprimento)
+        finally:
+            session.close()
+        return len(casos)
+    return executar
+
+
+@benchmark('precificacao.calcular_lote')
+def bench_calcular_lote(ctx):
+    """Reprecificação vetorizada de todo o conjunto de dados"""
+    session = ctx.SessionLocal()
+    try:
+        tabelas = TabelaPrecoService.listar_snapshots(session)
+        linhas = session.query(
+            RegistroVisita.data, RegistroVisita.permanencia,
+            *[getattr(RegistroVisita, col) for col in COLUNAS_QUANTIDADE]
+        ).all()
+    finally:
+        session.close()
+    datas, permanencias, *quantidades = zip(*linhas)
+    quantidades = dict(zip(COLUNAS_QUANTIDADE, quantidades))
+
+    def executar():
+        MotorPrecos.calcular_lote(tabelas, datas, quantidades, permanencias)
+        return len(datas)
+    return executar
+
+
+@benchmark('registros.listar_por_periodo')
+def bench_listar_por_periodo(ctx):
+    inicio, fim = periodo_referencia()
+
+    def executar():
+        session = ctx.SessionLocal()
+        try:
+            return len(RegistroVisitaService.listar_por_periodo(session, inicio, fim))
+        finally:
+            session.close()
+    return executar
+
+
+@benchmark('registros.relatorio_mensal')
+def bench_relatorio_mensal(ctx):
+    def executar():
+        session = ctx.SessionLocal()
+        try:
+            return RegistroVisitaService.relatorio_mensal(session, *MES_REFERENCIA)['quantidade_registros']
+        finally:
+            session.close()
+    return executar
+
+
+@benchmark('relatorios.nota_pagamento')
+def bench_nota(ctx):
+    """Dados e texto da nota da maior empresa no mês de referência"""
+    from views.relatorios_tab import RelatoriosTab
+    inicio, fim = periodo_referencia()
+
+    def executar():
+        session = ctx.SessionLocal()
+        try:
+            dados = RelatorioService.dados_nota(session, ctx.empresa_principal, inicio, fim)
+        finally:
+            session.close()
+        RelatoriosTab.formatar_nota_texto(dados)
+        return len(dados['registros'])
+    return executar
+
+
+def _bench_exportacao(ctx, formato: str, extensao: str):
+    from views.relatorios_tab import RelatoriosTab
+    inicio, fim = periodo_referencia()
+    destino = os.path.join(ctx.pasta, f'exportacao.{extensao}')
+
+    def executar():
+        session = ctx.SessionLocal()
+        try:
+            dados = RelatorioService.dados_exportacao(session, inicio, fim)
+        finally:
+            session.close()
+        RelatoriosTab.salvar_relatorio(dados, destino, formato)
+        return len(dados)
+    return executar
+
+
+@benchmark('exportacao.csv')
+def bench_exportacao_csv(ctx):
+    return _bench_exportacao(ctx, 'csv', 'csv')
+
+
+@benchmark('exportacao.xlsx')
+def bench_exportacao_xlsx(ctx):
+    return _bench_exportacao(ctx, 'excel', 'xlsx')
+
+
+@benchmark('importacao.csv')
+def bench_importacao_csv(ctx):
+    """Leitura, validação e precificação de um CSV no formato da exportação (sem commit)"""
+    from views.relatorios_tab import RelatoriosTab
+    from utils.importacao_csv import ImportadorCSV
+
+    inicio, fim = periodo_referencia()
+    session = ctx.SessionLocal()
+    try:
+        dados = RelatorioService.dados_exportacao(session, inicio, fim)[:max(100, ctx.tamanho // 20)]
+    finally:
+        session.close()
+    arquivo = os.path.join(ctx.pasta, 'importacao.csv')
+    RelatoriosTab.salvar_relatorio(dados, arquivo, 'csv')
+
+    def executar():
+        session = ctx.SessionLocal()
+        try:
+            resultado = ImportadorCSV.preparar_registros(session, ImportadorCSV.ler_arquivo(arquivo))
+            RegistroVisitaService.criar_em_lote(session, resultado['registros'], commit=False)
+            session.rollback()
+        finally:
+            session.close()
+        return len(resultado['registros'])
+    return executar
+
+
+@benchmark('api.get_precos_ativo')
+def bench_api_precos(ctx):
+    cliente = ctx.cliente_api()
+
+    def executar():
+        for _ in range(100):
+            cliente.get('/precos/ativo').raise_for_status()
+        return 100
+    return executar
+
+
+@benchmark('api.post_registros')
+def bench_api_registro(ctx):
+    cliente = ctx.cliente_api()
+    payload = {
+        'data': '2024-01-15', 'empresa_id': ctx.empresa_principal,
+        'embarcacao_id': ctx.embarcacao_principal, 'qtde_brasileiros': 5
+    }
+
+    def executar():
+        for _ in range(100):
+            cliente.post('/registros', json=payload).raise_for_status()
+        return 100
+    return executar
+
+
+@benchmark('api.post_registros_lote')
+def bench_api_registros_lote(ctx):
+    cliente = ctx.cliente_api()
+    payload = [
+        {'data': f'2024-01-{1 + i % 28:02d}', 'empresa_id': ctx.empresa_principal,
+         'embarcacao_id': ctx.embarcacao_principal, 'qtde_brasileiros': i % 10}
+        for i in range(1000)
+    ]
+
+    def executar():
+        cliente.post('/registros/lote', json=payload).raise_for_status()
+        return len(payload)
+    return executar
+
+
+@benchmark('api.validar_token')
+def bench_validar_token(ctx):
+    """10.000 validações de token pelo cache (o caminho de cada requisição autenticada)"""
+    import asyncio
+    from fastapi.security import HTTPAuthorizationCredentials
+    from models.database import Usuario
+    from models.services import TokenAPIService, UsuarioService, unidade_de_trabalho
+
+    ctx.cliente_api()  # configura o banco próprio da API antes de importá-la
+    from server.api import SessionLocal, usuario_autenticado
+
+    # O token é gravado no banco da API, consultado na primeira validação
+    with unidade_de_trabalho(SessionLocal) as session:
+        usuario = session.query(Usuario).first() or UsuarioService.criar_usuario(session, 'benchmark', 'benchmark')
+        token, _ = TokenAPIService.emitir(session, usuario)
+    credenciais = HTTPAuthorizationCredentials(scheme='Bearer', credentials=token)
+
+    async def validar(n):
+        for _ in range(n):
+            await usuario_autenticado(credenciais)
+
+    def executar():
+        asyncio.run(validar(10000))
+        return 10000
+    return executar
+
+
+@benchmark('validacao.cnpj')
+def bench_validar_cnpj(ctx):
+    from gerar_dados_sinteticos import gerar_cnpj
+    import numpy as np
+    rng = np.random.default_rng(7)
+    cnpjs = [gerar_cnpj(rng) for _ in range(5000)] + ['12.345.678/0001-00'] * 5000
+
+    def executar():
+        for cnpj in cnpjs:
+            Validadores.validar_cnpj(cnpj)
+        return len(cnpjs)
+    return executar
@@ -0,0 +1,240 @@
+"""
+Gerador de dados sintéticos para testes de carga e benchmarks
+
+Cria empresas, embarcações, tabelas de preço e temporadas inteiras de
+registros de visita com sazonalidade (alta temporada no verão, férias de
+julho e temporada das baleias) e mistura realista de categorias.
+
+Uso:
+    python gerar_dados_sinteticos.py --db carga.db --registros 1000000
+"""
+import argparse
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from models.database import init_db, RegistroVisita, TabelaPrecoIngresso, Empresa
+from models.precificacao import MotorPrecos, COLUNAS_QUANTIDADE
+from models.services import (
+    EmpresaService, EmbarcacaoService, TabelaPrecoService, unidade_de_trabalho
+)
+
+
+# Peso relativo de cada mês (jan..dez): verão e férias de julho em alta,
+# baleias de julho a outubro, baixa temporada de abril a junho
+PESO_MES = [1.6, 1.5, 1.2, 0.8, 0.6, 0.6, 1.3, 1.2, 1.1, 1.0, 0.9, 1.5]
+
+# Peso relativo do dia da semana (seg..dom)
+PESO_DIA_SEMANA = [0.8, 0.8, 0.8, 0.9, 1.1, 1.5, 1.4]
+
+# Proporção de cada categoria entre os visitantes (mesma ordem de COLUNAS_QUANTIDADE)
+MIX_CATEGORIAS = [0.06, 0.03, 0.70, 0.13, 0.08]
+
+# Probabilidade de permanência de 1, 2 e 3 dias
+DIST_PERMANENCIA = [0.85, 0.12, 0.03]
+
+# (tipo, capacidade mínima, capacidade máxima, comprimento mínimo, comprimento máximo)
+TIPOS_EMBARCACAO = [
+    ('Lancha', 6, 12, 6.0, 12.0),
+    ('Barco', 8, 20, 9.0, 15.0),
+    ('Escuna', 10, 25, 11.0, 16.0),
+    ('Catamarã', 12, 50, 12.0, 20.0),
+]
+
+# Valores base (ano de referência) das tabelas de preço geradas
+TABELA_BASE = {
+    'valor_estrangeiro': 92.00, 'valor_mercosul': 69.00, 'valor_brasileiro': 46.00,
+    'valor_entorno': 9.20, 'valor_isento': 0.0, 'valor_fundeio_ate8': 21.00,
+    'valor_fundeio_8a15': 28.00, 'valor_fundeio_acima15': 41.00,
+}
+
+
+def gerar_cnpj(rng) -> str:
+    """CNPJ formatado com dígitos verificadores válidos"""
+    numeros = list(rng.integers(0, 10, 8)) + [0, 0, 0, 1]
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(n * p for n, p in zip(numeros, pesos)) % 11
+        numeros.append(0 if resto < 2 else 11 - resto)
+    d = ''.join(str(n) for n in numeros)
+    return f"{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}"
+
+
+def criar_cadastros(SessionLocal, rng, n_empresas: int, embarcacoes_por_empresa: int,
+                    ano_inicio: int, ano_fim: int) -> list:
+    """
+    Cria empresas, embarcações e (se ainda não houver) tabelas de preço anuais
+
+    Returns:
+        Lista de (empresa_id, embarcacao_id, capacidade, comprimento_m)
+    """
+    frota = []
+    with unidade_de_trabalho(SessionLocal) as session:
+        if not session.query(TabelaPrecoIngresso).count():
+            for ano in range(ano_inicio, ano_fim + 1):
+                fator = 1.04 ** (ano - ano_inicio)
+                valores = {k: round(v * fator, 2) for k, v in TABELA_BASE.items()}
+                TabelaPrecoService.criar(session, ano, valores, ano_fim=ano, observacao=f'Sintética {ano}')
+
+        existentes = session.query(Empresa).count()
+        for i in range(n_empresas):
+            empresa = EmpresaService.criar(
+                session, f'Empresa Sintética {existentes + i + 1:04d}', gerar_cnpj(rng)
+            )
+            n_barcos = max(1, int(rng.poisson(embarcacoes_por_empresa)))
+            for j in range(n_barcos):
+                tipo, cap_min, cap_max, comp_min, comp_max = TIPOS_EMBARCACAO[rng.integers(len(TIPOS_EMBARCACAO))]
+                capacidade = int(rng.integers(cap_min, cap_max + 1))
+                comprimento = round(float(rng.uniform(comp_min, comp_max)), 1)
+                embarcacao = EmbarcacaoService.criar(
+                    session, empresa.id, f'{tipo} {empresa.id}-{j + 1}', tipo,
+                    capacidade_pax=capacidade, comprimento_m=comprimento
+                )
+                frota.append((empresa.id, embarcacao.id, capacidade, comprimento))
+    return frota
+
+
+def gerar_registros(rng, frota: list, n_registros: int, ano_inicio: int, ano_fim: int) -> dict:
+    """
+    Gera as colunas dos registros de visita (arrays NumPy)
+
+    A quantidade de saídas por dia segue a sazonalidade; cada saída usa uma
+    embarcação (empresas maiores saem mais) com ocupação proporcional à
+    capacidade.
+    """
+    dias = np.arange(np.datetime64(f'{ano_inicio}-01-01'), np.datetime64(f'{ano_fim + 1}-01-01'))
+    meses = dias.astype('datetime64[M]').astype(np.int64) % 12
+    dia_semana = (dias.astype(np.int64) + 3) % 7  # 1970-01-01 foi quinta-feira
+    pesos = np.array(PESO_MES)[meses] * np.array(PESO_DIA_SEMANA)[dia_semana]
+    por_dia = rng.multinomial(n_registros, pesos / pesos.sum())
+    datas = np.repeat(dias, por_dia)
+
+    # Embarcações com pesos do tipo Zipf por empresa (poucas empresas concentram as saídas)
+    empresas = np.array([f[0] for f in frota])
+    _, indice_empresa = np.unique(empresas, return_inverse=True)
+    pesos_frota = 1.0 / (1 + indice_empresa) ** 0.8
+    escolha = rng.choice(len(frota), size=n_registros, p=pesos_frota / pesos_frota.sum())
+    empresa_ids = empresas[escolha]
+    embarcacao_ids = np.array([f[1] for f in frota])[escolha]
+    capacidades = np.array([f[2] for f in frota])[escolha]
+    comprimentos = np.array([f[3] for f in frota], dtype=np.float64)[escolha]
+
+    # Ocupação maior na alta temporada
+    ocupacao = np.clip(0.35 + 0.3 * (pesos[np.repeat(np.arange(len(dias)), por_dia)] / pesos.max()), 0, 1)
+    visitantes = np.maximum(1, rng.binomial(capacidades, ocupacao))
+    categorias = rng.multinomial(visitantes, MIX_CATEGORIAS)
+    quantidades = {col: categorias[:, k] for k, col in enumerate(COLUNAS_QUANTIDADE)}
+    permanencias = rng.choice([1, 2, 3], size=n_registros, p=DIST_PERMANENCIA)
+
+    return {
+        'data': datas,
+        'empresa_id': empresa_ids,
+        'embarcacao_id': embarcacao_ids,
+        'permanencia': permanencias,
+        'comprimentos': comprimentos,
+        **quantidades,
+    }
+
+
+def inserir_registros(engine, tabelas: list, colunas: dict, tamanho_lote: int = 50000) -> int:
+    """
+    Precifica e insere os registros em lotes (executemany), em uma única transação
+
+    Os valores são passados direto ao driver, já no formato de armazenamento
+    do SQLAlchemy para SQLite (datas em ISO), evitando o processamento de
+    parâmetros linha a linha.
+    """
+    n = len(colunas['data'])
+    nomes = ['data', 'empresa_id', 'embarcacao_id', 'permanencia'] + COLUNAS_QUANTIDADE + [
+        'valor_total', 'qtde_maior12', 'qtde_menor12', 'criado_em', 'atualizado_em'
+    ]
+    sql = (
+        f"INSERT INTO {RegistroVisita.__tablename__} ({', '.join(nomes)}) "
+        f"VALUES ({', '.join('?' * len(nomes))})"
+    )
+    agora = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+
+    with engine.begin() as conn:
+        # Carga descartável: dispensa o fsync (vale só para esta conexão,
+        # descartada ao final por engine.dispose() em gerar_dados)
+        conn.exec_driver_sql('PRAGMA synchronous = OFF')
+        for inicio in range(0, n, tamanho_lote):
+            fatia = slice(inicio, inicio + tamanho_lote)
+            quantidades = {col: colunas[col][fatia] for col in COLUNAS_QUANTIDADE}
+            valores = MotorPrecos.calcular_lote(
+                tabelas, colunas['data'][fatia], quantidades,
+                colunas['permanencia'][fatia], colunas['comprimentos'][fatia]
+            )['valor_total']
+
+            tamanho = len(valores)
+            listas = [np.datetime_as_string(colunas['data'][fatia], unit='D').tolist()] + [
+                colunas[nome][fatia].tolist() for nome in nomes[1:9]
+            ] + [valores.tolist(), [0] * tamanho, [0] * tamanho, [agora] * tamanho, [agora] * tamanho]
+            conn.exec_driver_sql(sql, list(zip(*listas)))
+    return n
+
+
+def gerar_dados(db_path: str, n_registros: int = 100000, n_empresas: int = 20,
+                embarcacoes_por_empresa: int = 3, ano_inicio: int = 2020,
+                ano_fim: int = None, semente: int = 42) -> dict:
+    """
+    Popula o banco com cadastros e registros sintéticos
+
+    Returns:
+        dict com empresas, embarcacoes, registros e tempos (segundos)
+    """
+    ano_fim = ano_fim or date.today().year
+    rng = np.random.default_rng(semente)
+    engine, SessionLocal = init_db(db_path)
+
+    inicio = time.perf_counter()
+    frota = criar_cadastros(SessionLocal, rng, n_empresas, embarcacoes_por_empresa, ano_inicio, ano_fim)
+    tempo_cadastros = time.perf_counter() - inicio
+
+    session = SessionLocal()
+    tabelas = TabelaPrecoService.listar_snapshots(session)
+    session.close()
+
+    inicio = time.perf_counter()
+    colunas = gerar_registros(rng, frota, n_registros, ano_inicio, ano_fim)
+    tempo_geracao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    inserir_registros(engine, tabelas, colunas)
+    tempo_insercao = time.perf_counter() - inicio
+    engine.dispose()
+
+    return {
+        'empresas': n_empresas,
+        'embarcacoes': len(frota),
+        'registros': n_registros,
+        'tempo_cadastros': tempo_cadastros,
+        'tempo_geracao': tempo_geracao,
+        'tempo_insercao': tempo_insercao,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos para testes de carga')
+    parser.add_argument('--db', default='abrolhos_carga.db', help='Arquivo do banco de dados')
+    parser.add_argument('--registros', type=int, default=100000, help='Total de registros de visita')
+    parser.add_argument('--empresas', type=int, default=20, help='Número de empresas')
+    parser.add_argument('--embarcacoes', type=int, default=3, help='Média de embarcações por empresa')
+    parser.add_argument('--ano-inicio', type=int, default=2020, help='Primeiro ano das temporadas')
+    parser.add_argument('--ano-fim', type=int, default=None, help='Último ano (padrão: ano atual)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente aleatória (reprodutível)')
+    args = parser.parse_args()
+
+    print(f"Gerando dados sintéticos em {args.db}...")
+    resumo = gerar_dados(
+        args.db, args.registros, args.empresas, args.embarcacoes,
+        args.ano_inicio, args.ano_fim, args.semente
+    )
+    print(f"   ✓ {resumo['empresas']} empresas e {resumo['embarcacoes']} embarcações "
+          f"({resumo['tempo_cadastros']:.2f}s)")
+    print(f"   ✓ {resumo['registros']:,} registros gerados em {resumo['tempo_geracao']:.2f}s "
+          f"e inseridos em {resumo['tempo_insercao']:.2f}s".replace(',', '.'))
+
+
+if __name__ == '__main__':
+    main()
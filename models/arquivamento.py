@@ -0,0 +1,280 @@
+"""
+Arquivamento de temporadas encerradas de registros_visita
+
+Os registros de anos encerrados são movidos do banco principal para um banco
+de arquivo ao lado dele (<banco>_arquivo.db), que é anexado (ATTACH) às
+conexões sob demanda. A tabela temporadas_arquivadas do banco principal
+registra quais anos estão no arquivo: consultas de períodos que não tocam
+esses anos continuam lendo apenas a tabela principal, e as que tocam leem a
+união (UNION ALL) das duas tabelas, de forma transparente para os serviços.
+
+Registros arquivados são somente leitura. Registros lançados depois em um ano
+já arquivado ficam no banco principal (e aparecem nas consultas normalmente)
+até o próximo arquivamento. A tabela principal usa AUTOINCREMENT, para que um
+id arquivado nunca seja atribuído a um registro novo.
+"""
+import os
+import re
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import Column, MetaData, Table, and_, func, or_, select, union_all
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from models.database import (
+    GATILHOS_VERSAO, INDICES_ADICIONAIS, RegistroVisita, TabelaPrecoIngresso, TemporadaArquivada
+)
+
+
+# Nome do banco de arquivo nas conexões (arquivo.registros_visita)
+ESQUEMA = 'arquivo'
+
+# Mesmo índice de cobertura do banco principal (INDICES_ADICIONAIS)
+INDICE_ARQUIVO = (
+    f"CREATE INDEX IF NOT EXISTS {ESQUEMA}.ix_registros_visita_data ON registros_visita ("
+    "data, empresa_id, embarcacao_id, qtde_estrangeiros, qtde_mercosul, "
+    "qtde_brasileiros, qtde_entorno, qtde_isentos, valor_total)"
+)
+
+COLUNAS = [coluna.name for coluna in RegistroVisita.__table__.columns]
+
+# Tabela de registros do banco de arquivo, com as mesmas colunas da principal
+REGISTROS_ARQUIVADOS = Table(
+    RegistroVisita.__tablename__, MetaData(),
+    *[Column(c.name, c.type, primary_key=c.primary_key) for c in RegistroVisita.__table__.columns],
+    schema=ESQUEMA
+)
+
+
+def caminho_arquivo(db_path: str) -> str:
+    """Banco de arquivo correspondente ao banco principal"""
+    base, _ = os.path.splitext(db_path)
+    return f'{base}_arquivo.db'
+
+
+def _anexar(session: Session):
+    """Anexa o banco de arquivo à conexão da sessão (uma vez por conexão do pool)"""
+    conexao = session.connection()
+    info = conexao.connection.info
+    if info.get('arquivo_anexado'):
+        return
+    caminho = caminho_arquivo(conexao.engine.url.database)
+    if not os.path.exists(caminho):
+        raise RuntimeError(f"Banco de arquivo não encontrado: {caminho}")
+    conexao.exec_driver_sql(f"ATTACH DATABASE ? AS {ESQUEMA}", (caminho,))
+    info['arquivo_anexado'] = True
+
+
+def _anexar_criando(session: Session):
+    """Como _anexar, mas criando o banco de arquivo se ainda não existir"""
+    caminho = caminho_arquivo(session.connection().engine.url.database)
+    if not os.path.exists(caminho):
+        open(caminho, 'ab').close()
+    _anexar(session)
+
+
+def _garantir_autoincremento(conexao):
+    """
+    Recria registros_visita com AUTOINCREMENT em bancos criados antes dele
+
+    Sem AUTOINCREMENT o SQLite atribui ao novo registro o maior id restante
+    + 1, repetindo ids arquivados quando os registros acima deles são
+    excluídos. A conversão copia a tabela e recria índices e gatilhos, em
+    uma única transação.
+    """
+    ddl = conexao.exec_driver_sql(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = 'registros_visita'"
+    ).scalar()
+    if 'AUTOINCREMENT' in ddl.upper():
+        return
+    from models.busca import criar_indices_busca
+
+    tabela = RegistroVisita.__table__
+    colunas = ', '.join(COLUNAS)
+    nova = str(CreateTable(tabela).compile(dialect=conexao.dialect)).replace(
+        'CREATE TABLE registros_visita', 'CREATE TABLE registros_visita_nova', 1
+    )
+    # Fora de uma transação, o sqlite3 executaria cada DDL isoladamente
+    conexao.exec_driver_sql('SAVEPOINT autoincremento')
+    try:
+        conexao.exec_driver_sql(nova)
+        conexao.exec_driver_sql(
+            f"INSERT INTO registros_visita_nova ({colunas}) SELECT {colunas} FROM main.registros_visita"
+        )
+        # Remove também os índices e gatilhos da tabela, recriados abaixo
+        conexao.exec_driver_sql('DROP TABLE main.registros_visita')
+        conexao.exec_driver_sql('ALTER TABLE registros_visita_nova RENAME TO registros_visita')
+        for indice in tabela.indexes:
+            conexao.exec_driver_sql(str(CreateIndex(indice).compile(dialect=conexao.dialect)))
+        for ddl in INDICES_ADICIONAIS + GATILHOS_VERSAO:
+            conexao.exec_driver_sql(ddl)
+        criar_indices_busca(conexao)
+    except BaseException:
+        conexao.exec_driver_sql('ROLLBACK TO autoincremento')
+        conexao.exec_driver_sql('RELEASE autoincremento')
+        raise
+    conexao.exec_driver_sql('RELEASE autoincremento')
+
+
+def anos_arquivados(session: Session, data_inicio: Optional[date] = None,
+                    data_fim: Optional[date] = None) -> List[int]:
+    """Anos arquivados (opcionalmente apenas os que se sobrepõem ao período)"""
+    query = session.query(TemporadaArquivada.ano)
+    if data_inicio is not None:
+        query = query.filter(TemporadaArquivada.ano >= data_inicio.year)
+    if data_fim is not None:
+        query = query.filter(TemporadaArquivada.ano <= data_fim.year)
+    return [ano for ano, in query.order_by(TemporadaArquivada.ano).all()]
+
+
+def fonte_registros(session: Session, data_inicio: Optional[date] = None,
+                    data_fim: Optional[date] = None, colunas: Optional[List[str]] = None):
+    """
+    Entidade a consultar para os registros de visita do período
+
+    Retorna o próprio RegistroVisita quando o período não inclui anos
+    arquivados; caso contrário, um alias de RegistroVisita sobre a união das
+    tabelas principal e de arquivo, usado da mesma forma nas consultas
+    (R.data, R.valor_total, session.query(R)...).
+
+    Args:
+        colunas: Para consultas que não carregam objetos (agregações), as
+            colunas usadas; a união projeta só essas colunas, de modo que as
+            duas partes são lidas apenas do índice de cobertura por data.
+            Nesse caso é retornada a coleção de colunas da união (R.data...).
+    """
+    if not anos_arquivados(session, data_inicio, data_fim):
+        return RegistroVisita
+    _anexar(session)
+    if colunas is None:
+        partes = (select(RegistroVisita.__table__), select(REGISTROS_ARQUIVADOS))
+    else:
+        partes = (
+            select(*[RegistroVisita.__table__.c[nome] for nome in colunas]),
+            select(*[REGISTROS_ARQUIVADOS.c[nome] for nome in colunas]),
+        )
+    uniao = union_all(*partes).subquery('registros_visita_todos')
+    return uniao.c if colunas is not None else aliased(RegistroVisita, uniao)
+
+
+def fontes_registros(session: Session, data_inicio: Optional[date] = None,
+                     data_fim: Optional[date] = None) -> list:
+    """
+    Tabelas com registros do período, para agregações decomponíveis (somas)
+
+    Executar a mesma consulta agrupada em cada tabela e somar os resultados
+    mantém o GROUP BY resolvido pelo índice de cobertura, o que a união não
+    permite. Retorna [RegistroVisita] ou [RegistroVisita, colunas do arquivo].
+    """
+    if not anos_arquivados(session, data_inicio, data_fim):
+        return [RegistroVisita]
+    _anexar(session)
+    return [RegistroVisita, REGISTROS_ARQUIVADOS.c]
+
+
+class ArquivamentoService:
+    """Arquivamento das temporadas encerradas"""
+
+    @staticmethod
+    def temporadas_fechadas(session: Session) -> List[int]:
+        """
+        Anos anteriores ao atual cobertos por uma tabela de preços encerrada
+        (ano_fim preenchido) e que ainda têm registros no banco principal
+        """
+        ano_atual = date.today().year
+        tabelas = session.query(TabelaPrecoIngresso.ano_inicio, TabelaPrecoIngresso.ano_fim).filter(
+            TabelaPrecoIngresso.ano_fim.isnot(None),
+            TabelaPrecoIngresso.ano_fim < ano_atual
+        ).all()
+        fechados = {ano for inicio, fim in tabelas for ano in range(inicio, fim + 1)}
+        return [ano for ano in ArquivamentoService.anos_com_registros(session) if ano in fechados]
+
+    @staticmethod
+    def anos_com_registros(session: Session) -> List[int]:
+        """Anos com registros no banco principal"""
+        ano = func.substr(RegistroVisita.data, 1, 4)
+        return sorted(int(a) for a, in session.query(ano).distinct().all())
+
+    @staticmethod
+    def listar(session: Session) -> List[TemporadaArquivada]:
+        return session.query(TemporadaArquivada).order_by(TemporadaArquivada.ano).all()
+
+    @staticmethod
+    def arquivar(session: Session, anos: Optional[List[int]] = None, compactar: bool = False) -> dict:
+        """
+        Move os registros dos anos informados (padrão: temporadas_fechadas)
+        para o banco de arquivo, em uma única transação
+
+        Args:
+            session: Sessão sem alterações pendentes (o banco de arquivo é
+                anexado antes de qualquer escrita)
+            anos: Anos a arquivar; devem ser anteriores ao ano atual
+            compactar: Executa VACUUM no banco principal ao final, devolvendo
+                ao sistema o espaço liberado
+
+        Returns:
+            dict {ano: registros movidos}
+
+        Raises:
+            ValueError: ano atual/futuro
+        """
+        if anos is None:
+            anos = ArquivamentoService.temporadas_fechadas(session)
+        anos = sorted(set(anos))
+        ano_atual = date.today().year
+        if any(ano >= ano_atual for ano in anos):
+            raise ValueError("Apenas temporadas anteriores ao ano atual podem ser arquivadas.")
+        if not anos:
+            return {}
+
+        arquivados = or_(*[
+            and_(RegistroVisita.data >= date(ano, 1, 1), RegistroVisita.data <= date(ano, 12, 31))
+            for ano in anos
+        ])
+        maior_arquivado = session.query(func.max(RegistroVisita.id)).filter(arquivados).scalar()
+        if maior_arquivado is None:
+            return {ano: 0 for ano in anos}
+
+        # Cria o banco de arquivo com a mesma estrutura da tabela principal
+        _anexar_criando(session)
+        conexao = session.connection()
+        _garantir_autoincremento(conexao)
+        ddl = conexao.exec_driver_sql(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = 'registros_visita'"
+        ).scalar()
+        conexao.exec_driver_sql(re.sub(
+            r'^CREATE TABLE\s+"?registros_visita"?',
+            f'CREATE TABLE IF NOT EXISTS {ESQUEMA}.registros_visita', ddl
+        ))
+        conexao.exec_driver_sql(INDICE_ARQUIVO)
+
+        colunas = ', '.join(COLUNAS)
+        movidos = {}
+        for ano in anos:
+            periodo = (date(ano, 1, 1).isoformat(), date(ano, 12, 31).isoformat())
+            filtro = "data >= ? AND data <= ?"
+            quantidade, valor = conexao.exec_driver_sql(
+                f"SELECT count(*), coalesce(sum(valor_total), 0) FROM main.registros_visita WHERE {filtro}",
+                periodo
+            ).one()
+            conexao.exec_driver_sql(
+                f"INSERT INTO {ESQUEMA}.registros_visita ({colunas}) "
+                f"SELECT {colunas} FROM main.registros_visita WHERE {filtro}", periodo
+            )
+            conexao.exec_driver_sql(f"DELETE FROM main.registros_visita WHERE {filtro}", periodo)
+
+            temporada = session.get(TemporadaArquivada, ano)
+            if temporada is None:
+                temporada = TemporadaArquivada(ano=ano, registros=0, valor_total=0.0)
+                session.add(temporada)
+            temporada.registros += quantidade
+            temporada.valor_total += valor
+            movidos[ano] = quantidade
+
+        session.commit()
+        if compactar:
+            conexao = session.connection()
+            conexao.exec_driver_sql('VACUUM main')
+            session.commit()
+        return movidos
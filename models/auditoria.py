@@ -0,0 +1,108 @@
+"""
+Gravação do log de auditoria em segundo plano, em lotes
+"""
+import atexit
+import threading
+from datetime import datetime
+from sqlalchemy import insert
+
+from models.database import LogAuditoria
+
+
+class GravadorAuditoria:
+    """
+    Fila em memória de entradas de auditoria, gravadas por uma thread própria
+    com um único INSERT (executemany) e um único commit por lote
+
+    O lote é gravado a cada `intervalo` segundos ou assim que a fila atinge
+    `tamanho_lote` entradas. parar() (chamado também na saída do interpretador)
+    grava o que restar na fila.
+    """
+
+    def __init__(self, SessionLocal, intervalo: float = 2.0, tamanho_lote: int = 200):
+        self.SessionLocal = SessionLocal
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+
+        self._fila = []
+        self._lock = threading.Lock()
+        self._lock_gravacao = threading.Lock()
+        self._acordar = threading.Event()
+        self._parado = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        """Inicia a thread de gravação"""
+        if self._thread is not None:
+            return
+        self._parado.clear()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+        self._thread.start()
+        atexit.register(self.parar)
+
+    def registrar(self, usuario: str, acao: str, tabela: str,
+                  registro_id: int = None, descricao: str = None):
+        """Enfileira uma entrada (a data/hora é a do momento da ação)"""
+        entrada = {
+            'usuario': usuario,
+            'acao': acao,
+            'tabela': tabela,
+            'registro_id': registro_id,
+            'descricao': descricao,
+            'data_hora': datetime.now(),
+        }
+        with self._lock:
+            self._fila.append(entrada)
+            cheia = len(self._fila) >= self.tamanho_lote
+        if cheia:
+            self._acordar.set()
+
+    def pendentes(self) -> int:
+        """Quantidade de entradas ainda não gravadas"""
+        with self._lock:
+            return len(self._fila)
+
+    def descarregar(self) -> int:
+        """
+        Grava imediatamente as entradas pendentes
+
+        Returns:
+            Quantidade de entradas gravadas
+        """
+        with self._lock_gravacao:
+            with self._lock:
+                lote, self._fila = self._fila, []
+            if not lote:
+                return 0
+
+            session = self.SessionLocal()
+            try:
+                session.execute(insert(LogAuditoria), lote)
+                session.commit()
+            except Exception:
+                session.rollback()
+                # Devolve o lote à fila para nova tentativa
+                with self._lock:
+                    self._fila[:0] = lote
+                raise
+            finally:
+                session.close()
+            return len(lote)
+
+    def parar(self):
+        """Encerra a thread e grava o que restar na fila"""
+        self._parado.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.descarregar()
+
+    def _executar(self):
+        while not self._parado.is_set():
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            try:
+                self.descarregar()
+            except Exception as e:
+                print(f"Erro ao gravar log de auditoria: {e}")
@@ -0,0 +1,620 @@
+"""
+Backup do banco com a API de backup online do SQLite
+
+A cópia é feita em passos de poucas páginas, com uma pausa entre eles para
+que outros processos (ex.: a API de sincronização) continuem gravando;
+o resultado é sempre um arquivo consistente, ao contrário de copiar o .db
+com o banco em uso. A cópia é verificada com PRAGMA integrity_check e pode
+ser compactada (gzip ou zstd).
+
+Backups incrementais (BackupIncremental) guardam apenas as páginas do banco
+que mudaram desde o backup anterior da mesma cadeia; restaurar() reconstrói
+o banco a partir de um backup completo ou reaplicando a cadeia.
+
+Se houver um banco de arquivo (temporadas arquivadas, ver arquivamento), ele
+entra em todos os backups junto com o banco principal e é restaurado com ele.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from models.arquivamento import caminho_arquivo
+
+
+# Extensão acrescentada ao arquivo de backup por tipo de compressão
+EXTENSOES_COMPRESSAO = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def _abrir_zstd(caminho: str, modo: str):
+    """Arquivo zstd (compression.zstd no Python 3.14+ ou o pacote zstandard)"""
+    try:
+        from compression import zstd
+        return zstd.open(caminho, modo)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("Compressão zstd requer o pacote 'zstandard' (pip install zstandard).")
+    return zstandard.open(caminho, modo)
+
+
+def backup_do_arquivo(backup: str) -> str:
+    """
+    Backup do banco de arquivo que acompanha um backup completo, com o mesmo
+    sufixo dos bancos (abrolhos.db.gz -> abrolhos_arquivo.db.gz)
+    """
+    extensao = next((ext for ext in EXTENSOES_COMPRESSAO.values() if ext and backup.endswith(ext)), '')
+    base, extensao_banco = os.path.splitext(backup[:len(backup) - len(extensao)])
+    return f'{base}_arquivo{extensao_banco}{extensao}'
+
+
+def abrir_arquivo(caminho: str, modo: str = 'rb'):
+    """Abre um arquivo de backup, (des)compactando conforme a extensão"""
+    if caminho.endswith('.gz'):
+        return gzip.open(caminho, modo)
+    if caminho.endswith('.zst'):
+        return _abrir_zstd(caminho, modo)
+    return open(caminho, modo)
+
+
+class BackupBanco:
+    """Cópia online, verificação e compressão de bancos SQLite"""
+
+    @staticmethod
+    def copiar(db_path: str, destino: str, paginas_por_passo: int = 256, pausa: float = 0.005,
+               progresso: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Copia o banco com sqlite3.Connection.backup
+
+        Args:
+            paginas_por_passo: páginas copiadas por vez (o banco só fica
+                bloqueado para escrita durante cada passo)
+            pausa: segundos de espera entre os passos
+            progresso: callback(copiadas, total) chamado a cada passo
+
+        Returns:
+            Total de páginas copiadas
+        """
+        total_paginas = 0
+
+        def ao_copiar(status, restantes, total):
+            nonlocal total_paginas
+            total_paginas = total
+            if progresso:
+                progresso(total - restantes, total)
+            if restantes and pausa:
+                time.sleep(pausa)
+
+        origem = sqlite3.connect(db_path)
+        copia = sqlite3.connect(destino)
+        try:
+            origem.backup(copia, pages=paginas_por_passo, progress=ao_copiar)
+        finally:
+            copia.close()
+            origem.close()
+        return total_paginas
+
+    @staticmethod
+    def verificar(caminho: str) -> str:
+        """Resultado do PRAGMA integrity_check ('ok' se o banco está íntegro)"""
+        conexao = sqlite3.connect(caminho)
+        try:
+            linhas = conexao.execute('PRAGMA integrity_check').fetchall()
+        finally:
+            conexao.close()
+        return '\n'.join(str(linha[0]) for linha in linhas)
+
+    @staticmethod
+    def compactar(origem: str, destino: str, compressao: str):
+        with open(origem, 'rb') as entrada, abrir_arquivo(destino, 'wb') as saida:
+            shutil.copyfileobj(entrada, saida, 1024 * 1024)
+
+    @staticmethod
+    def executar(db_path: str, destino: str, compressao: str = None, verificar: bool = True,
+                 paginas_por_passo: int = 256, pausa: float = 0.005,
+                 progresso: Optional[Callable[[int, int], None]] = None,
+                 incluir_arquivo: bool = True) -> dict:
+        """
+        Faz o backup completo: cópia online, verificação e compressão opcional
+
+        A cópia é feita em um arquivo temporário na mesma pasta do destino e
+        só é movida para o nome final depois de verificada. O banco de arquivo,
+        se existir, é copiado em seguida para backup_do_arquivo(destino).
+
+        Returns:
+            dict com arquivo, paginas, tamanho, integridade, duracao e
+            arquivo_temporadas (resultado do backup do banco de arquivo ou None)
+
+        Raises:
+            ValueError: compressão desconhecida
+            RuntimeError: a cópia falhou na verificação de integridade
+        """
+        if compressao not in EXTENSOES_COMPRESSAO:
+            raise ValueError(f"Compressão desconhecida: {compressao}")
+
+        inicio = time.perf_counter()
+        pasta = os.path.dirname(os.path.abspath(destino))
+        os.makedirs(pasta, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(suffix='.db', dir=pasta)
+        os.close(descritor)
+        try:
+            paginas = BackupBanco.copiar(db_path, temporario, paginas_por_passo, pausa, progresso)
+
+            integridade = None
+            if verificar:
+                integridade = BackupBanco.verificar(temporario)
+                if integridade != 'ok':
+                    raise RuntimeError(f"Backup falhou na verificação de integridade:\n{integridade}")
+
+            if compressao:
+                BackupBanco.compactar(temporario, destino, compressao)
+            else:
+                os.replace(temporario, destino)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+        # Depois do principal: um arquivamento concorrente deixa os registros
+        # nos dois backups, nunca em nenhum
+        arquivo_temporadas = None
+        if incluir_arquivo and os.path.exists(caminho_arquivo(db_path)):
+            arquivo_temporadas = BackupBanco.executar(
+                caminho_arquivo(db_path), backup_do_arquivo(destino), compressao, verificar,
+                paginas_por_passo, pausa, progresso, incluir_arquivo=False
+            )
+
+        return {
+            'arquivo': destino,
+            'paginas': paginas,
+            'tamanho': os.path.getsize(destino),
+            'integridade': integridade,
+            'arquivo_temporadas': arquivo_temporadas,
+            'duracao': time.perf_counter() - inicio,
+        }
+
+
+class BackupIncremental:
+    """
+    Cadeias de backups incrementais com rastreamento de alterações por página
+
+    Cada backup da cadeia é formado por três arquivos com o mesmo nome-base:
+    <nome>.json (manifesto), <nome>.paginas.gz (páginas gravadas, cada uma
+    precedida do seu número) e <nome>.hashes (resumo BLAKE2 de cada página
+    do banco, usado para detectar as alterações do próximo backup). O primeiro
+    backup da cadeia contém todas as páginas; os seguintes, apenas as que
+    mudaram. O banco é lido de uma cópia feita com a API de backup online, que
+    é descartada ao final. O banco de arquivo, se existir, tem suas páginas em
+    <nome>.arquivo.paginas.gz e <nome>.arquivo.hashes, com o mesmo esquema.
+    """
+
+    PREFIXO = 'abrolhos_inc_'
+    TAMANHO_RESUMO = 16
+    # Sufixo do nome-base das páginas do banco de arquivo
+    ARQUIVO = '.arquivo'
+
+    def __init__(self, pasta: str, prefixo: str = None):
+        self.pasta = pasta
+        self.prefixo = prefixo or self.PREFIXO
+
+    def manifestos(self) -> list:
+        """Manifestos da pasta, do mais antigo ao mais recente"""
+        return sorted(glob.glob(os.path.join(glob.escape(self.pasta), f'{self.prefixo}*.json')))
+
+    @staticmethod
+    def ler_manifesto(caminho: str) -> dict:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def cadeia(manifesto: str) -> list:
+        """Manifestos necessários para restaurar `manifesto`, do completo até ele"""
+        caminhos = []
+        atual = manifesto
+        while atual:
+            caminhos.append(atual)
+            anterior = BackupIncremental.ler_manifesto(atual)['anterior']
+            atual = os.path.join(os.path.dirname(atual), anterior) if anterior else None
+        return caminhos[::-1]
+
+    @staticmethod
+    def _arquivos(caminho_base: str) -> list:
+        """Arquivos de dados de um backup (sem o manifesto)"""
+        return [caminho_base + parte + extensao
+                for parte in ('', BackupIncremental.ARQUIVO)
+                for extensao in ('.paginas.gz', '.hashes')]
+
+    def _novo_nome(self) -> str:
+        # Microssegundos no nome: a ordem alfabética é a ordem da cadeia
+        return f"{self.prefixo}{datetime.now():%Y%m%d_%H%M%S_%f}"
+
+    def _gravar_paginas(self, db_path: str, caminho_base: str, anterior: Optional[dict],
+                        base_anterior: Optional[str], pausa: float,
+                        progresso: Optional[Callable[[int, int], None]]) -> dict:
+        """
+        Copia `db_path` e grava em caminho_base.paginas.gz as páginas que
+        mudaram desde o backup `anterior` (dict com tamanho_pagina, cujos
+        resumos estão em base_anterior.hashes), ou todas, sem anterior
+
+        Returns:
+            dict com tipo ('completo' se todas as páginas foram gravadas ou
+            'incremental'), tamanho_pagina, total_paginas, paginas_gravadas e sha256
+        """
+        descritor, temporario = tempfile.mkstemp(suffix='.db', dir=self.pasta)
+        os.close(descritor)
+        try:
+            BackupBanco.copiar(db_path, temporario, pausa=pausa, progresso=progresso)
+            integridade = BackupBanco.verificar(temporario)
+            if integridade != 'ok':
+                raise RuntimeError(f"Backup falhou na verificação de integridade:\n{integridade}")
+
+            conexao = sqlite3.connect(temporario)
+            try:
+                tamanho_pagina = conexao.execute('PRAGMA page_size').fetchone()[0]
+            finally:
+                conexao.close()
+
+            resumos_anteriores = None
+            # Tamanho de página diferente (VACUUM): todas as páginas são gravadas
+            if anterior and anterior['tamanho_pagina'] == tamanho_pagina:
+                with open(base_anterior + '.hashes', 'rb') as f:
+                    resumos_anteriores = f.read()
+
+            n = self.TAMANHO_RESUMO
+            resumo_banco = hashlib.sha256()
+            resumos = bytearray()
+            total_paginas = alteradas = 0
+            with open(temporario, 'rb') as banco, \
+                    gzip.open(caminho_base + '.paginas.gz', 'wb', compresslevel=6) as saida:
+                while True:
+                    pagina = banco.read(tamanho_pagina)
+                    if not pagina:
+                        break
+                    total_paginas += 1
+                    resumo_banco.update(pagina)
+                    resumo = hashlib.blake2b(pagina, digest_size=n).digest()
+                    resumos += resumo
+                    posicao = (total_paginas - 1) * n
+                    if resumos_anteriores is None or resumos_anteriores[posicao:posicao + n] != resumo:
+                        saida.write(struct.pack('>I', total_paginas))
+                        saida.write(pagina)
+                        alteradas += 1
+
+            with open(caminho_base + '.hashes', 'wb') as f:
+                f.write(resumos)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+        return {
+            'tipo': 'completo' if resumos_anteriores is None else 'incremental',
+            'tamanho_pagina': tamanho_pagina,
+            'total_paginas': total_paginas,
+            'paginas_gravadas': alteradas,
+            'sha256': resumo_banco.hexdigest(),
+        }
+
+    def executar(self, db_path: str, completo: bool = False, pausa: float = 0.005,
+                 progresso: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        Grava um backup incremental (ou completo, se não houver cadeia ou `completo`)
+
+        Returns:
+            Manifesto gravado, acrescido de 'manifesto' (caminho) e 'duracao'
+        """
+        inicio = time.perf_counter()
+        os.makedirs(self.pasta, exist_ok=True)
+        existentes = self.manifestos()
+        anterior = None if completo or not existentes else existentes[-1]
+        dados_anterior = self.ler_manifesto(anterior) if anterior else None
+        base_anterior = anterior[:-len('.json')] if anterior else None
+
+        nome = self._novo_nome()
+        caminho_base = os.path.join(self.pasta, nome)
+        try:
+            paginas = self._gravar_paginas(db_path, caminho_base, dados_anterior, base_anterior,
+                                           pausa, progresso)
+            if paginas['tipo'] == 'completo':
+                # Nova cadeia (inclusive quando o tamanho de página mudou)
+                anterior = dados_anterior = None
+
+            # Depois do principal: um arquivamento concorrente deixa os registros
+            # nas duas cópias, nunca em nenhuma
+            arquivo_temporadas = None
+            if os.path.exists(caminho_arquivo(db_path)):
+                arquivo_anterior = dados_anterior.get('arquivo_temporadas') if dados_anterior else None
+                arquivo_temporadas = self._gravar_paginas(
+                    caminho_arquivo(db_path), caminho_base + self.ARQUIVO, arquivo_anterior,
+                    base_anterior + self.ARQUIVO if arquivo_anterior else None, pausa, progresso
+                )
+        except BaseException:
+            for arquivo in self._arquivos(caminho_base):
+                if os.path.exists(arquivo):
+                    os.remove(arquivo)
+            raise
+
+        manifesto = {
+            'tipo': paginas['tipo'],
+            'anterior': os.path.basename(anterior) if anterior else None,
+            'criado_em': datetime.now().isoformat(timespec='seconds'),
+            'tamanho_pagina': paginas['tamanho_pagina'],
+            'total_paginas': paginas['total_paginas'],
+            'paginas_gravadas': paginas['paginas_gravadas'],
+            'sha256': paginas['sha256'],
+            'arquivo_temporadas': arquivo_temporadas,
+        }
+        # O manifesto é gravado por último: um backup sem manifesto não faz parte da cadeia
+        with open(caminho_base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=2)
+
+        tamanho = sum(os.path.getsize(arquivo) for arquivo in self._arquivos(caminho_base)
+                      if arquivo.endswith('.paginas.gz') and os.path.exists(arquivo))
+        return dict(manifesto, manifesto=caminho_base + '.json', tamanho=tamanho,
+                    duracao=time.perf_counter() - inicio)
+
+    @staticmethod
+    def _aplicar_paginas(cadeia: list, parte: str, final: dict, destino: str):
+        """
+        Reconstrói um banco aplicando, em ordem, as páginas `parte` ('' ou
+        ARQUIVO) dos backups da cadeia e confere o resumo de `final`
+        """
+        partes = []
+        for caminho in cadeia:
+            dados = BackupIncremental.ler_manifesto(caminho)
+            dados = dados.get('arquivo_temporadas') if parte else dados
+            if dados is None:
+                # Banco de arquivo ainda inexistente neste backup
+                continue
+            if dados['tipo'] == 'completo':
+                # O banco de arquivo pode recomeçar no meio da cadeia (ex.: VACUUM)
+                partes = []
+            partes.append((caminho, dados))
+
+        tamanho_pagina = final['tamanho_pagina']
+        with open(destino, 'wb') as banco:
+            for caminho, dados in partes:
+                if dados['tamanho_pagina'] != tamanho_pagina:
+                    raise RuntimeError(f"Cadeia inconsistente em {os.path.basename(caminho)}")
+                with gzip.open(caminho[:-len('.json')] + parte + '.paginas.gz', 'rb') as paginas:
+                    while True:
+                        cabecalho = paginas.read(4)
+                        if not cabecalho:
+                            break
+                        numero = struct.unpack('>I', cabecalho)[0]
+                        banco.seek((numero - 1) * tamanho_pagina)
+                        banco.write(paginas.read(tamanho_pagina))
+            banco.truncate(final['total_paginas'] * tamanho_pagina)
+
+        resumo = hashlib.sha256()
+        with open(destino, 'rb') as banco:
+            for bloco in iter(lambda: banco.read(1024 * 1024), b''):
+                resumo.update(bloco)
+        if resumo.hexdigest() != final['sha256']:
+            raise RuntimeError("O banco restaurado não confere com o resumo do backup.")
+
+    @staticmethod
+    def restaurar(manifesto: str, destino: str, destino_arquivo: str = None) -> dict:
+        """
+        Reconstrói o banco aplicando, em ordem, as páginas da cadeia até `manifesto`
+
+        Se o backup incluir o banco de arquivo, ele é reconstruído em
+        `destino_arquivo` (padrão: caminho_arquivo(destino)).
+
+        Raises:
+            RuntimeError: resumo SHA-256 do banco reconstruído não confere
+        """
+        cadeia = BackupIncremental.cadeia(manifesto)
+        final = BackupIncremental.ler_manifesto(cadeia[-1])
+        BackupIncremental._aplicar_paginas(cadeia, '', final, destino)
+
+        arquivo_temporadas = None
+        if final.get('arquivo_temporadas'):
+            arquivo_temporadas = destino_arquivo or caminho_arquivo(destino)
+            BackupIncremental._aplicar_paginas(
+                cadeia, BackupIncremental.ARQUIVO, final['arquivo_temporadas'], arquivo_temporadas
+            )
+        return {'arquivo': destino, 'backups_aplicados': len(cadeia), 'sha256': final['sha256'],
+                'arquivo_temporadas': arquivo_temporadas}
+
+    def rotacionar(self, manter_cadeias: int) -> list:
+        """Remove as cadeias mais antigas, mantendo as `manter_cadeias` mais recentes"""
+        manifestos = self.manifestos()
+        completos = [m for m in manifestos if self.ler_manifesto(m)['tipo'] == 'completo']
+        if len(completos) <= manter_cadeias:
+            return []
+        limite = completos[-manter_cadeias] if manter_cadeias else None
+        removidos = []
+        for caminho in manifestos:
+            if limite is not None and caminho >= limite:
+                break
+            # Manifesto primeiro, para que uma remoção interrompida não deixe uma cadeia quebrada visível
+            for arquivo in [caminho] + self._arquivos(caminho[:-len('.json')]):
+                if os.path.exists(arquivo):
+                    os.remove(arquivo)
+            removidos.append(caminho)
+        return removidos
+
+
+def restaurar(origem: str, destino: str, verificar: bool = True) -> dict:
+    """
+    Restaura um backup em `destino`
+
+    `origem` pode ser um backup completo (.db, .db.gz, .db.zst) ou o manifesto
+    (.json) de um backup incremental, caso em que a cadeia é reaplicada.
+    O banco de arquivo incluído no backup é restaurado junto, em
+    caminho_arquivo(destino). Os bancos são montados em arquivos temporários
+    e só substituem os de destino depois de verificados.
+    """
+    pasta = os.path.dirname(os.path.abspath(destino))
+    os.makedirs(pasta, exist_ok=True)
+    temporarios = []
+
+    def temporario() -> str:
+        descritor, caminho = tempfile.mkstemp(suffix='.db', dir=pasta)
+        os.close(descritor)
+        temporarios.append(caminho)
+        return caminho
+
+    def descompactar(backup: str, caminho: str):
+        with abrir_arquivo(backup, 'rb') as entrada, open(caminho, 'wb') as saida:
+            shutil.copyfileobj(entrada, saida, 1024 * 1024)
+
+    # (temporário, destino final) de cada banco restaurado
+    bancos = [(temporario(), destino)]
+    try:
+        if origem.endswith('.json'):
+            resultado = BackupIncremental.restaurar(origem, bancos[0][0], destino_arquivo=temporario())
+            if resultado['arquivo_temporadas']:
+                bancos.append((resultado['arquivo_temporadas'], caminho_arquivo(destino)))
+        else:
+            descompactar(origem, bancos[0][0])
+            resultado = {'backups_aplicados': 1}
+            if os.path.exists(backup_do_arquivo(origem)):
+                bancos.append((temporario(), caminho_arquivo(destino)))
+                descompactar(backup_do_arquivo(origem), bancos[1][0])
+
+        integridade = None
+        if verificar:
+            for caminho, _ in bancos:
+                integridade = BackupBanco.verificar(caminho)
+                if integridade != 'ok':
+                    raise RuntimeError(f"O banco restaurado falhou na verificação de integridade:\n{integridade}")
+        # Arquivo antes do principal: o principal é que indica as temporadas arquivadas
+        for caminho, final in reversed(bancos):
+            os.replace(caminho, final)
+    finally:
+        for caminho in temporarios:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    resultado.update(arquivo=destino, integridade=integridade, tamanho=os.path.getsize(destino),
+                     arquivo_temporadas=caminho_arquivo(destino) if len(bancos) > 1 else None)
+    return resultado
+
+
+class BackupAutomatico:
+    """
+    Backups periódicos com rotação, feitos por uma thread própria
+
+    Os arquivos ficam em `pasta` com o prefixo abrolhos_auto_; são mantidos os
+    `manter` mais recentes. Configurável por ABROLHOS_BACKUP_DIR,
+    ABROLHOS_BACKUP_INTERVALO_HORAS (0 desativa), ABROLHOS_BACKUP_MANTER e
+    ABROLHOS_BACKUP_COMPRESSAO (gzip, zstd ou nenhuma).
+
+    Com ABROLHOS_BACKUP_INCREMENTAL=1 os backups são incrementais
+    (BackupIncremental): uma nova cadeia começa a cada
+    ABROLHOS_BACKUP_CADEIA_MAX backups e `manter` passa a contar cadeias.
+    """
+
+    PREFIXO = 'abrolhos_auto_'
+
+    def __init__(self, db_path: str, pasta: str = None, intervalo_horas: float = None,
+                 manter: int = None, compressao: str = None, incremental: bool = None,
+                 cadeia_max: int = None, atraso_inicial: float = 60.0):
+        self.db_path = db_path
+        self.pasta = pasta or os.getenv('ABROLHOS_BACKUP_DIR', 'backups')
+        if intervalo_horas is None:
+            intervalo_horas = float(os.getenv('ABROLHOS_BACKUP_INTERVALO_HORAS', '24'))
+        self.intervalo = intervalo_horas * 3600
+        self.manter = manter if manter is not None else int(os.getenv('ABROLHOS_BACKUP_MANTER', '7'))
+        if compressao is None:
+            compressao = os.getenv('ABROLHOS_BACKUP_COMPRESSAO', 'gzip')
+        self.compressao = None if compressao in ('', 'nenhuma') else compressao
+        if incremental is None:
+            incremental = os.getenv('ABROLHOS_BACKUP_INCREMENTAL') == '1'
+        self.incremental = BackupIncremental(self.pasta, f'{self.PREFIXO}inc_') if incremental else None
+        self.cadeia_max = cadeia_max if cadeia_max is not None else int(os.getenv('ABROLHOS_BACKUP_CADEIA_MAX', '24'))
+        self.atraso_inicial = atraso_inicial
+        self.ultimo_resultado = None
+        self.ultimo_erro = None
+
+        self._parado = threading.Event()
+        self._thread = None
+
+    @property
+    def ativo(self) -> bool:
+        return self.intervalo > 0
+
+    def iniciar(self):
+        """Inicia a thread de backups (não faz nada se o intervalo for 0)"""
+        if not self.ativo or self._thread is not None:
+            return
+        self._parado.clear()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """Interrompe a espera pelo próximo backup (um backup em andamento termina antes)"""
+        self._parado.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def backups_existentes(self) -> list:
+        """Backups automáticos na pasta, do mais antigo ao mais recente"""
+        if not os.path.isdir(self.pasta):
+            return []
+        # Sem os backups do banco de arquivo, que acompanham o do banco principal
+        arquivos = [
+            os.path.join(self.pasta, nome) for nome in os.listdir(self.pasta)
+            if nome.startswith(self.PREFIXO) and not nome.startswith(f'{self.PREFIXO}inc_')
+            and '_arquivo.' not in nome
+        ]
+        return sorted(arquivos, key=os.path.getmtime)
+
+    def _segundos_ate_proximo(self) -> float:
+        if self.incremental is not None:
+            existentes = self.incremental.manifestos()
+        else:
+            existentes = self.backups_existentes()
+        if not existentes:
+            return self.atraso_inicial
+        decorrido = time.time() - os.path.getmtime(existentes[-1])
+        return max(self.atraso_inicial, self.intervalo - decorrido)
+
+    def _executar(self):
+        while not self._parado.wait(self._segundos_ate_proximo()):
+            try:
+                self.executar_agora()
+            except Exception as e:
+                # Tenta de novo no próximo intervalo; o erro fica disponível para a interface
+                self.ultimo_erro = f"{datetime.now():%d/%m/%Y %H:%M}: {e}"
+                self._parado.wait(self.intervalo)
+
+    def executar_agora(self) -> dict:
+        """Faz um backup automático e remove os mais antigos além de `manter`"""
+        if self.incremental is not None:
+            manifestos = self.incremental.manifestos()
+            completo = not manifestos or len(BackupIncremental.cadeia(manifestos[-1])) >= self.cadeia_max
+            resultado = self.incremental.executar(self.db_path, completo=completo)
+            self.ultimo_resultado = resultado
+            self.ultimo_erro = None
+            self.incremental.rotacionar(self.manter)
+            return resultado
+
+        nome = f"{self.PREFIXO}{datetime.now():%Y%m%d_%H%M%S}.db{EXTENSOES_COMPRESSAO[self.compressao]}"
+        resultado = BackupBanco.executar(self.db_path, os.path.join(self.pasta, nome), self.compressao)
+        self.ultimo_resultado = resultado
+        self.ultimo_erro = None
+        self.rotacionar()
+        return resultado
+
+    def rotacionar(self) -> list:
+        """Remove os backups automáticos excedentes; retorna os removidos"""
+        existentes = self.backups_existentes()
+        removidos = existentes[:max(0, len(existentes) - self.manter)]
+        for caminho in removidos:
+            os.remove(caminho)
+            if os.path.exists(backup_do_arquivo(caminho)):
+                os.remove(backup_do_arquivo(caminho))
+        return removidos
@@ -0,0 +1,181 @@
+"""
+Busca textual em empresas, embarcações e registros de visita
+
+Índices FTS5 de conteúdo externo (o texto fica só nas tabelas originais)
+mantidos por gatilhos: empresas (nome, CNPJ, contato), embarcações (nome,
+inscrição) e registros (cod_registro, responsável, observação). O tokenizador
+ignora acentos e maiúsculas, e cada termo é buscado como prefixo, de modo que
+a busca funciona enquanto o usuário digita ("sao jo" encontra "São José").
+
+Os registros arquivados (ver arquivamento) saem do índice junto com a tabela
+principal. Em um SQLite sem FTS5 a busca usa LIKE, sem ordenação por relevância.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from models.database import Empresa, Embarcacao, RegistroVisita
+
+
+# (índice, tabela de origem, colunas indexadas, condição para indexar a linha)
+INDICES_BUSCA = [
+    ('busca_empresas', 'empresas', ['nome', 'cnpj', 'contato_nome'], None),
+    ('busca_embarcacoes', 'embarcacoes', ['nome', 'inscricao'], None),
+    # Só registros com algum texto entram no índice (a maioria não tem)
+    ('busca_registros', 'registros_visita', ['cod_registro', 'responsavel', 'observacao'],
+     "coalesce({p}.cod_registro, {p}.responsavel, {p}.observacao) IS NOT NULL"),
+]
+
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+
+
+def _ddl_indice(indice: str, tabela: str, colunas: List[str], condicao: Optional[str]) -> List[str]:
+    """Tabela FTS5 e gatilhos que a mantêm sincronizada com a tabela de origem"""
+    lista = ', '.join(colunas)
+    novos = ', '.join(f'new.{c}' for c in colunas)
+    antigos = ', '.join(f'old.{c}' for c in colunas)
+    cond_new = condicao.format(p='new') if condicao else '1'
+    cond_old = condicao.format(p='old') if condicao else '1'
+    inserir = f"INSERT INTO {indice}(rowid, {lista}) SELECT new.id, {novos} WHERE {cond_new};"
+    remover = (f"INSERT INTO {indice}({indice}, rowid, {lista}) "
+               f"SELECT 'delete', old.id, {antigos} WHERE {cond_old};")
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5("
+        f"{lista}, content='{tabela}', content_rowid='id', tokenize='{TOKENIZADOR}', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ai AFTER INSERT ON {tabela} BEGIN {inserir} END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ad AFTER DELETE ON {tabela} BEGIN {remover} END",
+        # Só alterações nas colunas indexadas (o recálculo de valores não reindexa)
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_au AFTER UPDATE OF {lista} ON {tabela} "
+        f"BEGIN {remover} {inserir} END",
+    ]
+
+
+def criar_indices_busca(conn) -> bool:
+    """
+    Cria os índices de busca que ainda não existem, preenchendo-os com os
+    dados atuais (chamado por init_db)
+
+    Returns:
+        False se o SQLite não tiver FTS5
+    """
+    if not conn.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar():
+        return False
+    for indice, tabela, colunas, condicao in INDICES_BUSCA:
+        existe = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (indice,)
+        ).scalar()
+        for ddl in _ddl_indice(indice, tabela, colunas, condicao):
+            conn.exec_driver_sql(ddl)
+        if not existe:
+            if condicao:
+                conn.exec_driver_sql(
+                    f"INSERT INTO {indice}(rowid, {', '.join(colunas)}) "
+                    f"SELECT id, {', '.join(colunas)} FROM {tabela} WHERE {condicao.format(p=tabela)}"
+                )
+            else:
+                conn.exec_driver_sql(f"INSERT INTO {indice}({indice}) VALUES ('rebuild')")
+    return True
+
+
+def consulta_fts(texto: str) -> Optional[str]:
+    """Expressão MATCH com cada termo do texto como prefixo ("sao jo" -> "sao"* "jo"*)"""
+    termos = re.findall(r'\w+', texto)
+    if not termos:
+        return None
+    return ' '.join(f'"{termo}"*' for termo in termos)
+
+
+@dataclass(frozen=True)
+class ResultadoBusca:
+    """Item encontrado pela busca global"""
+    tipo: str  # 'empresa', 'embarcacao' ou 'registro'
+    id: int
+    titulo: str
+    detalhe: str
+    relevancia: float
+    data: Optional[date] = None
+
+
+class BuscaService:
+    """Busca global usada pela barra de busca da janela principal"""
+
+    @staticmethod
+    def disponivel(session: Session) -> bool:
+        return bool(session.connection().exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'busca_registros'"
+        ).scalar())
+
+    @staticmethod
+    def buscar(session: Session, texto: str, limite: int = 20) -> List[ResultadoBusca]:
+        """
+        Empresas e embarcações ativas (da mais para a menos relevante, bm25)
+        seguidas dos registros de visita mais recentes que contêm os termos
+        """
+        consulta = consulta_fts(texto)
+        if consulta is None:
+            return []
+        if not BuscaService.disponivel(session):
+            return BuscaService._buscar_like(session, texto, limite)
+
+        conexao = session.connection()
+        resultados = []
+        for tipo, sql in (
+            ('empresa',
+             "SELECT e.id, e.nome, coalesce(e.cnpj, e.contato_nome, ''), bm25(busca_empresas), NULL "
+             "FROM busca_empresas JOIN empresas e ON e.id = busca_empresas.rowid "
+             "WHERE busca_empresas MATCH ? AND e.ativo ORDER BY bm25(busca_empresas) LIMIT ?"),
+            ('embarcacao',
+             "SELECT b.id, b.nome, e.nome || coalesce(' - ' || b.inscricao, ''), bm25(busca_embarcacoes), NULL "
+             "FROM busca_embarcacoes JOIN embarcacoes b ON b.id = busca_embarcacoes.rowid "
+             "JOIN empresas e ON e.id = b.empresa_id "
+             "WHERE busca_embarcacoes MATCH ? AND b.ativo ORDER BY bm25(busca_embarcacoes) LIMIT ?"),
+            ('registro',
+             "SELECT r.id, e.nome, snippet(busca_registros, -1, '', '', '…', 8), bm25(busca_registros), r.data "
+             "FROM busca_registros JOIN registros_visita r ON r.id = busca_registros.rowid "
+             "JOIN empresas e ON e.id = r.empresa_id "
+             # Termos curtos casam com milhares de registros: ordenar por rowid
+             # (mais recentes) evita calcular o bm25 de todos eles
+             "WHERE busca_registros MATCH ? ORDER BY busca_registros.rowid DESC LIMIT ?"),
+        ):
+            for id_, titulo, detalhe, relevancia, data in conexao.exec_driver_sql(sql, (consulta, limite)):
+                if tipo == 'registro':
+                    data = date.fromisoformat(data)
+                    titulo = f"Registro {id_} - {data:%d/%m/%Y} - {titulo}"
+                # bm25 é negativo: quanto menor, mais relevante
+                resultados.append(ResultadoBusca(tipo, id_, titulo, detalhe, -relevancia, data))
+
+        cadastros = sorted((r for r in resultados if r.tipo != 'registro'), key=lambda r: -r.relevancia)
+        return (cadastros + [r for r in resultados if r.tipo == 'registro'])[:limite]
+
+    @staticmethod
+    def _buscar_like(session: Session, texto: str, limite: int) -> List[ResultadoBusca]:
+        """Alternativa sem FTS5: todos os termos contidos (LIKE), sem relevância"""
+        termos = re.findall(r'\w+', texto)
+
+        def todos(*colunas):
+            return [or_(*[coluna.ilike(f'%{termo}%') for coluna in colunas]) for termo in termos]
+
+        resultados = [
+            ResultadoBusca('empresa', e.id, e.nome, e.cnpj or e.contato_nome or '', 0.0)
+            for e in session.query(Empresa).filter(
+                Empresa.ativo == True, *todos(Empresa.nome, Empresa.cnpj, Empresa.contato_nome)
+            ).limit(limite)
+        ]
+        resultados += [
+            ResultadoBusca('embarcacao', b.id, b.nome, b.empresa.nome, 0.0)
+            for b in session.query(Embarcacao).filter(
+                Embarcacao.ativo == True, *todos(Embarcacao.nome, Embarcacao.inscricao)
+            ).limit(limite)
+        ]
+        resultados += [
+            ResultadoBusca('registro', r.id, f"Registro {r.id} - {r.data:%d/%m/%Y} - {r.empresa.nome}",
+                           r.cod_registro or r.responsavel or r.observacao or '', 0.0, r.data)
+            for r in session.query(RegistroVisita).filter(
+                *todos(RegistroVisita.cod_registro, RegistroVisita.responsavel, RegistroVisita.observacao)
+            ).limit(limite)
+        ]
+        return resultados[:limite]
@@ -1,6 +1,7 @@
 """
 Modelos de banco de dados para o sistema Abrolhos Ingressos
 """
+import os
 from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
@@ -111,6 +112,9 @@ class TabelaPrecoIngresso(Base):
 class RegistroVisita(Base):
     """Registro diário de visitação"""
     __tablename__ = 'registros_visita'
+    # Ids nunca reutilizados: os de registros excluídos ou arquivados continuam
+    # reservados (sqlite_sequence). Bancos anteriores são convertidos ao arquivar.
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     data = Column(Date, nullable=False)
@@ -187,18 +191,99 @@ class LogAuditoria(Base):
         return f"<LogAuditoria(usuario='{self.usuario}', acao='{self.acao}', tabela='{self.tabela}')>"
 
 
+class TokenAPI(Base):
+    """Tokens de acesso à API de sincronização (apenas o SHA-256 do token é gravado)"""
+    __tablename__ = 'tokens_api'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    usuario_id = Column(Integer, ForeignKey('usuarios.id'), nullable=False)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    descricao = Column(String(200))  # ex.: identificação do app cliente
+    criado_em = Column(DateTime, default=datetime.now)
+    expira_em = Column(DateTime, nullable=False)
+    revogado = Column(Boolean, default=False)
+    
+    usuario = relationship("Usuario")
+    
+    def __repr__(self):
+        return f"<TokenAPI(usuario_id={self.usuario_id}, expira_em='{self.expira_em}', revogado={self.revogado})>"
+
+
+class TemporadaArquivada(Base):
+    """Temporada (ano) cujos registros de visita foram movidos para o banco de arquivo"""
+    __tablename__ = 'temporadas_arquivadas'
+    
+    ano = Column(Integer, primary_key=True, autoincrement=False)
+    registros = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Float, nullable=False, default=0.0)
+    arquivado_em = Column(DateTime, default=datetime.now)
+    
+    def __repr__(self):
+        return f"<TemporadaArquivada(ano={self.ano}, registros={self.registros})>"
+
+
+class VersaoTabela(Base):
+    """Contador de alterações de uma tabela, incrementado por gatilhos (ver GATILHOS_VERSAO)"""
+    __tablename__ = 'versoes_tabelas'
+    
+    tabela = Column(String(50), primary_key=True)
+    versao = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<VersaoTabela(tabela='{self.tabela}', versao={self.versao})>"
+
+
+# Índices criados também em bancos já existentes (create_all não altera tabelas existentes).
+# O índice por data cobre as colunas somadas nas consultas agregadas (dashboard,
+# relatórios), que assim são resolvidas só com o índice, sem ler a tabela.
+INDICES_ADICIONAIS = [
+    "CREATE INDEX IF NOT EXISTS ix_registros_visita_data ON registros_visita ("
+    "data, empresa_id, embarcacao_id, qtde_estrangeiros, qtde_mercosul, "
+    "qtde_brasileiros, qtde_entorno, qtde_isentos, valor_total)",
+]
+
+
+# Tabelas cujas alterações são detectadas pela atualização (F5) e pela atualização automática
+TABELAS_VERSIONADAS = ['empresas', 'embarcacoes', 'tabela_preco_ingresso', 'registros_visita', 'usuarios']
+
+# Gatilhos que incrementam versoes_tabelas a cada INSERT/UPDATE/DELETE. Ficam no
+# próprio banco, de modo que valem também para o servidor de sincronização.
+GATILHOS_VERSAO = [
+    f"INSERT OR IGNORE INTO versoes_tabelas (tabela, versao) VALUES ('{tabela}', 0)"
+    for tabela in TABELAS_VERSIONADAS
+] + [
+    f"CREATE TRIGGER IF NOT EXISTS tr_versao_{tabela}_{operacao.lower()} "
+    f"AFTER {operacao} ON {tabela} BEGIN "
+    f"UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = '{tabela}'; END"
+    for tabela in TABELAS_VERSIONADAS
+    for operacao in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+
 # Função para criar engine e sessão
-def init_db(db_path: str = 'abrolhos_ingressos.db'):
+def init_db(db_path: str = 'abrolhos_ingressos.db', instrumentar: Optional[bool] = None):
     """
     Inicializa o banco de dados SQLite
     
     Args:
         db_path: Caminho para o arquivo do banco de dados
+        instrumentar: Instala o monitor de consultas SQL no engine
+            (padrão: variável de ambiente ABROLHOS_SQL_MONITOR=1)
         
     Returns:
         tuple: (engine, SessionLocal)
     """
     engine = create_engine(f'sqlite:///{db_path}', echo=False)
+    if instrumentar is None:
+        instrumentar = os.getenv('ABROLHOS_SQL_MONITOR') == '1'
+    if instrumentar:
+        from models.instrumentacao import MONITOR_SQL
+        MONITOR_SQL.instalar(engine)
     Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for ddl in INDICES_ADICIONAIS + GATILHOS_VERSAO:
+            conn.exec_driver_sql(ddl)
+        from models.busca import criar_indices_busca
+        criar_indices_busca(conn)
     SessionLocal = sessionmaker(bind=engine)
     return engine, SessionLocal
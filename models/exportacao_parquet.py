@@ -0,0 +1,312 @@
+"""
+Exportação e importação dos registros de visita em Parquet (pyarrow)
+
+A exportação grava um conjunto de dados particionado por ano e mês no
+formato Hive (destino/ano=2024/mes=3/registros.parquet), lido diretamente por
+pandas, pyarrow, DuckDB, Power BI etc. Cada linha traz o registro com os
+dados da empresa e da embarcação (colunas de dicionário), com tipos
+preservados (datas, inteiros, valores). Os registros são lidos mês a mês e
+gravados em lotes, sem carregar o período inteiro na memória; os anos
+arquivados também são incluídos.
+
+A importação lê o mesmo formato para migrar dados para outro banco (os
+registros recebem novos ids) ou restaurar um banco vazio com os ids
+originais; empresas e embarcações são associadas pelo nome (e criadas se
+não existirem).
+
+pyarrow é opcional: só é necessário para estas funções.
+"""
+import os
+import time
+from datetime import date
+from typing import Callable, Optional
+
+from sqlalchemy import String, and_, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from models.arquivamento import anos_arquivados, fonte_registros, fontes_registros
+from models.database import RegistroVisita
+from models.referencias import CACHE_REFERENCIAS
+from models.services import EmbarcacaoService, EmpresaService
+from utils.resolucao_nomes import normalizar_nome
+
+# Colunas de registros_visita exportadas, na ordem do arquivo
+COLUNAS_REGISTRO = [
+    'id', 'data', 'empresa_id', 'embarcacao_id', 'cod_registro', 'responsavel', 'permanencia',
+    'qtde_estrangeiros', 'qtde_mercosul', 'qtde_brasileiros', 'qtde_entorno', 'qtde_isentos',
+    'qtde_maior12', 'qtde_menor12', 'valor_total', 'observacao', 'criado_em', 'atualizado_em',
+]
+# Lidas do banco como texto e convertidas pelo pyarrow (mais rápido que objetos date/datetime)
+COLUNAS_TEXTO = {'data', 'criado_em', 'atualizado_em'}
+
+# Colunas de empresa/embarcação usadas para associá-las na importação
+DIMENSOES = ['empresa_id', 'empresa', 'empresa_cnpj', 'embarcacao_id',
+             'embarcacao', 'embarcacao_tipo', 'embarcacao_comprimento_m']
+
+ARQUIVO_PARTICAO = 'registros.parquet'
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise RuntimeError("Exportação em Parquet requer o pacote pyarrow (pip install pyarrow).")
+
+
+def esquema_parquet():
+    """Esquema das partições (ano e mês ficam no caminho)"""
+    pa = _pyarrow()
+    dicionario = pa.dictionary(pa.int32(), pa.string())
+    quantidade = pa.int32()
+    return pa.schema([
+        ('id', pa.int64()),
+        ('data', pa.date32()),
+        ('empresa_id', pa.int32()),
+        ('empresa', dicionario),
+        ('empresa_cnpj', dicionario),
+        ('embarcacao_id', pa.int32()),
+        ('embarcacao', dicionario),
+        ('embarcacao_tipo', dicionario),
+        ('embarcacao_comprimento_m', pa.float64()),
+        ('cod_registro', pa.string()),
+        ('responsavel', pa.string()),
+        ('permanencia', pa.int16()),
+        ('qtde_estrangeiros', quantidade),
+        ('qtde_mercosul', quantidade),
+        ('qtde_brasileiros', quantidade),
+        ('qtde_entorno', quantidade),
+        ('qtde_isentos', quantidade),
+        ('qtde_maior12', quantidade),
+        ('qtde_menor12', quantidade),
+        ('valor_total', pa.float64()),
+        ('observacao', pa.string()),
+        ('criado_em', pa.timestamp('us')),
+        ('atualizado_em', pa.timestamp('us')),
+    ])
+
+
+def _meses(data_inicio: date, data_fim: date):
+    """(ano, mes, primeiro dia, último dia) de cada mês do período"""
+    ano, mes = data_inicio.year, data_inicio.month
+    while (ano, mes) <= (data_fim.year, data_fim.month):
+        proximo = date(ano + mes // 12, mes % 12 + 1, 1)
+        yield ano, mes, max(data_inicio, date(ano, mes, 1)), min(data_fim, date.fromordinal(proximo.toordinal() - 1))
+        ano, mes = proximo.year, proximo.month
+
+
+class _Dimensao:
+    """Colunas de uma dimensão (empresa/embarcação) alinhadas às linhas de um lote por id"""
+
+    def __init__(self, pa, itens: list, atributos: list):
+        self.pa = pa
+        # atributo -> (valores distintos, id -> posição do valor); atributos vazios
+        # (ex.: empresa sem CNPJ) ficam fora do dicionário e viram índice nulo
+        self.dicionarios = {}
+        for atributo, campo in atributos:
+            valores = sorted({getattr(item, campo) for item in itens} - {None})
+            posicao_valor = {valor: i for i, valor in enumerate(valores)}
+            self.dicionarios[atributo] = (
+                pa.array(valores, pa.string()),
+                {item.id: posicao_valor.get(getattr(item, campo)) for item in itens},
+            )
+
+    def colunas(self, ids: list) -> dict:
+        return {
+            atributo: self.pa.DictionaryArray.from_arrays(
+                self.pa.array([posicoes.get(i) for i in ids], self.pa.int32()), dicionario
+            )
+            for atributo, (dicionario, posicoes) in self.dicionarios.items()
+        }
+
+
+class ExportacaoParquet:
+    """Conjunto de dados Parquet particionado por ano/mês"""
+
+    @staticmethod
+    def periodo_completo(session: Session) -> Optional[tuple]:
+        """(primeira data, última data) dos registros, inclusive arquivados"""
+        datas = []
+        for R in fontes_registros(session):
+            datas.extend(session.query(func.min(R.data), func.max(R.data)).one())
+        datas = [d for d in datas if d is not None]
+        return (min(datas), max(datas)) if datas else None
+
+    @staticmethod
+    def exportar(session: Session, destino: str, data_inicio: date, data_fim: date,
+                 tamanho_lote: int = 50_000, compressao: str = 'zstd',
+                 progresso: Optional[Callable[[int], None]] = None) -> dict:
+        """
+        Grava os registros do período em destino/ano=AAAA/mes=M/registros.parquet,
+        substituindo as partições já existentes
+
+        Args:
+            tamanho_lote: Linhas por lote (record batch) lidas do banco e gravadas
+            progresso: Chamado com o total de linhas gravadas após cada lote
+
+        Returns:
+            dict com linhas, particoes, tamanho (bytes) e duracao (s)
+        """
+        pa = _pyarrow()
+        pq = pa.parquet
+        inicio_execucao = time.perf_counter()
+        esquema = esquema_parquet()
+        referencias = CACHE_REFERENCIAS.obter(session)
+        empresas = _Dimensao(pa, list(referencias.empresas.values()),
+                             [('empresa', 'nome'), ('empresa_cnpj', 'cnpj')])
+        embarcacoes = _Dimensao(pa, list(referencias.embarcacoes.values()),
+                                [('embarcacao', 'nome'), ('embarcacao_tipo', 'tipo')])
+        comprimentos = {e.id: e.comprimento_m for e in referencias.embarcacoes.values()}
+
+        R = fonte_registros(session, data_inicio, data_fim, colunas=COLUNAS_REGISTRO)
+        colunas = [type_coerce(getattr(R, nome), String) if nome in COLUNAS_TEXTO else getattr(R, nome)
+                   for nome in COLUNAS_REGISTRO]
+        conexao = session.connection()
+
+        linhas_gravadas = 0
+        particoes = 0
+        tamanho = 0
+        for ano, mes, primeiro, ultimo in _meses(data_inicio, data_fim):
+            resultado = conexao.execute(
+                select(*colunas).where(and_(R.data >= primeiro, R.data <= ultimo)).order_by(R.data, R.id)
+            )
+            escritor = None
+            caminho = os.path.join(destino, f'ano={ano}', f'mes={mes}', ARQUIVO_PARTICAO)
+            try:
+                while True:
+                    linhas = resultado.fetchmany(tamanho_lote)
+                    if not linhas:
+                        break
+                    valores = dict(zip(COLUNAS_REGISTRO, zip(*linhas)))
+                    arrays = {nome: pa.array(valores[nome]) for nome in COLUNAS_REGISTRO}
+                    arrays.update(empresas.colunas(valores['empresa_id']))
+                    arrays.update(embarcacoes.colunas(valores['embarcacao_id']))
+                    arrays['embarcacao_comprimento_m'] = pa.array(
+                        [comprimentos.get(i) for i in valores['embarcacao_id']], pa.float64())
+                    lote = pa.RecordBatch.from_arrays(
+                        [arrays[campo.name].cast(campo.type) for campo in esquema], schema=esquema
+                    )
+
+                    if escritor is None:
+                        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                        escritor = pq.ParquetWriter(caminho, esquema, compression=compressao)
+                        particoes += 1
+                    escritor.write_batch(lote)
+                    linhas_gravadas += len(linhas)
+                    if progresso:
+                        progresso(linhas_gravadas)
+            finally:
+                if escritor is not None:
+                    escritor.close()
+                    tamanho += os.path.getsize(caminho)
+
+        return {
+            'linhas': linhas_gravadas,
+            'particoes': particoes,
+            'tamanho': tamanho,
+            'duracao': time.perf_counter() - inicio_execucao,
+        }
+
+    @staticmethod
+    def importar(session: Session, origem: str, manter_ids: bool = False,
+                 progresso: Optional[Callable[[int], None]] = None) -> dict:
+        """
+        Insere no banco os registros de um conjunto exportado por exportar(),
+        em uma única transação
+
+        Args:
+            manter_ids: Restauração: grava os registros com os ids originais.
+                Só é permitido em um banco sem registros (nem temporadas
+                arquivadas); ids repetidos no conjunto desfazem a importação.
+                Com False (migração), todos os registros recebem novos ids e
+                nenhum registro existente é afetado
+
+        Returns:
+            dict com inseridos, empresas_criadas, embarcacoes_criadas e duracao (s)
+
+        Raises:
+            ValueError: manter_ids em um banco que já tem registros
+        """
+        pa = _pyarrow()
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+        inicio_execucao = time.perf_counter()
+
+        if manter_ids and (anos_arquivados(session)
+                           or session.query(RegistroVisita.id).limit(1).first() is not None):
+            # Ids do conjunto repetiriam (ou duplicariam, no arquivo) os de registros existentes
+            raise ValueError(
+                "A importação com os ids originais só é permitida em um banco sem registros "
+                "(restauração); para migrar registros para este banco, importe com novos ids."
+            )
+
+        conjunto = ds.dataset(origem, format='parquet', partitioning='hive')
+        colunas = COLUNAS_REGISTRO if manter_ids else COLUNAS_REGISTRO[1:]
+        sql = (f"INSERT INTO registros_visita ({', '.join(colunas)}) "
+               f"VALUES ({', '.join('?' for _ in colunas)})")
+
+        # Cadastros deste banco pelo nome normalizado
+        referencias = CACHE_REFERENCIAS.obter(session)
+        empresas_por_nome = {normalizar_nome(e.nome): e.id for e in referencias.empresas.values()}
+        embarcacoes_por_nome = {(e.empresa_id, normalizar_nome(e.nome)): e.id
+                                for e in referencias.embarcacoes.values()}
+        # id da empresa/embarcação no arquivo -> id neste banco
+        mapa_empresas = {}
+        mapa_embarcacoes = {}
+        criadas = {'empresas': 0, 'embarcacoes': 0}
+
+        def resolver(d):
+            if d['empresa_id'] not in mapa_empresas:
+                chave = normalizar_nome(d['empresa'])
+                if chave not in empresas_por_nome:
+                    empresas_por_nome[chave] = EmpresaService.criar(
+                        session, d['empresa'], cnpj=d['empresa_cnpj'], commit=False).id
+                    criadas['empresas'] += 1
+                mapa_empresas[d['empresa_id']] = empresas_por_nome[chave]
+            if d['embarcacao_id'] not in mapa_embarcacoes:
+                chave = (mapa_empresas[d['empresa_id']], normalizar_nome(d['embarcacao']))
+                if chave not in embarcacoes_por_nome:
+                    embarcacoes_por_nome[chave] = EmbarcacaoService.criar(
+                        session, chave[0], d['embarcacao'], d['embarcacao_tipo'] or 'Outro',
+                        comprimento_m=d['embarcacao_comprimento_m'], commit=False).id
+                    criadas['embarcacoes'] += 1
+                mapa_embarcacoes[d['embarcacao_id']] = embarcacoes_por_nome[chave]
+
+        inseridos = 0
+        try:
+            conexao = session.connection()
+            for lote in conjunto.to_batches(columns=[campo.name for campo in esquema_parquet()]):
+                # Dimensões: só as linhas com embarcações ainda não vistas
+                # (cada empresa/embarcação do arquivo é resolvida uma vez)
+                novas = pc.invert(pc.is_in(lote.column('embarcacao_id'),
+                                           value_set=pa.array(list(mapa_embarcacoes), pa.int32())))
+                for d in lote.filter(novas).select(DIMENSOES).to_pylist():
+                    if d['embarcacao_id'] not in mapa_embarcacoes:
+                        resolver(d)
+
+                valores = {}
+                for nome in colunas:
+                    coluna = lote.column(nome)
+                    if nome in COLUNAS_TEXTO:
+                        # Mesmo formato de texto gravado pelo SQLAlchemy
+                        coluna = coluna.cast(pa.string())
+                    valores[nome] = coluna.to_pylist()
+                valores['empresa_id'] = [mapa_empresas[i] for i in valores['empresa_id']]
+                valores['embarcacao_id'] = [mapa_embarcacoes[i] for i in valores['embarcacao_id']]
+
+                conexao.exec_driver_sql(sql, list(zip(*(valores[nome] for nome in colunas))))
+                inseridos += lote.num_rows
+                if progresso:
+                    progresso(inseridos)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return {
+            'inseridos': inseridos,
+            'empresas_criadas': criadas['empresas'],
+            'embarcacoes_criadas': criadas['embarcacoes'],
+            'duracao': time.perf_counter() - inicio_execucao,
+        }
@@ -0,0 +1,334 @@
+"""
+Instrumentação opcional das consultas SQL (eventos de cursor do SQLAlchemy)
+e modo de perfilamento das operações da interface
+
+O monitor SQL é ativado por init_db(instrumentar=True), pela variável de
+ambiente ABROLHOS_SQL_MONITOR=1 ou pelo menu Ferramentas > Monitor SQL. Registra:
+- quantidade de consultas e tempo por operação lógica (ver MonitorSQL.operacao)
+- histograma de latência por comando SQL
+- consultas lentas, com parâmetros e EXPLAIN QUERY PLAN
+
+O perfilamento (ABROLHOS_PERFIL=1 ou Ferramentas > Modo de Perfilamento)
+grava, a cada operação medida, o tempo, as consultas e um resumo do cProfile
+em um arquivo local rotativo (ver PerfilOperacoes).
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+
+
+# Limites superiores (ms) das faixas do histograma de latência
+FAIXAS_LATENCIA_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, float('inf')]
+
+# Operação em andamento: (nome, contadores desta execução e das que a contêm).
+# ContextVar: vale por thread e é copiado para as threads de trabalho da API
+_operacao_atual = ContextVar('operacao_sql', default=None)
+
+SEM_OPERACAO = '(sem operação)'
+
+
+def _normalizar_sql(statement: str, limite: int = 400) -> str:
+    return re.sub(r'\s+', ' ', statement).strip()[:limite]
+
+
+class MonitorSQL:
+    """Coleta métricas das consultas dos engines em que foi instalado"""
+
+    def __init__(self, limite_lento_ms: float = None, max_lentas: int = 200):
+        if limite_lento_ms is None:
+            limite_lento_ms = float(os.getenv('ABROLHOS_SQL_LENTO_MS', '100'))
+        self.limite_lento_ms = limite_lento_ms
+        self.engines = []
+        self._lock = threading.Lock()
+        self._max_lentas = max_lentas
+        self.limpar()
+
+    # --- Instalação -------------------------------------------------------
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self.engines)
+
+    def instalar(self, engine):
+        """Passa a monitorar as consultas do engine"""
+        if engine in self.engines:
+            return
+        event.listen(engine, 'before_cursor_execute', self._antes)
+        event.listen(engine, 'after_cursor_execute', self._depois)
+        self.engines.append(engine)
+
+    def remover(self, engine):
+        """Deixa de monitorar o engine"""
+        if engine not in self.engines:
+            return
+        event.remove(engine, 'before_cursor_execute', self._antes)
+        event.remove(engine, 'after_cursor_execute', self._depois)
+        self.engines.remove(engine)
+
+    def limpar(self):
+        """Zera todas as métricas coletadas"""
+        with self._lock:
+            self.operacoes = {}
+            self.comandos = {}
+            self.lentas = deque(maxlen=self._max_lentas)
+            self.inicio = datetime.now()
+
+    # --- Operações lógicas --------------------------------------------------
+
+    @contextmanager
+    def operacao(self, nome: str):
+        """
+        Agrupa as consultas executadas dentro do bloco sob um nome
+        (carregamento de aba, exportação, requisição da API...)
+
+        Produz um dict com as consultas desta execução (incluindo as de
+        operações internas): {'consultas': int, 'tempo_sql_ms': float}
+        """
+        execucao = {'consultas': 0, 'tempo_sql_ms': 0.0}
+        externa = _operacao_atual.get()
+        token = _operacao_atual.set((nome, (execucao,) + (externa[1] if externa else ())))
+        inicio = time.perf_counter()
+        try:
+            yield execucao
+        finally:
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            _operacao_atual.reset(token)
+            if self.ativo:
+                with self._lock:
+                    dados = self._dados_operacao(nome)
+                    dados['execucoes'] += 1
+                    dados['tempo_total_ms'] += duracao_ms
+
+    @staticmethod
+    def operacao_atual() -> str:
+        atual = _operacao_atual.get()
+        return atual[0] if atual else SEM_OPERACAO
+
+    def _dados_operacao(self, nome: str) -> dict:
+        dados = self.operacoes.get(nome)
+        if dados is None:
+            dados = self.operacoes[nome] = {
+                'execucoes': 0, 'consultas': 0, 'tempo_total_ms': 0.0, 'tempo_sql_ms': 0.0
+            }
+        return dados
+
+    # --- Eventos do SQLAlchemy ----------------------------------------------
+
+    def _antes(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('monitor_sql_inicio', []).append(time.perf_counter())
+
+    def _depois(self, conn, cursor, statement, parameters, context, executemany):
+        pilha = conn.info.get('monitor_sql_inicio')
+        if not pilha:
+            return
+        duracao_ms = (time.perf_counter() - pilha.pop()) * 1000
+        atual = _operacao_atual.get()
+        operacao = atual[0] if atual else SEM_OPERACAO
+        chave = _normalizar_sql(statement)
+
+        # Contadores por execução (só a thread da operação os altera)
+        for execucao in (atual[1] if atual else ()):
+            execucao['consultas'] += 1
+            execucao['tempo_sql_ms'] += duracao_ms
+
+        with self._lock:
+            op = self._dados_operacao(operacao)
+            op['consultas'] += 1
+            op['tempo_sql_ms'] += duracao_ms
+
+            comando = self.comandos.get(chave)
+            if comando is None:
+                comando = self.comandos[chave] = {
+                    'execucoes': 0, 'tempo_total_ms': 0.0, 'tempo_max_ms': 0.0,
+                    'histograma': [0] * len(FAIXAS_LATENCIA_MS)
+                }
+            comando['execucoes'] += 1
+            comando['tempo_total_ms'] += duracao_ms
+            comando['tempo_max_ms'] = max(comando['tempo_max_ms'], duracao_ms)
+            for i, limite in enumerate(FAIXAS_LATENCIA_MS):
+                if duracao_ms <= limite:
+                    comando['histograma'][i] += 1
+                    break
+
+        if duracao_ms >= self.limite_lento_ms:
+            plano = None if executemany else self._plano(conn, statement, parameters)
+            with self._lock:
+                self.lentas.append({
+                    'quando': datetime.now().isoformat(timespec='seconds'),
+                    'operacao': operacao,
+                    'duracao_ms': round(duracao_ms, 2),
+                    'sql': statement.strip(),
+                    'parametros': repr(parameters)[:1000],
+                    'plano': plano,
+                })
+
+    @staticmethod
+    def _plano(conn, statement: str, parameters) -> str:
+        """EXPLAIN QUERY PLAN da consulta (apenas SELECT), via cursor próprio do driver"""
+        if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        try:
+            linhas = conn.connection.driver_connection.execute(
+                f'EXPLAIN QUERY PLAN {statement}', parameters
+            ).fetchall()
+        except Exception as e:
+            return f'(plano indisponível: {e})'
+        return '\n'.join(str(linha[-1]) for linha in linhas)
+
+    # --- Consulta das métricas ----------------------------------------------
+
+    def resumo(self) -> dict:
+        """Cópia das métricas atuais (para o painel e para a API)"""
+        with self._lock:
+            operacoes = {
+                nome: dict(dados, consultas_por_execucao=(
+                    dados['consultas'] / dados['execucoes'] if dados['execucoes'] else None
+                ))
+                for nome, dados in self.operacoes.items()
+            }
+            comandos = [
+                dict(dados, sql=sql, histograma=list(dados['histograma']),
+                     tempo_medio_ms=dados['tempo_total_ms'] / dados['execucoes'])
+                for sql, dados in self.comandos.items()
+            ]
+            lentas = list(self.lentas)
+        comandos.sort(key=lambda c: c['tempo_total_ms'], reverse=True)
+        return {
+            'ativo': self.ativo,
+            'desde': self.inicio.isoformat(timespec='seconds'),
+            'limite_lento_ms': self.limite_lento_ms,
+            'faixas_latencia_ms': [str(f) if f == float('inf') else f for f in FAIXAS_LATENCIA_MS],
+            'operacoes': operacoes,
+            'comandos': comandos,
+            'lentas': lentas,
+        }
+
+
+# O cProfile é de todo o processo: no máximo uma operação perfilada por vez
+_PERFILADOR_EM_USO = threading.Lock()
+
+
+class PerfilOperacoes:
+    """
+    Perfilamento das operações da interface (carga de abas, relatórios, importação)
+
+    Com o modo ativo, cada operação medida grava uma linha JSON com duração,
+    consultas SQL (requer o MONITOR_SQL instalado no engine) e as funções mais
+    custosas segundo o cProfile. O arquivo é rotativo, para que o usuário
+    possa enviá-lo ao suporte.
+    """
+
+    def __init__(self, arquivo: str = None, tamanho_maximo: int = 5 * 1024 * 1024,
+                 copias: int = 3, linhas_perfil: int = 40):
+        self.ativo = os.getenv('ABROLHOS_PERFIL') == '1'
+        self.arquivo = arquivo or os.getenv('ABROLHOS_PERFIL_ARQUIVO', 'perfil_abrolhos.log')
+        self.tamanho_maximo = tamanho_maximo
+        self.copias = copias
+        self.linhas_perfil = linhas_perfil
+        self._logger = None
+        self._lock = threading.Lock()
+
+    def ativar(self, ativo: bool = True):
+        self.ativo = ativo
+
+    def _registro(self) -> logging.Logger:
+        with self._lock:
+            if self._logger is None:
+                logger = logging.getLogger('abrolhos.perfil')
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                handler = RotatingFileHandler(
+                    self.arquivo, maxBytes=self.tamanho_maximo, backupCount=self.copias, encoding='utf-8'
+                )
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(handler)
+                self._logger = logger
+            return self._logger
+
+    @contextmanager
+    def medir(self, nome: str):
+        """
+        Agrupa as consultas sob `nome` no MONITOR_SQL e, com o modo ativo,
+        grava o perfil desta execução
+
+        Só uma operação é perfilada de cada vez no processo (no Python 3.12+ o
+        cProfile usa sys.monitoring, que aceita um único perfilador ativo):
+        operações simultâneas em outras threads, ou internas a uma já
+        perfilada, registram tempo e consultas, mas não o cProfile.
+        """
+        if not self.ativo:
+            with MONITOR_SQL.operacao(nome):
+                yield
+            return
+
+        erro = None
+        inicio = time.perf_counter()
+        with MONITOR_SQL.operacao(nome) as execucao:
+            perfil = self._iniciar_perfil()
+            try:
+                yield
+            except BaseException as e:
+                erro = repr(e)
+                raise
+            finally:
+                duracao_ms = (time.perf_counter() - inicio) * 1000
+                if perfil is not None:
+                    perfil.disable()
+                    _PERFILADOR_EM_USO.release()
+                self._gravar(nome, duracao_ms, execucao, perfil, erro)
+
+    @staticmethod
+    def _iniciar_perfil() -> Optional[cProfile.Profile]:
+        """cProfile ativo, ou None se outra operação já estiver sendo perfilada"""
+        if not _PERFILADOR_EM_USO.acquire(blocking=False):
+            return None
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outro perfilador (ou depurador) já ativo no processo
+            _PERFILADOR_EM_USO.release()
+            return None
+        return perfil
+
+    def _gravar(self, nome: str, duracao_ms: float, execucao: dict, perfil, erro: str):
+        resumo_perfil = None
+        if perfil is not None:
+            saida = io.StringIO()
+            pstats.Stats(perfil, stream=saida).sort_stats('cumulative').print_stats(self.linhas_perfil)
+            resumo_perfil = saida.getvalue()
+        try:
+            self._registro().info(json.dumps({
+                'quando': datetime.now().isoformat(timespec='seconds'),
+                'operacao': nome,
+                'thread': threading.current_thread().name,
+                'duracao_ms': round(duracao_ms, 2),
+                'consultas': execucao['consultas'] if MONITOR_SQL.ativo else None,
+                'tempo_sql_ms': round(execucao['tempo_sql_ms'], 2) if MONITOR_SQL.ativo else None,
+                'erro': erro,
+                'perfil': resumo_perfil,
+            }, ensure_ascii=False))
+        except OSError:
+            # Falha ao gravar o perfil não deve interromper a operação medida
+            pass
+
+
+# Monitor compartilhado pelo aplicativo e pela API
+MONITOR_SQL = MonitorSQL()
+
+# Perfilamento das operações da interface
+PERFIL = PerfilOperacoes()
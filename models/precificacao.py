@@ -0,0 +1,214 @@
+"""
+Motor de precificação de ingressos, independente do banco de dados
+
+Opera sobre snapshots da tabela de preços (dicts gerados por
+MotorPrecos.snapshot), de modo que o mesmo cálculo serve à tela de registros,
+à API, à importação, ao recálculo em lote e aos scripts de verificação.
+"""
+from datetime import date
+from typing import Optional, List
+
+
+# Colunas de quantidade por categoria de visitante
+CATEGORIAS_PAGANTES = ['qtde_estrangeiros', 'qtde_mercosul', 'qtde_brasileiros', 'qtde_entorno']
+COLUNAS_QUANTIDADE = CATEGORIAS_PAGANTES + ['qtde_isentos']
+
+# Coluna de preço correspondente a cada categoria (na ordem de soma do cálculo)
+PRECO_POR_CATEGORIA = [
+    ('qtde_estrangeiros', 'valor_estrangeiro'),
+    ('qtde_mercosul', 'valor_mercosul'),
+    ('qtde_brasileiros', 'valor_brasileiro'),
+    ('qtde_entorno', 'valor_entorno'),
+    ('qtde_isentos', 'valor_isento'),
+]
+
+COLUNAS_PRECO = [preco for _, preco in PRECO_POR_CATEGORIA] + [
+    'valor_fundeio_ate8', 'valor_fundeio_8a15', 'valor_fundeio_acima15'
+]
+
+# Faixas de tamanho da embarcação para a taxa de fundeio (metros)
+LIMITE_FUNDEIO_PEQUENA = 8    # < 8m
+LIMITE_FUNDEIO_MEDIA = 15     # 8-15m (acima disso, > 15m)
+
+
+class MotorPrecos:
+    """Cálculo de valor total, ingressos e visitantes a partir de snapshots de preço"""
+
+    @staticmethod
+    def snapshot(tabela) -> Optional[dict]:
+        """
+        Copia os valores de uma tabela de preços (TabelaPrecoIngresso) para um
+        dict simples, que pode ser guardado e usado fora da sessão
+
+        Returns:
+            dict com id, ano_inicio, ano_fim e as colunas valor_*, ou None
+        """
+        if tabela is None:
+            return None
+        snapshot = {
+            'id': tabela.id,
+            'ano_inicio': tabela.ano_inicio,
+            'ano_fim': tabela.ano_fim,
+        }
+        for coluna in COLUNAS_PRECO:
+            snapshot[coluna] = getattr(tabela, coluna) or 0.0
+        return snapshot
+
+    @staticmethod
+    def tabela_vigente(tabelas: List[dict], data_referencia: date) -> Optional[dict]:
+        """
+        Seleciona, entre snapshots de tabelas ativas, a vigente para a data
+        (mesma regra de TabelaPrecoService.buscar_por_data: a primeira cujo
+        intervalo de anos contém o ano da data)
+        """
+        ano = data_referencia.year
+        for tabela in tabelas:
+            if tabela['ano_inicio'] <= ano and (tabela['ano_fim'] is None or ano <= tabela['ano_fim']):
+                return tabela
+        return None
+
+    @staticmethod
+    def taxa_fundeio(tabela: dict, comprimento_embarcacao_m: Optional[float]) -> float:
+        """Taxa de fundeio pela faixa de tamanho da embarcação (0 se sem comprimento)"""
+        if comprimento_embarcacao_m is None:
+            return 0.0
+        if comprimento_embarcacao_m < LIMITE_FUNDEIO_PEQUENA:
+            return tabela['valor_fundeio_ate8'] or 0.0
+        if comprimento_embarcacao_m <= LIMITE_FUNDEIO_MEDIA:
+            return tabela['valor_fundeio_8a15'] or 0.0
+        return tabela['valor_fundeio_acima15'] or 0.0
+
+    @staticmethod
+    def calcular_valor(tabela: Optional[dict], quantidades: dict, permanencia: int = 1,
+                       comprimento_embarcacao_m: Optional[float] = None) -> float:
+        """
+        Calcula o valor total de um registro
+
+        Valor = (soma de quantidade × preço por categoria + taxa de fundeio) × permanência
+
+        Args:
+            tabela: Snapshot da tabela de preços vigente (None -> 0.0)
+            quantidades: Dict com qtde_estrangeiros, qtde_mercosul, etc.
+            permanencia: Número de dias/permanência (1=aberto, 2=pernoite, etc.)
+            comprimento_embarcacao_m: Comprimento da embarcação em metros
+
+        Returns:
+            float: Valor total arredondado em 2 casas
+        """
+        if not tabela:
+            return 0.0
+
+        subtotal_visitantes = 0.0
+        for qtde, preco in PRECO_POR_CATEGORIA:
+            subtotal_visitantes += (quantidades.get(qtde) or 0) * tabela[preco]
+
+        valor_diario = subtotal_visitantes + MotorPrecos.taxa_fundeio(tabela, comprimento_embarcacao_m)
+        return round(valor_diario * permanencia, 2)
+
+    @staticmethod
+    def calcular_ingressos_e_visitantes(quantidades: dict, permanencia: int) -> tuple:
+        """
+        Retorna (ingressos, visitantes):
+        - Ingressos = visitantes PAGANTES × permanência (isentos não contam como ingresso pago)
+        - Visitantes = (pagantes + isentos) × permanência
+        """
+        pagantes = sum(quantidades.get(qtde) or 0 for qtde in CATEGORIAS_PAGANTES)
+        isentos = quantidades.get('qtde_isentos') or 0
+        return pagantes * permanencia, (pagantes + isentos) * permanencia
+
+    @staticmethod
+    def calcular_registro(tabela: Optional[dict], quantidades: dict, permanencia: int = 1,
+                          comprimento_embarcacao_m: Optional[float] = None) -> dict:
+        """
+        Calcula valor, ingressos e visitantes de um registro
+
+        Returns:
+            dict com valor_total, ingressos e visitantes
+        """
+        ingressos, visitantes = MotorPrecos.calcular_ingressos_e_visitantes(quantidades, permanencia)
+        return {
+            'valor_total': MotorPrecos.calcular_valor(
+                tabela, quantidades, permanencia, comprimento_embarcacao_m
+            ),
+            'ingressos': ingressos,
+            'visitantes': visitantes,
+        }
+
+    @staticmethod
+    def calcular_lote(tabelas: List[dict], datas, quantidades: dict, permanencias=1,
+                      comprimentos=None) -> dict:
+        """
+        Calcula valor, ingressos e visitantes de muitos registros em uma única
+        passada vetorizada (NumPy)
+
+        Args:
+            tabelas: Snapshots das tabelas de preço ativas, na ordem de prioridade
+                (ver TabelaPrecoService.listar_snapshots)
+            datas: Datas das visitas (lista de date, array datetime64 ou Series do pandas)
+            quantidades: Dict coluna -> sequência de quantidades (colunas ausentes = 0)
+            permanencias: Sequência de permanências (ou um escalar)
+            comprimentos: Sequência de comprimentos em metros (None/NaN = sem taxa)
+
+        Returns:
+            dict com arrays valor_total (float), ingressos e visitantes (int)
+        """
+        # Importado aqui: o NumPy só é necessário no cálculo em lote
+        import numpy as np
+
+        dias = np.asarray(datas, dtype='datetime64[D]')
+        n = len(dias)
+        anos = dias.astype('datetime64[Y]').astype(np.int64) + 1970
+
+        # Índice da tabela vigente por linha (-1 = sem tabela). Percorre de trás
+        # para frente para que a primeira tabela que cobre o ano prevaleça.
+        indice = np.full(n, -1, dtype=np.int64)
+        for k in range(len(tabelas) - 1, -1, -1):
+            tabela = tabelas[k]
+            cobre = anos >= tabela['ano_inicio']
+            if tabela['ano_fim'] is not None:
+                cobre &= anos <= tabela['ano_fim']
+            indice[cobre] = k
+
+        def precos(coluna):
+            # Última posição (índice -1) corresponde a "sem tabela": preço zero
+            valores = np.array([t[coluna] or 0.0 for t in tabelas] + [0.0], dtype=np.float64)
+            return valores[indice]
+
+        def coluna_int(valores):
+            if valores is None:
+                return np.zeros(n, dtype=np.int64)
+            return np.nan_to_num(np.asarray(valores, dtype=np.float64)).astype(np.int64)
+
+        qtdes = {qtde: coluna_int(quantidades.get(qtde)) for qtde, _ in PRECO_POR_CATEGORIA}
+        if np.ndim(permanencias):
+            permanencia = coluna_int(permanencias)
+        else:
+            permanencia = np.full(n, int(permanencias), dtype=np.int64)
+
+        # Mesma ordem de soma do cálculo unitário (resultados idênticos)
+        subtotal = np.zeros(n, dtype=np.float64)
+        for qtde, preco in PRECO_POR_CATEGORIA:
+            subtotal += qtdes[qtde] * precos(preco)
+
+        if comprimentos is None:
+            taxa = np.zeros(n, dtype=np.float64)
+        else:
+            comprimento = np.asarray(comprimentos, dtype=np.float64)
+            # NaN (sem comprimento) não satisfaz nenhuma faixa: taxa zero
+            taxa = np.select(
+                [comprimento < LIMITE_FUNDEIO_PEQUENA,
+                 comprimento <= LIMITE_FUNDEIO_MEDIA,
+                 comprimento > LIMITE_FUNDEIO_MEDIA],
+                [precos('valor_fundeio_ate8'), precos('valor_fundeio_8a15'),
+                 precos('valor_fundeio_acima15')],
+                0.0
+            )
+
+        valor_total = np.round((subtotal + taxa) * permanencia, 2)
+
+        pagantes = sum(qtdes[qtde] for qtde in CATEGORIAS_PAGANTES)
+        return {
+            'valor_total': valor_total,
+            'ingressos': pagantes * permanencia,
+            'visitantes': (pagantes + qtdes['qtde_isentos']) * permanencia,
+        }
@@ -0,0 +1,199 @@
+"""
+Cache dos dados de referência (empresas e embarcações)
+
+As listas de empresas e embarcações mudam raramente, mas são consultadas a
+todo momento (combos das abas, troca de empresa no formulário, importação de
+CSV, nomes em relatórios). O cache guarda, por banco, um
+retrato imutável dessas tabelas com os índices id -> linha, nome em
+minúsculas -> id e empresa -> embarcações, carregado com duas consultas na
+primeira leitura.
+
+O retrato é descartado após o commit de qualquer sessão que tenha gravado
+Empresa ou Embarcacao (ver _marcar_alteracoes), e também pela atualização
+geral (F5), que cobre alterações feitas por outros processos. Por isso o
+retrato serve para exibição e busca de nomes, mas não para gravar valores:
+a precificação lê o comprimento das embarcações na própria transação.
+"""
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.database import Empresa, Embarcacao
+
+
+@dataclass(frozen=True)
+class EmpresaRef:
+    """Dados de uma empresa, utilizáveis fora da sessão"""
+    id: int
+    nome: str
+    cnpj: Optional[str]
+    contato_nome: Optional[str]
+    contato_telefone: Optional[str]
+    contato_email: Optional[str]
+    ativo: bool
+
+
+@dataclass(frozen=True)
+class EmbarcacaoRef:
+    """Dados de uma embarcação, utilizáveis fora da sessão"""
+    id: int
+    empresa_id: int
+    nome: str
+    tipo: Optional[str]
+    capacidade_pax: Optional[int]
+    comprimento_m: Optional[float]
+    inscricao: Optional[str]
+    ativo: bool
+
+
+class DadosReferencia:
+    """Retrato imutável das empresas e embarcações de um banco"""
+
+    def __init__(self, empresas: List[EmpresaRef], embarcacoes: List[EmbarcacaoRef]):
+        # Listas já ordenadas por nome, como nas listagens dos serviços
+        self._empresas = sorted(empresas, key=lambda e: e.nome)
+        self._embarcacoes = sorted(embarcacoes, key=lambda e: e.nome)
+
+        self.empresas: Dict[int, EmpresaRef] = {e.id: e for e in self._empresas}
+        self.embarcacoes: Dict[int, EmbarcacaoRef] = {e.id: e for e in self._embarcacoes}
+        self.empresa_por_nome: Dict[str, int] = {e.nome.lower(): e.id for e in self._empresas}
+        self.embarcacao_por_nome: Dict[Tuple[int, str], int] = {
+            (e.empresa_id, e.nome.lower()): e.id for e in self._embarcacoes
+        }
+        self.embarcacoes_por_empresa: Dict[int, List[EmbarcacaoRef]] = {}
+        for embarcacao in self._embarcacoes:
+            self.embarcacoes_por_empresa.setdefault(embarcacao.empresa_id, []).append(embarcacao)
+
+    def empresas_ativas(self) -> List[EmpresaRef]:
+        return [e for e in self._empresas if e.ativo]
+
+    def embarcacoes_ativas(self) -> List[EmbarcacaoRef]:
+        return [e for e in self._embarcacoes if e.ativo]
+
+    def embarcacoes_da_empresa(self, empresa_id: int, apenas_ativas: bool = True) -> List[EmbarcacaoRef]:
+        embarcacoes = self.embarcacoes_por_empresa.get(empresa_id, [])
+        return [e for e in embarcacoes if e.ativo] if apenas_ativas else list(embarcacoes)
+
+    def empresa(self, empresa_id: int) -> Optional[EmpresaRef]:
+        return self.empresas.get(empresa_id)
+
+    def embarcacao(self, embarcacao_id: int) -> Optional[EmbarcacaoRef]:
+        return self.embarcacoes.get(embarcacao_id)
+
+    def buscar_empresa_por_nome(self, nome: str) -> Optional[EmpresaRef]:
+        """Empresa pelo nome, sem diferenciar maiúsculas/minúsculas"""
+        empresa_id = self.empresa_por_nome.get(nome.strip().lower())
+        return self.empresas.get(empresa_id) if empresa_id is not None else None
+
+    def buscar_embarcacao_por_nome(self, empresa_id: int, nome: str) -> Optional[EmbarcacaoRef]:
+        """Embarcação da empresa pelo nome, sem diferenciar maiúsculas/minúsculas"""
+        embarcacao_id = self.embarcacao_por_nome.get((empresa_id, nome.strip().lower()))
+        return self.embarcacoes.get(embarcacao_id) if embarcacao_id is not None else None
+
+    def nome_empresa(self, empresa_id: int, padrao: str = '-') -> str:
+        empresa = self.empresas.get(empresa_id)
+        return empresa.nome if empresa else padrao
+
+    def nome_embarcacao(self, embarcacao_id: int, padrao: str = '-') -> str:
+        embarcacao = self.embarcacoes.get(embarcacao_id)
+        return embarcacao.nome if embarcacao else padrao
+
+
+class CacheReferencias:
+    """Um DadosReferencia por engine, carregado sob demanda"""
+
+    def __init__(self):
+        self._dados = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        # Incrementada a cada invalidação: um carregamento concorrente com ela é descartado
+        self._geracao = 0
+        self.carregamentos = 0
+
+    @staticmethod
+    def _engine(origem):
+        # Aceita uma sessão ou a fábrica de sessões (SessionLocal) das abas
+        if isinstance(origem, Session):
+            return origem.get_bind()
+        return origem.kw['bind']
+
+    def obter(self, origem) -> DadosReferencia:
+        """
+        Retrato das empresas e embarcações do banco de `origem`
+
+        Args:
+            origem: Session (o carregamento usa a própria sessão) ou sessionmaker
+        """
+        engine = self._engine(origem)
+        dados = self._dados.get(engine)
+        if dados is not None:
+            return dados
+
+        geracao = self._geracao
+        if isinstance(origem, Session):
+            dados = self._carregar(origem)
+        else:
+            session = origem()
+            try:
+                dados = self._carregar(session)
+            finally:
+                session.close()
+        with self._lock:
+            if geracao == self._geracao:
+                self._dados[engine] = dados
+            self.carregamentos += 1
+        return dados
+
+    @staticmethod
+    def _carregar(session: Session) -> DadosReferencia:
+        empresas = [
+            EmpresaRef(*linha) for linha in session.query(
+                Empresa.id, Empresa.nome, Empresa.cnpj, Empresa.contato_nome,
+                Empresa.contato_telefone, Empresa.contato_email, Empresa.ativo
+            ).all()
+        ]
+        embarcacoes = [
+            EmbarcacaoRef(*linha) for linha in session.query(
+                Embarcacao.id, Embarcacao.empresa_id, Embarcacao.nome, Embarcacao.tipo,
+                Embarcacao.capacidade_pax, Embarcacao.comprimento_m, Embarcacao.inscricao,
+                Embarcacao.ativo
+            ).all()
+        ]
+        return DadosReferencia(empresas, embarcacoes)
+
+    def invalidar(self, origem=None):
+        """Descarta o retrato do banco de `origem` (ou de todos)"""
+        with self._lock:
+            self._geracao += 1
+            if origem is None:
+                self._dados.clear()
+            else:
+                self._dados.pop(self._engine(origem), None)
+
+
+CACHE_REFERENCIAS = CacheReferencias()
+
+
+@event.listens_for(Session, 'after_flush')
+def _marcar_alteracoes(session, flush_context):
+    """Anota na sessão se o flush gravou empresas ou embarcações"""
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(objeto, (Empresa, Embarcacao)):
+            session.info['referencias_alteradas'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_apos_commit(session):
+    if session.info.pop('referencias_alteradas', False):
+        CACHE_REFERENCIAS.invalidar(session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_apos_rollback(session):
+    # O retrato pode ter sido carregado com as gravações desfeitas (autoflush)
+    if session.info.pop('referencias_alteradas', False):
+        CACHE_REFERENCIAS.invalidar(session)
@@ -1,43 +1,115 @@
 """
 Serviços e operações CRUD para o banco de dados
 """
-from datetime import datetime, date
+import hashlib
+import os
+import secrets
+from datetime import datetime, date, timedelta
+from calendar import monthrange
+from contextlib import contextmanager
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, extract
+from sqlalchemy import and_, or_, extract, func, update
 import bcrypt
 
 from models.database import (
     Usuario, Empresa, Embarcacao, TabelaPrecoIngresso, 
-    RegistroVisita, LogAuditoria, DocumentoAuditoria
+    RegistroVisita, LogAuditoria, DocumentoAuditoria, TokenAPI, VersaoTabela
 )
+from models.precificacao import MotorPrecos, COLUNAS_QUANTIDADE
+from models.arquivamento import fonte_registros, fontes_registros
+from models.referencias import CACHE_REFERENCIAS
+
+
+@contextmanager
+def unidade_de_trabalho(SessionLocal):
+    """
+    Sessão em que todas as operações dos serviços formam uma única transação
+    
+    Dentro do bloco os serviços apenas enviam as alterações ao banco (flush);
+    o commit acontece uma vez ao final, e qualquer exceção desfaz tudo.
+    
+    Exemplo:
+        with unidade_de_trabalho(SessionLocal) as session:
+            empresa = EmpresaService.criar(session, 'Nova Empresa')
+            EmbarcacaoService.criar(session, empresa.id, 'Lancha I', 'Lancha')
+    """
+    session = SessionLocal()
+    session.info['unidade_de_trabalho'] = True
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def _em_unidade_de_trabalho(session: Session) -> bool:
+    return session.info.get('unidade_de_trabalho', False)
+
+
+def _confirmar(session: Session, commit: bool = True):
+    """Commit, ou apenas flush se commit=False ou dentro de uma unidade de trabalho"""
+    if commit and not _em_unidade_de_trabalho(session):
+        session.commit()
+    else:
+        session.flush()
 
 
 class UsuarioService:
     """Serviços para gerenciamento de usuários"""
     
+    # Fator de custo do bcrypt para novos hashes (cada +1 dobra o tempo).
+    # Use benchmarks/bench_bcrypt.py para escolher o valor adequado ao hardware.
+    CUSTO_BCRYPT = int(os.getenv('ABROLHOS_BCRYPT_CUSTO', '12'))
+    
+    @staticmethod
+    def gerar_hash(password: str) -> str:
+        """Hash bcrypt da senha com o custo configurado"""
+        salt = bcrypt.gensalt(rounds=UsuarioService.CUSTO_BCRYPT)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    
+    @staticmethod
+    def custo_do_hash(password_hash: str) -> Optional[int]:
+        """Fator de custo gravado no hash ($2b$<custo>$...)"""
+        try:
+            return int(password_hash.split('$')[2])
+        except (IndexError, ValueError):
+            return None
+    
     @staticmethod
     def criar_usuario(session: Session, username: str, password: str, 
-                      nome_completo: str = None, is_admin: bool = False) -> Usuario:
+                      nome_completo: str = None, is_admin: bool = False,
+                      commit: bool = True) -> Usuario:
         """Cria um novo usuário com senha criptografada"""
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
         usuario = Usuario(
             username=username,
-            password_hash=password_hash.decode('utf-8'),
+            password_hash=UsuarioService.gerar_hash(password),
             nome_completo=nome_completo,
             is_admin=is_admin
         )
         session.add(usuario)
-        session.commit()
+        _confirmar(session, commit)
         return usuario
     
     @staticmethod
-    def autenticar(session: Session, username: str, password: str) -> Optional[Usuario]:
-        """Autentica um usuário"""
+    def autenticar(session: Session, username: str, password: str, commit: bool = True) -> Optional[Usuario]:
+        """
+        Autentica um usuário
+        
+        Se o hash gravado usa um custo diferente de CUSTO_BCRYPT, a senha
+        (já verificada) é re-hasheada com o custo atual.
+        """
         usuario = session.query(Usuario).filter_by(username=username, ativo=True).first()
-        if usuario and bcrypt.checkpw(password.encode('utf-8'), usuario.password_hash.encode('utf-8')):
-            return usuario
-        return None
+        if not usuario or not bcrypt.checkpw(password.encode('utf-8'), usuario.password_hash.encode('utf-8')):
+            return None
+        
+        if UsuarioService.custo_do_hash(usuario.password_hash) != UsuarioService.CUSTO_BCRYPT:
+            usuario.password_hash = UsuarioService.gerar_hash(password)
+            _confirmar(session, commit)
+        return usuario
 
     @staticmethod
     def listar_usuarios(session: Session) -> List[Usuario]:
@@ -50,47 +122,113 @@ class UsuarioService:
         return session.query(Usuario).filter_by(id=user_id).first()
     
     @staticmethod
-    def atualizar_usuario(session: Session, user_id: int, **kwargs) -> Optional[Usuario]:
+    def atualizar_usuario(session: Session, user_id: int, commit: bool = True, **kwargs) -> Optional[Usuario]:
         """Atualiza dados de um usuário"""
         usuario = session.query(Usuario).filter_by(id=user_id).first()
         if usuario:
             for key, value in kwargs.items():
                 if key != 'password': # Senha deve ser atualizada via atualizar_senha
                     setattr(usuario, key, value)
-            session.commit()
+            _confirmar(session, commit)
         return usuario
     
     @staticmethod
-    def atualizar_senha(session: Session, user_id: int, nova_senha: str) -> bool:
+    def atualizar_senha(session: Session, user_id: int, nova_senha: str, commit: bool = True) -> bool:
         """Atualiza a senha de um usuário"""
         usuario = session.query(Usuario).filter_by(id=user_id).first()
         if usuario:
-            password_hash = bcrypt.hashpw(nova_senha.encode('utf-8'), bcrypt.gensalt())
-            usuario.password_hash = password_hash.decode('utf-8')
-            session.commit()
+            usuario.password_hash = UsuarioService.gerar_hash(nova_senha)
+            TokenAPIService.revogar_do_usuario(session, user_id, commit=False)
+            _confirmar(session, commit)
             return True
         return False
         
     @staticmethod
-    def desativar_usuario(session: Session, user_id: int) -> bool:
+    def desativar_usuario(session: Session, user_id: int, commit: bool = True) -> bool:
         """Desativa um usuário"""
         usuario = session.query(Usuario).filter_by(id=user_id).first()
         if usuario:
             usuario.ativo = False
-            session.commit()
+            TokenAPIService.revogar_do_usuario(session, user_id, commit=False)
+            _confirmar(session, commit)
+            return True
+        return False
+
+
+class TokenAPIService:
+    """Tokens opacos de acesso à API (o banco guarda só o hash SHA-256)"""
+    
+    VALIDADE_PADRAO_HORAS = 24 * 30
+    # Limite para a validade pedida pelo cliente (POST /auth/token)
+    VALIDADE_MAXIMA_HORAS = 24 * 90
+    
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def emitir(session: Session, usuario: Usuario, validade_horas: int = None,
+               descricao: str = None, commit: bool = True) -> tuple:
+        """
+        Emite um token para o usuário (já autenticado)
+        
+        A validade fica entre 1 hora e VALIDADE_MAXIMA_HORAS (padrão:
+        VALIDADE_PADRAO_HORAS).
+        
+        Returns:
+            tuple (token, TokenAPI): o token em texto só existe neste retorno
+        """
+        validade_horas = min(max(validade_horas or TokenAPIService.VALIDADE_PADRAO_HORAS, 1),
+                             TokenAPIService.VALIDADE_MAXIMA_HORAS)
+        token = secrets.token_urlsafe(32)
+        registro = TokenAPI(
+            usuario_id=usuario.id,
+            token_hash=TokenAPIService.hash_token(token),
+            descricao=descricao,
+            expira_em=datetime.now() + timedelta(hours=validade_horas)
+        )
+        session.add(registro)
+        _confirmar(session, commit)
+        return token, registro
+    
+    @staticmethod
+    def buscar_valido(session: Session, token_hash: str) -> Optional[TokenAPI]:
+        """Token não revogado, não expirado e de usuário ativo"""
+        return session.query(TokenAPI).join(Usuario).filter(
+            TokenAPI.token_hash == token_hash,
+            TokenAPI.revogado == False,
+            TokenAPI.expira_em > datetime.now(),
+            Usuario.ativo == True
+        ).first()
+    
+    @staticmethod
+    def revogar(session: Session, token_hash: str, commit: bool = True) -> bool:
+        registro = session.query(TokenAPI).filter_by(token_hash=token_hash).first()
+        if registro:
+            registro.revogado = True
+            _confirmar(session, commit)
             return True
         return False
+    
+    @staticmethod
+    def revogar_do_usuario(session: Session, usuario_id: int, commit: bool = True) -> int:
+        """Revoga todos os tokens de um usuário (ex.: ao desativá-lo ou trocar a senha)"""
+        quantidade = session.query(TokenAPI).filter_by(usuario_id=usuario_id, revogado=False).update(
+            {'revogado': True}, synchronize_session=False
+        )
+        _confirmar(session, commit)
+        return quantidade
 
 
 class EmpresaService:
     """Serviços para gerenciamento de empresas"""
     
     @staticmethod
-    def criar(session: Session, nome: str, cnpj: str = None, **kwargs) -> Empresa:
+    def criar(session: Session, nome: str, cnpj: str = None, commit: bool = True, **kwargs) -> Empresa:
         """Cria uma nova empresa"""
         empresa = Empresa(nome=nome, cnpj=cnpj, **kwargs)
         session.add(empresa)
-        session.commit()
+        _confirmar(session, commit)
         return empresa
     
     @staticmethod
@@ -104,22 +242,22 @@ class EmpresaService:
         return session.query(Empresa).filter_by(id=empresa_id).first()
     
     @staticmethod
-    def atualizar(session: Session, empresa_id: int, **kwargs) -> Optional[Empresa]:
+    def atualizar(session: Session, empresa_id: int, commit: bool = True, **kwargs) -> Optional[Empresa]:
         """Atualiza dados de uma empresa"""
         empresa = session.query(Empresa).filter_by(id=empresa_id).first()
         if empresa:
             for key, value in kwargs.items():
                 setattr(empresa, key, value)
-            session.commit()
+            _confirmar(session, commit)
         return empresa
     
     @staticmethod
-    def desativar(session: Session, empresa_id: int) -> bool:
+    def desativar(session: Session, empresa_id: int, commit: bool = True) -> bool:
         """Desativa uma empresa (soft delete)"""
         empresa = session.query(Empresa).filter_by(id=empresa_id).first()
         if empresa:
             empresa.ativo = False
-            session.commit()
+            _confirmar(session, commit)
             return True
         return False
 
@@ -128,11 +266,11 @@ class EmbarcacaoService:
     """Serviços para gerenciamento de embarcações"""
     
     @staticmethod
-    def criar(session: Session, empresa_id: int, nome: str, tipo: str, **kwargs) -> Embarcacao:
+    def criar(session: Session, empresa_id: int, nome: str, tipo: str, commit: bool = True, **kwargs) -> Embarcacao:
         """Cria uma nova embarcação"""
         embarcacao = Embarcacao(empresa_id=empresa_id, nome=nome, tipo=tipo, **kwargs)
         session.add(embarcacao)
-        session.commit()
+        _confirmar(session, commit)
         return embarcacao
     
     @staticmethod
@@ -154,13 +292,13 @@ class EmbarcacaoService:
         return session.query(Embarcacao).filter_by(id=embarcacao_id).first()
     
     @staticmethod
-    def atualizar(session: Session, embarcacao_id: int, **kwargs) -> Optional[Embarcacao]:
+    def atualizar(session: Session, embarcacao_id: int, commit: bool = True, **kwargs) -> Optional[Embarcacao]:
         """Atualiza dados de uma embarcação"""
         embarcacao = session.query(Embarcacao).filter_by(id=embarcacao_id).first()
         if embarcacao:
             for key, value in kwargs.items():
                 setattr(embarcacao, key, value)
-            session.commit()
+            _confirmar(session, commit)
         return embarcacao
 
 
@@ -168,11 +306,11 @@ class TabelaPrecoService:
     """Serviços para gerenciamento de tabela de preços"""
     
     @staticmethod
-    def criar(session: Session, ano_inicio: int, valores: dict, **kwargs) -> TabelaPrecoIngresso:
+    def criar(session: Session, ano_inicio: int, valores: dict, commit: bool = True, **kwargs) -> TabelaPrecoIngresso:
         """Cria uma nova tabela de preços"""
         tabela = TabelaPrecoIngresso(ano_inicio=ano_inicio, **valores, **kwargs)
         session.add(tabela)
-        session.commit()
+        _confirmar(session, commit)
         return tabela
     
     @staticmethod
@@ -206,18 +344,37 @@ class TabelaPrecoService:
                     TabelaPrecoIngresso.ano_fim >= ano
                 )
             )
-        ).first()
+        ).order_by(TabelaPrecoIngresso.id).first()
         
         return tabela
     
     @staticmethod
-    def atualizar(session: Session, tabela_id: int, **kwargs) -> Optional[TabelaPrecoIngresso]:
+    def snapshot(tabela: Optional[TabelaPrecoIngresso]) -> Optional[dict]:
+        """
+        Copia os valores de uma tabela de preços para um dict simples, que pode
+        ser guardado e usado fora da sessão (ver MotorPrecos.snapshot)
+        """
+        return MotorPrecos.snapshot(tabela)
+    
+    @staticmethod
+    def listar_snapshots(session: Session) -> List[dict]:
+        """
+        Snapshots de todas as tabelas ativas, na mesma ordem de prioridade
+        usada por buscar_por_data (para cálculo em lote com MotorPrecos)
+        """
+        tabelas = session.query(TabelaPrecoIngresso).filter_by(ativo=True).order_by(
+            TabelaPrecoIngresso.id
+        ).all()
+        return [MotorPrecos.snapshot(t) for t in tabelas]
+    
+    @staticmethod
+    def atualizar(session: Session, tabela_id: int, commit: bool = True, **kwargs) -> Optional[TabelaPrecoIngresso]:
         """Atualiza uma tabela de preços"""
         tabela = session.query(TabelaPrecoIngresso).filter_by(id=tabela_id).first()
         if tabela:
             for key, value in kwargs.items():
                 setattr(tabela, key, value)
-            session.commit()
+            _confirmar(session, commit)
         return tabela
 
 
@@ -245,37 +402,25 @@ class RegistroVisitaService:
         Returns:
             float: Valor total calculado
         """
-        tabela_preco = TabelaPrecoService.buscar_por_data(session, data)
-        
-        if not tabela_preco:
-            return 0.0
-        
-        # Subtotal: visitantes PAGANTES + Taxa de Embarcação
-        # Ingressos = visitantes PAGANTES * valor_categoria
-        
-        subtotal_visitantes = 0.0
-        subtotal_visitantes += quantidades.get('qtde_estrangeiros', 0) * tabela_preco.valor_estrangeiro
-        subtotal_visitantes += quantidades.get('qtde_mercosul', 0) * tabela_preco.valor_mercosul
-        subtotal_visitantes += quantidades.get('qtde_brasileiros', 0) * tabela_preco.valor_brasileiro
-        subtotal_visitantes += quantidades.get('qtde_entorno', 0) * tabela_preco.valor_entorno
-        subtotal_visitantes += quantidades.get('qtde_isentos', 0) * tabela_preco.valor_isento
-        
-        # Taxa da embarcação (Fundeio)
-        taxa_embarcacao = 0.0
-        if comprimento_embarcacao_m is not None:
-            if comprimento_embarcacao_m < 8:
-                taxa_embarcacao = tabela_preco.valor_fundeio_ate8 or 0.0
-            elif comprimento_embarcacao_m <= 15:
-                taxa_embarcacao = tabela_preco.valor_fundeio_8a15 or 0.0
-            else:
-                taxa_embarcacao = tabela_preco.valor_fundeio_acima15 or 0.0
-        
-        # Valor base diário = Soma dos ingressos + Taxa da embarcação
-        valor_diario = subtotal_visitantes + taxa_embarcacao
-        
-        # Valor Total = Valor diário * permanência
-        valor_total = valor_diario * permanencia
-        return round(valor_total, 2)
+        tabela_preco = TabelaPrecoService.snapshot(
+            TabelaPrecoService.buscar_por_data(session, data)
+        )
+        return RegistroVisitaService.calcular_valor_por_tabela(
+            tabela_preco, quantidades, permanencia, comprimento_embarcacao_m
+        )
+    
+    @staticmethod
+    def calcular_valor_por_tabela(tabela_preco: Optional[dict], quantidades: dict,
+                                  permanencia: int = 1,
+                                  comprimento_embarcacao_m: Optional[float] = None) -> float:
+        """
+        Calcula o valor total a partir de um snapshot da tabela de preços, sem
+        acessar o banco (ver TabelaPrecoService.snapshot). Mesma regra de
+        calcular_valor_total.
+        """
+        return MotorPrecos.calcular_valor(
+            tabela_preco, quantidades, permanencia, comprimento_embarcacao_m
+        )
     
     @staticmethod
     def calcular_ingressos_e_visitantes(quantidades: dict, permanencia: int) -> tuple:
@@ -284,22 +429,15 @@ class RegistroVisitaService:
         - Ingressos = visitantes PAGANTES × permanência (isentos não contam como ingresso pago)
         - Visitantes = (pagantes + isentos) × permanência
         """
-        pagantes = (
-            quantidades.get('qtde_estrangeiros', 0) +
-            quantidades.get('qtde_mercosul', 0) +
-            quantidades.get('qtde_brasileiros', 0) +
-            quantidades.get('qtde_entorno', 0)
-        )
-        isentos = quantidades.get('qtde_isentos', 0)
-        ingressos = pagantes * permanencia
-        visitantes = (pagantes + isentos) * permanencia
-        return ingressos, visitantes
+        return MotorPrecos.calcular_ingressos_e_visitantes(quantidades, permanencia)
     
     @staticmethod
     def criar(session: Session, data: date, empresa_id: int, embarcacao_id: int,
-             permanencia: int, quantidades: dict, **kwargs) -> RegistroVisita:
+             permanencia: int, quantidades: dict, commit: bool = True, **kwargs) -> RegistroVisita:
         """Cria um novo registro de visita"""
-        # Comprimento da embarcação para fator de permanência (>=12m ou <12m)
+        # Comprimento da embarcação para fator de permanência (>=12m ou <12m),
+        # lido na própria transação: o cache de referência pode estar
+        # desatualizado em relação a outro processo (ex.: servidor x desktop)
         embarcacao = EmbarcacaoService.buscar_por_id(session, embarcacao_id)
         comprimento_m = embarcacao.comprimento_m if embarcacao else None
         
@@ -317,39 +455,104 @@ class RegistroVisitaService:
             **kwargs
         )
         session.add(registro)
-        session.commit()
+        _confirmar(session, commit)
         return registro
     
+    @staticmethod
+    def criar_em_lote(session: Session, registros: List[dict], commit: bool = True) -> List[RegistroVisita]:
+        """
+        Cria vários registros de visita com uma única precificação vetorizada
+        e um único commit
+        
+        Args:
+            session: Sessão do SQLAlchemy
+            registros: Lista de dicts com data, empresa_id, embarcacao_id,
+                permanencia, qtde_* e demais colunas opcionais do registro
+                
+        Returns:
+            Lista dos registros criados (na mesma ordem)
+        """
+        if not registros:
+            return []
+        
+        # Comprimentos das embarcações envolvidas e tabelas de preço: duas consultas
+        # no total, na própria transação (não no cache de referência, que pode
+        # estar desatualizado em relação a outro processo)
+        ids_embarcacoes = {r['embarcacao_id'] for r in registros}
+        comprimentos = dict(
+            session.query(Embarcacao.id, Embarcacao.comprimento_m)
+            .filter(Embarcacao.id.in_(ids_embarcacoes)).all()
+        )
+        tabelas = TabelaPrecoService.listar_snapshots(session)
+        
+        resultado = MotorPrecos.calcular_lote(
+            tabelas,
+            [r['data'] for r in registros],
+            {col: [r.get(col) or 0 for r in registros] for col in COLUNAS_QUANTIDADE},
+            [r.get('permanencia') or 1 for r in registros],
+            [comprimentos.get(r['embarcacao_id']) for r in registros],
+        )
+        
+        objetos = []
+        for r, valor_total in zip(registros, resultado['valor_total'].tolist()):
+            dados = dict(r)
+            dados.setdefault('permanencia', 1)
+            dados['valor_total'] = valor_total
+            objetos.append(RegistroVisita(**dados))
+        
+        session.add_all(objetos)
+        _confirmar(session, commit)
+        return objetos
+    
     @staticmethod
     def listar_por_periodo(session: Session, data_inicio: date, 
                           data_fim: date, empresa_id: Optional[int] = None) -> List[RegistroVisita]:
         """Lista registros em um período, opcionalmente filtrando por empresa"""
-        query = session.query(RegistroVisita).filter(
+        R = fonte_registros(session, data_inicio, data_fim)
+        query = session.query(R).filter(
             and_(
-                RegistroVisita.data >= data_inicio,
-                RegistroVisita.data <= data_fim
+                R.data >= data_inicio,
+                R.data <= data_fim
             )
         )
         
         if empresa_id:
-            query = query.filter(RegistroVisita.empresa_id == empresa_id)
+            query = query.filter(R.empresa_id == empresa_id)
             
-        return query.order_by(RegistroVisita.data.desc()).all()
+        return query.order_by(R.data.desc()).all()
+    
+    @staticmethod
+    def ultima_data(session: Session) -> Optional[date]:
+        """Data do registro mais recente do banco principal (None se não houver registros)"""
+        return session.query(func.max(RegistroVisita.data)).scalar()
     
     @staticmethod
     def listar_por_data(session: Session, data: date) -> List[RegistroVisita]:
         """Lista registros de uma data específica"""
-        return session.query(RegistroVisita).filter_by(data=data).order_by(
-            RegistroVisita.criado_em.desc()
+        R = fonte_registros(session, data, data)
+        return session.query(R).filter(R.data == data).order_by(
+            R.criado_em.desc()
         ).all()
     
     @staticmethod
     def buscar_por_id(session: Session, registro_id: int) -> Optional[RegistroVisita]:
-        """Busca registro por ID"""
-        return session.query(RegistroVisita).filter_by(id=registro_id).first()
-    
+        """Busca registro por ID (inclusive entre os arquivados, que são somente leitura)"""
+        registro = session.query(RegistroVisita).filter_by(id=registro_id).first()
+        if registro is None:
+            R = fonte_registros(session)
+            if R is not RegistroVisita:
+                registro = session.query(R).filter(R.id == registro_id).first()
+        return registro
+
+    @staticmethod
+    def listar_por_ids(session: Session, ids: List[int]) -> List[RegistroVisita]:
+        """Registros do banco principal com os ids informados (ex.: recém-gravados)"""
+        if not ids:
+            return []
+        return session.query(RegistroVisita).filter(RegistroVisita.id.in_(ids)).all()
+
     @staticmethod
-    def atualizar(session: Session, registro_id: int, **kwargs) -> Optional[RegistroVisita]:
+    def atualizar(session: Session, registro_id: int, commit: bool = True, **kwargs) -> Optional[RegistroVisita]:
         """Atualiza um registro de visita"""
         registro = session.query(RegistroVisita).filter_by(id=registro_id).first()
         if registro:
@@ -375,16 +578,16 @@ class RegistroVisitaService:
                 setattr(registro, key, value)
             
             registro.atualizado_em = datetime.now()
-            session.commit()
+            _confirmar(session, commit)
         return registro
     
     @staticmethod
-    def deletar(session: Session, registro_id: int) -> bool:
+    def deletar(session: Session, registro_id: int, commit: bool = True) -> bool:
         """Deleta um registro de visita"""
         registro = session.query(RegistroVisita).filter_by(id=registro_id).first()
         if registro:
             session.delete(registro)
-            session.commit()
+            _confirmar(session, commit)
             return True
         return False
     
@@ -396,10 +599,13 @@ class RegistroVisitaService:
         Returns:
             dict com totais de visitantes e receita
         """
-        registros = session.query(RegistroVisita).filter(
+        # Intervalo de datas (em vez de extract) para aproveitar o índice em data
+        inicio, fim = date(ano, mes, 1), date(ano, mes, monthrange(ano, mes)[1])
+        R = fonte_registros(session, inicio, fim)
+        registros = session.query(R).filter(
             and_(
-                extract('year', RegistroVisita.data) == ano,
-                extract('month', RegistroVisita.data) == mes
+                R.data >= inicio,
+                R.data <= fim
             )
         ).all()
         
@@ -433,12 +639,355 @@ class RegistroVisitaService:
         return resumo
 
 
+class RecalculoService:
+    """Recálculo em lote do valor_total após alterações na tabela de preços"""
+    
+    # Diferenças menores que meio centavo são ruído de arredondamento
+    TOLERANCIA = 0.005
+    
+    @staticmethod
+    def recalcular_valores(session: Session, data_inicio: date, data_fim: date,
+                           simular: bool = False, tamanho_lote: int = 5000,
+                           progresso=None, max_diferencas: Optional[int] = 1000) -> dict:
+        """
+        Reprecifica os registros do período com os preços vigentes e grava os
+        valores que mudaram
+        
+        Os registros são lidos em lotes (paginação por id), precificados de
+        forma vetorizada com MotorPrecos.calcular_lote e gravados com um único
+        UPDATE executemany por lote. Cada lote é confirmado separadamente; como
+        o recálculo é idempotente, basta executá-lo de novo se for interrompido.
+        Registros de temporadas arquivadas não são recalculados.
+        
+        Args:
+            session: Sessão do SQLAlchemy
+            data_inicio: Data inicial (inclusive)
+            data_fim: Data final (inclusive)
+            simular: Se True, apenas calcula as diferenças sem gravar (dry-run)
+            tamanho_lote: Registros por lote
+            progresso: Função opcional chamada com (processados, total)
+            max_diferencas: Diferenças guardadas no resultado (as primeiras
+                por id; None = todas). Os totais contam todos os registros.
+            
+        Returns:
+            dict com analisados, alterados, diferenca_total e diferencas
+            (lista de (id, data, valor_antigo, valor_novo))
+        """
+        filtro = and_(RegistroVisita.data >= data_inicio, RegistroVisita.data <= data_fim)
+        total = session.query(func.count(RegistroVisita.id)).filter(filtro).scalar() or 0
+        tabelas = TabelaPrecoService.listar_snapshots(session)
+        
+        colunas = [
+            RegistroVisita.id, RegistroVisita.data, RegistroVisita.permanencia,
+            RegistroVisita.valor_total, Embarcacao.comprimento_m
+        ] + [getattr(RegistroVisita, col) for col in COLUNAS_QUANTIDADE]
+        
+        resultado = {'analisados': 0, 'alterados': 0, 'diferenca_total': 0.0, 'diferencas': []}
+        ultimo_id = 0
+        
+        while True:
+            linhas = session.query(*colunas).outerjoin(
+                Embarcacao, RegistroVisita.embarcacao_id == Embarcacao.id
+            ).filter(filtro, RegistroVisita.id > ultimo_id).order_by(
+                RegistroVisita.id
+            ).limit(tamanho_lote).all()
+            
+            if not linhas:
+                break
+            ultimo_id = linhas[-1][0]
+            
+            ids, datas, permanencias, antigos, comprimentos, *quantidades = zip(*linhas)
+            novos = MotorPrecos.calcular_lote(
+                tabelas, datas, dict(zip(COLUNAS_QUANTIDADE, quantidades)),
+                [p or 1 for p in permanencias], comprimentos
+            )['valor_total'].tolist()
+            
+            alteracoes = []
+            for registro_id, data_registro, antigo, novo in zip(ids, datas, antigos, novos):
+                if abs((antigo or 0.0) - novo) >= RecalculoService.TOLERANCIA:
+                    if max_diferencas is None or len(resultado['diferencas']) < max_diferencas:
+                        resultado['diferencas'].append((registro_id, data_registro, antigo, novo))
+                    resultado['diferenca_total'] += novo - (antigo or 0.0)
+                    alteracoes.append({'id': registro_id, 'valor_total': novo})
+            
+            if alteracoes and not simular:
+                agora = datetime.now()
+                for alteracao in alteracoes:
+                    alteracao['atualizado_em'] = agora
+                session.execute(update(RegistroVisita), alteracoes)
+                _confirmar(session)
+            
+            resultado['analisados'] += len(linhas)
+            resultado['alterados'] += len(alteracoes)
+            if progresso:
+                progresso(resultado['analisados'], total)
+        
+        resultado['diferenca_total'] = round(resultado['diferenca_total'], 2)
+        return resultado
+
+
+class EstatisticaService:
+    """Consultas agregadas (GROUP BY) para gráficos e indicadores"""
+    
+    # Limites de período (em dias) para escolher a granularidade da série,
+    # mantendo o número de pontos na casa das centenas
+    MAX_DIAS_SERIE_DIARIA = 400
+    MAX_DIAS_SERIE_SEMANAL = 1100
+    
+    @staticmethod
+    def granularidade_para_periodo(data_inicio: date, data_fim: date) -> str:
+        """Retorna 'dia', 'semana' ou 'mes' conforme o tamanho do período"""
+        dias = (data_fim - data_inicio).days + 1
+        if dias <= EstatisticaService.MAX_DIAS_SERIE_DIARIA:
+            return 'dia'
+        if dias <= EstatisticaService.MAX_DIAS_SERIE_SEMANAL:
+            return 'semana'
+        return 'mes'
+    
+    @staticmethod
+    def _inicio_periodo(dia: date, granularidade: str) -> date:
+        if granularidade == 'semana':
+            return dia - timedelta(days=dia.weekday())
+        if granularidade == 'mes':
+            return dia.replace(day=1)
+        return dia
+    
+    @staticmethod
+    def serie_temporal(session: Session, data_inicio: date, data_fim: date,
+                       granularidade: Optional[str] = None) -> List[dict]:
+        """
+        Série de visitantes (por categoria) e receita agregada por período
+        
+        A consulta agrupa por dia (resolvida pelo índice de data) e os dias são
+        reagrupados em semanas/meses aqui, mantendo a série com poucas centenas
+        de pontos mesmo em períodos longos.
+        
+        Args:
+            session: Sessão do SQLAlchemy
+            data_inicio: Data inicial (inclusive)
+            data_fim: Data final (inclusive)
+            granularidade: 'dia', 'semana' (início na segunda) ou 'mes';
+                se omitida, é escolhida pelo tamanho do período
+            
+        Returns:
+            Lista de dicts ordenada por período, um ponto por período com registros
+        """
+        if granularidade is None:
+            granularidade = EstatisticaService.granularidade_para_periodo(data_inicio, data_fim)
+        
+        # Com temporadas arquivadas no período, uma consulta por tabela
+        # (os dias presentes nas duas são somados abaixo)
+        linhas = []
+        for R in fontes_registros(session, data_inicio, data_fim):
+            linhas += session.query(
+                R.data,
+                func.coalesce(func.sum(R.qtde_estrangeiros), 0),
+                func.coalesce(func.sum(R.qtde_mercosul), 0),
+                func.coalesce(func.sum(R.qtde_brasileiros), 0),
+                func.coalesce(func.sum(R.qtde_entorno), 0),
+                func.coalesce(func.sum(R.qtde_isentos), 0),
+                func.coalesce(func.sum(R.valor_total), 0.0),
+            ).filter(
+                R.data >= data_inicio,
+                R.data <= data_fim
+            ).group_by(R.data).order_by(R.data).all()
+        
+        pontos = {}
+        for dia, estrangeiros, mercosul, brasileiros, entorno, isentos, receita in linhas:
+            periodo = EstatisticaService._inicio_periodo(dia, granularidade)
+            ponto = pontos.get(periodo)
+            if ponto is None:
+                ponto = pontos[periodo] = {
+                    'periodo': periodo, 'estrangeiros': 0, 'mercosul': 0,
+                    'brasileiros': 0, 'entorno': 0, 'isentos': 0,
+                    'visitantes': 0, 'receita': 0.0,
+                }
+            ponto['estrangeiros'] += estrangeiros
+            ponto['mercosul'] += mercosul
+            ponto['brasileiros'] += brasileiros
+            ponto['entorno'] += entorno
+            ponto['isentos'] += isentos
+            ponto['visitantes'] += estrangeiros + mercosul + brasileiros + entorno + isentos
+            ponto['receita'] += receita
+        
+        # Com o arquivo, as linhas de cada tabela vêm em sequência (não em ordem)
+        serie = sorted(pontos.values(), key=lambda ponto: ponto['periodo'])
+        for ponto in serie:
+            ponto['receita'] = round(ponto['receita'], 2)
+        return serie
+    
+    @staticmethod
+    def rankings(session: Session, data_inicio: date, data_fim: date,
+                 limite: int = 5) -> dict:
+        """
+        Empresas e embarcações com mais visitantes no período
+        
+        Uma única consulta agrupada por embarcação alimenta os dois rankings
+        (cada embarcação pertence a uma empresa); se o período incluir
+        temporadas arquivadas, uma por tabela.
+        
+        Returns:
+            dict com as listas 'empresas' e 'embarcacoes' ({nome, visitantes, receita})
+        """
+        linhas = []
+        for R in fontes_registros(session, data_inicio, data_fim):
+            visitantes = (
+                func.coalesce(func.sum(R.qtde_estrangeiros), 0) +
+                func.coalesce(func.sum(R.qtde_mercosul), 0) +
+                func.coalesce(func.sum(R.qtde_brasileiros), 0) +
+                func.coalesce(func.sum(R.qtde_entorno), 0) +
+                func.coalesce(func.sum(R.qtde_isentos), 0)
+            )
+            linhas += session.query(
+                R.embarcacao_id,
+                R.empresa_id,
+                visitantes,
+                func.coalesce(func.sum(R.valor_total), 0.0),
+            ).filter(
+                R.data >= data_inicio,
+                R.data <= data_fim
+            ).group_by(R.embarcacao_id, R.empresa_id).all()
+        
+        por_embarcacao = {}
+        por_empresa = {}
+        for embarcacao_id, empresa_id, v, r in linhas:
+            for totais, chave in ((por_embarcacao, embarcacao_id), (por_empresa, empresa_id)):
+                total = totais.setdefault(chave, [0, 0.0])
+                total[0] += v
+                total[1] += r
+        
+        referencias = CACHE_REFERENCIAS.obter(session)
+        
+        def top(totais: dict, nome) -> List[dict]:
+            ids = sorted(totais, key=lambda i: totais[i][0], reverse=True)[:limite]
+            return [
+                {'nome': nome(i), 'visitantes': totais[i][0], 'receita': round(totais[i][1], 2)}
+                for i in ids
+            ]
+        
+        return {
+            'empresas': top(por_empresa, referencias.nome_empresa),
+            'embarcacoes': top(por_embarcacao, referencias.nome_embarcacao),
+        }
+
+
+class RelatorioService:
+    """Consultas usadas nas exportações e na nota de pagamento"""
+    
+    @staticmethod
+    def dados_exportacao(session: Session, data_inicio: date, data_fim: date) -> List[dict]:
+        """Linhas do relatório de registros do período (colunas com rótulos de exibição)"""
+        R = fonte_registros(session, data_inicio, data_fim, colunas=[
+            'data', 'empresa_id', 'embarcacao_id', 'permanencia', 'qtde_estrangeiros',
+            'qtde_mercosul', 'qtde_brasileiros', 'qtde_entorno', 'qtde_isentos', 'valor_total'
+        ])
+        linhas = session.query(
+            R.data, Empresa.nome, Embarcacao.nome, R.permanencia,
+            R.qtde_estrangeiros, R.qtde_mercosul,
+            R.qtde_brasileiros, R.qtde_entorno,
+            R.qtde_isentos, R.valor_total
+        ).join(Empresa, R.empresa_id == Empresa.id).join(
+            Embarcacao, R.embarcacao_id == Embarcacao.id
+        ).filter(
+            and_(R.data >= data_inicio, R.data <= data_fim)
+        ).order_by(R.data.desc()).all()
+        
+        return [
+            {
+                'Data': r[0].strftime('%d/%m/%Y'),
+                'Empresa': r[1],
+                'Embarcação': r[2],
+                'Permanência': r[3],
+                'Estrangeiros': r[4],
+                'Mercosul': r[5],
+                'Brasileiros': r[6],
+                'Entorno': r[7],
+                'Isentos': r[8],
+                'Valor Total': r[9]
+            }
+            for r in linhas
+        ]
+    
+    @staticmethod
+    def dados_nota(session: Session, empresa_id: int, data_inicio: date, data_fim: date) -> Optional[dict]:
+        """
+        Dados da nota de pagamento de uma empresa no período
+        
+        Returns:
+            dict com empresa, registros, totais, periodo_inicio, periodo_fim e
+            data_geracao (registros vazio se não houver visitas), ou None se a
+            empresa não existir
+        """
+        empresa_obj = (CACHE_REFERENCIAS.obter(session).empresa(empresa_id)
+                       or EmpresaService.buscar_por_id(session, empresa_id))
+        if not empresa_obj:
+            return None
+        
+        empresa = {
+            'nome': empresa_obj.nome,
+            'cnpj': empresa_obj.cnpj,
+            'contato_nome': empresa_obj.contato_nome,
+            'contato_telefone': empresa_obj.contato_telefone,
+            'contato_email': empresa_obj.contato_email
+        }
+        
+        colunas = [
+            'qtde_estrangeiros', 'qtde_mercosul', 'qtde_brasileiros', 'qtde_entorno',
+            'qtde_isentos', 'qtde_maior12', 'qtde_menor12'
+        ]
+        R = fonte_registros(session, data_inicio, data_fim)
+        linhas = session.query(
+            R.data, Embarcacao.nome, R.permanencia,
+            *[getattr(R, col) for col in colunas], R.valor_total
+        ).join(Embarcacao, R.embarcacao_id == Embarcacao.id).filter(
+            and_(
+                R.empresa_id == empresa_id,
+                R.data >= data_inicio,
+                R.data <= data_fim
+            )
+        ).order_by(R.data.desc()).all()
+        
+        registros = []
+        for r in linhas:
+            registro = {'data': r[0], 'embarcacao_nome': r[1], 'permanencia': r[2]}
+            registro.update({col: r[3 + i] or 0 for i, col in enumerate(colunas)})
+            registro['valor_total'] = r[-1] or 0.0
+            registros.append(registro)
+        
+        totais = {
+            'estrangeiros': sum(r['qtde_estrangeiros'] for r in registros),
+            'mercosul': sum(r['qtde_mercosul'] for r in registros),
+            'brasileiros': sum(r['qtde_brasileiros'] for r in registros),
+            'entorno': sum(r['qtde_entorno'] for r in registros),
+            'isentos': sum(r['qtde_isentos'] for r in registros),
+            'maior12': sum(r['qtde_maior12'] for r in registros),
+            'menor12': sum(r['qtde_menor12'] for r in registros),
+            'valor_total': sum(r['valor_total'] for r in registros),
+            'qtd_registros': len(registros)
+        }
+        
+        totais['total_visitantes'] = (
+            totais['estrangeiros'] + totais['mercosul'] + totais['brasileiros'] +
+            totais['entorno'] + totais['isentos'] + totais['maior12'] + totais['menor12']
+        )
+        
+        return {
+            'empresa': empresa,
+            'registros': registros,
+            'totais': totais,
+            'periodo_inicio': data_inicio,
+            'periodo_fim': data_fim,
+            'data_geracao': datetime.now()
+        }
+
+
 class DocumentoAuditoriaService:
     """Serviços para gerenciamento de documentos de auditoria"""
 
     @staticmethod
     def criar(session: Session, empresa_id: int, tipo: str, nome_arquivo: str,
-              caminho_arquivo: str, registro_visita_id: Optional[int] = None) -> DocumentoAuditoria:
+              caminho_arquivo: str, registro_visita_id: Optional[int] = None,
+              commit: bool = True) -> DocumentoAuditoria:
         """Cria um novo registro de documento enviado para auditoria"""
         documento = DocumentoAuditoria(
             empresa_id=empresa_id,
@@ -448,7 +997,7 @@ class DocumentoAuditoriaService:
             caminho_arquivo=caminho_arquivo
         )
         session.add(documento)
-        session.commit()
+        _confirmar(session, commit)
         return documento
 
     @staticmethod
@@ -465,10 +1014,31 @@ class DocumentoAuditoriaService:
 class LogService:
     """Serviços para log de auditoria"""
     
+    # Gravador em segundo plano opcional (ver models/auditoria.py)
+    gravador = None
+    
+    @staticmethod
+    def configurar_gravador(gravador) -> None:
+        """Define (ou remove, com None) o GravadorAuditoria usado por registrar"""
+        LogService.gravador = gravador
+    
     @staticmethod
     def registrar(session: Session, usuario: str, acao: str, tabela: str, 
-                 registro_id: int = None, descricao: str = None):
-        """Registra uma ação de auditoria"""
+                 registro_id: int = None, descricao: str = None, commit: bool = True):
+        """
+        Registra uma ação de auditoria
+        
+        Com commit=False (ou dentro de uma unidade de trabalho) a entrada é
+        apenas adicionada à sessão e gravada no mesmo commit da alteração que
+        ela descreve. Caso contrário, é enfileirada no gravador configurado ou,
+        sem gravador, gravada com um commit próprio.
+        """
+        if _em_unidade_de_trabalho(session):
+            commit = False
+        if commit and LogService.gravador is not None:
+            LogService.gravador.registrar(usuario, acao, tabela, registro_id, descricao)
+            return
+        
         log = LogAuditoria(
             usuario=usuario,
             acao=acao,
@@ -477,4 +1047,19 @@ class LogService:
             descricao=descricao
         )
         session.add(log)
-        session.commit()
+        if commit:
+            session.commit()
+
+
+class VersaoTabelaService:
+    """Detecção de alterações pelos contadores de versoes_tabelas"""
+    
+    @staticmethod
+    def versoes(session: Session) -> dict:
+        """Versão atual de cada tabela monitorada, em uma única consulta"""
+        return dict(session.query(VersaoTabela.tabela, VersaoTabela.versao).all())
+    
+    @staticmethod
+    def alteradas(anteriores: dict, atuais: dict) -> set:
+        """Tabelas cuja versão mudou entre duas leituras"""
+        return {tabela for tabela, versao in atuais.items() if anteriores.get(tabela) != versao}
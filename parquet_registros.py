@@ -0,0 +1,84 @@
+"""
+Exporta e importa os registros de visita em Parquet (análise e migração)
+
+A exportação grava um conjunto particionado por ano/mês (pasta/ano=2024/mes=3/)
+com os dados de empresa e embarcação em cada linha, pronto para pandas,
+DuckDB ou Power BI. A importação insere esses registros em outro banco, com novos
+ids, ou restaura um banco vazio mantendo os ids originais (--manter-ids).
+Requer o pacote pyarrow.
+
+Uso:
+    python parquet_registros.py exportar parquet/ [--inicio 2021-01-01 --fim 2025-12-31]
+    python parquet_registros.py --db outro.db importar parquet/
+    python parquet_registros.py --db vazio.db importar parquet/ --manter-ids
+"""
+import argparse
+import sys
+from datetime import date
+
+from models.database import init_db
+from models.exportacao_parquet import ExportacaoParquet
+
+
+def _tamanho(bytes_: int) -> str:
+    return f'{bytes_ / 1024 / 1024:.1f} MB'
+
+
+def comando_exportar(session, args):
+    periodo = ExportacaoParquet.periodo_completo(session)
+    if periodo is None:
+        print('Nenhum registro a exportar.')
+        return
+    data_inicio = args.inicio or periodo[0]
+    data_fim = args.fim or periodo[1]
+    resultado = ExportacaoParquet.exportar(session, args.destino, data_inicio, data_fim,
+                                           tamanho_lote=args.lote)
+    print(f"{resultado['linhas']} registros de {data_inicio:%d/%m/%Y} a {data_fim:%d/%m/%Y} exportados "
+          f"em {resultado['particoes']} partições ({_tamanho(resultado['tamanho'])}, {resultado['duracao']:.1f} s)")
+
+
+def comando_importar(session, args):
+    try:
+        resultado = ExportacaoParquet.importar(session, args.origem, manter_ids=args.manter_ids)
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"{resultado['inseridos']} registros importados ({resultado['duracao']:.1f} s)")
+    if resultado['empresas_criadas'] or resultado['embarcacoes_criadas']:
+        print(f"  Cadastradas: {resultado['empresas_criadas']} empresa(s), "
+              f"{resultado['embarcacoes_criadas']} embarcação(ões)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exportação e importação de registros em Parquet')
+    parser.add_argument('--db', default='abrolhos_ingressos.db', help='Arquivo do banco de dados')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    exportacao = comandos.add_parser('exportar', help='Grava os registros em uma pasta particionada por ano/mês')
+    exportacao.add_argument('destino')
+    exportacao.add_argument('--inicio', type=date.fromisoformat, help='Data inicial (AAAA-MM-DD; padrão: primeiro registro)')
+    exportacao.add_argument('--fim', type=date.fromisoformat, help='Data final (AAAA-MM-DD; padrão: último registro)')
+    exportacao.add_argument('--lote', type=int, default=50_000, help='Linhas por lote gravado')
+    exportacao.set_defaults(funcao=comando_exportar)
+
+    importacao = comandos.add_parser('importar', help='Insere no banco os registros de uma pasta exportada')
+    importacao.add_argument('origem')
+    importacao.add_argument('--manter-ids', action='store_true',
+                            help='Restauração: mantém os ids originais (apenas em um banco sem registros)')
+    importacao.set_defaults(funcao=comando_importar)
+
+    args = parser.parse_args()
+    engine, SessionLocal = init_db(args.db)
+    session = SessionLocal()
+    try:
+        args.funcao(session, args)
+    except RuntimeError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
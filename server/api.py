@@ -4,21 +4,33 @@ API para sincronização entre app servidor e app cliente.
 from __future__ import annotations
 
 import os
+import time
 from datetime import date
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from uuid import uuid4
 
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
-from pydantic import BaseModel
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from starlette.routing import Match
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from models.database import init_db, TabelaPrecoIngresso
+from models.instrumentacao import MONITOR_SQL
 from models.services import (
     DocumentoAuditoriaService,
     RegistroVisitaService,
     TabelaPrecoService,
+    TokenAPIService,
+    UsuarioService,
+    unidade_de_trabalho,
 )
+from server.autenticacao import CacheTokens, Principal
+from server.metricas import MetricasSincronizacao
+from server.notificacoes import CanalAlteracoes, formatar_evento
 
 DB_PATH = os.getenv("ABROLHOS_DB_PATH", "abrolhos_ingressos.db")
 UPLOAD_DIR = Path(os.getenv("ABROLHOS_UPLOAD_DIR", "uploads"))
@@ -26,16 +38,101 @@ UPLOAD_DIR = Path(os.getenv("ABROLHOS_UPLOAD_DIR", "uploads"))
 engine, SessionLocal = init_db(DB_PATH)
 
 app = FastAPI(title="Abrolhos Ingressos Sync API")
+metricas = MetricasSincronizacao(engine)
+
+# Notificações de alterações para os apps desktop (GET /eventos)
+canal_alteracoes = CanalAlteracoes()
+metricas.registro.medidor(
+    "abrolhos_eventos_assinantes", "Conexões abertas em /eventos",
+    funcao=lambda: {(): len(canal_alteracoes)})
+
+# Intervalo dos comentários de keep-alive do fluxo de eventos (segundos)
+INTERVALO_PING = 15.0
+
+
+def modelo_rota(request: Request) -> str:
+    """Modelo da rota chamada (não o caminho), para limitar a cardinalidade dos rótulos"""
+    for rota in app.router.routes:
+        correspondencia, _ = rota.matches(request.scope)
+        if correspondencia == Match.FULL:
+            return rota.path
+    return "desconhecida"
+
+
+@app.middleware("http")
+async def medir_requisicao(request: Request, call_next):
+    inicio = time.perf_counter()
+    rota = modelo_rota(request)
+    metricas.em_andamento.inc()
+    status = 500
+    try:
+        # Com o monitor SQL ativo, as consultas ficam agrupadas por rota
+        with MONITOR_SQL.operacao(f"api {request.method} {rota}"):
+            response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metricas.em_andamento.dec()
+        metricas.requisicoes.inc(metodo=request.method, rota=rota, status=status)
+        metricas.duracao_requisicoes.observar(time.perf_counter() - inicio, metodo=request.method, rota=rota)
 
 
 def get_session():
+    # Uma transação por requisição: commit ao final, rollback em caso de erro
+    with unidade_de_trabalho(SessionLocal) as session:
+        yield session
+        eventos = CanalAlteracoes.preparar(session)
+    # Publicadas só depois do commit, quando os registros já são visíveis aos clientes
+    canal_alteracoes.publicar(eventos)
+
+
+cache_tokens = CacheTokens()
+esquema_bearer = HTTPBearer(auto_error=False)
+
+
+def _identificacao_cliente(username: str, descricao: Optional[str]) -> str:
+    """Rótulo do cliente nas métricas (o app envia o nome da máquina como descrição do token)"""
+    return f"{username}@{descricao}"[:80] if descricao else username
+
+
+def _carregar_principal(token_hash: str) -> Optional[Principal]:
     session = SessionLocal()
     try:
-        yield session
+        registro = TokenAPIService.buscar_valido(session, token_hash)
+        if registro is None:
+            return None
+        return Principal(
+            usuario_id=registro.usuario_id,
+            username=registro.usuario.username,
+            is_admin=bool(registro.usuario.is_admin),
+            expira_em=registro.expira_em,
+            token_hash=token_hash,
+            cliente=_identificacao_cliente(registro.usuario.username, registro.descricao),
+        )
     finally:
         session.close()
 
 
+async def usuario_autenticado(
+    credenciais: Optional[HTTPAuthorizationCredentials] = Depends(esquema_bearer),
+) -> Principal:
+    """Valida o token Bearer pelo cache; o banco só é consultado quando o token não está nele"""
+    if credenciais is None:
+        raise HTTPException(
+            status_code=401, detail="Token de acesso ausente.", headers={"WWW-Authenticate": "Bearer"}
+        )
+    token_hash = TokenAPIService.hash_token(credenciais.credentials)
+    principal = cache_tokens.obter(token_hash)
+    if principal is None:
+        principal = await run_in_threadpool(_carregar_principal, token_hash)
+        if principal is None:
+            raise HTTPException(
+                status_code=401, detail="Token inválido ou expirado.", headers={"WWW-Authenticate": "Bearer"}
+            )
+        cache_tokens.guardar(principal)
+    return principal
+
+
 class TabelaPrecoResponse(BaseModel):
     id: int
     ano_inicio: int
@@ -68,21 +165,88 @@ class RegistroVisitaPayload(BaseModel):
     observacao: Optional[str] = None
 
 
+class TokenRequest(BaseModel):
+    username: str
+    password: str
+    descricao: Optional[str] = None
+    validade_horas: Optional[int] = Field(None, ge=1, le=TokenAPIService.VALIDADE_MAXIMA_HORAS)
+
+
 @app.get("/health")
 def health_check() -> dict:
     return {"status": "ok"}
 
 
+@app.post("/auth/token")
+def emitir_token(payload: TokenRequest, session: Session = Depends(get_session)) -> dict:
+    """Verifica a senha uma única vez e devolve um token para as demais requisições"""
+    usuario = UsuarioService.autenticar(session, payload.username, payload.password)
+    if not usuario:
+        raise HTTPException(status_code=401, detail="Usuário ou senha inválidos.")
+    token, registro = TokenAPIService.emitir(
+        session, usuario, validade_horas=payload.validade_horas, descricao=payload.descricao
+    )
+    return {"access_token": token, "token_type": "bearer", "expira_em": registro.expira_em}
+
+
+@app.delete("/auth/token")
+def revogar_token(
+    principal: Principal = Depends(usuario_autenticado), session: Session = Depends(get_session)
+) -> dict:
+    TokenAPIService.revogar(session, principal.token_hash)
+    cache_tokens.remover(principal.token_hash)
+    return {"revogado": True}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def exportar_metricas() -> PlainTextResponse:
+    """Métricas do servidor no formato de exposição do Prometheus"""
+    return PlainTextResponse(metricas.exposicao(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/metrics/sql", dependencies=[Depends(usuario_autenticado)])
+def metricas_sql() -> dict:
+    """Detalhes do monitor SQL (ativado com ABROLHOS_SQL_MONITOR=1)"""
+    return MONITOR_SQL.resumo()
+
+
+@app.get("/eventos", dependencies=[Depends(usuario_autenticado)])
+async def eventos(request: Request) -> StreamingResponse:
+    """Fluxo (Server-Sent Events) de notificações de registros gravados pela API"""
+    ultimo_id = request.headers.get("Last-Event-ID", "")
+    assinatura = canal_alteracoes.assinar(int(ultimo_id) if ultimo_id.isdigit() else None)
+
+    async def transmitir():
+        try:
+            while not await request.is_disconnected():
+                evento = await assinatura.proximo(INTERVALO_PING)
+                # O comentário periódico mantém a conexão aberta em proxies
+                yield formatar_evento(evento) if evento else ": ping\n\n"
+        finally:
+            canal_alteracoes.cancelar(assinatura)
+
+    return StreamingResponse(
+        transmitir(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+
 @app.get("/precos/ativo", response_model=TabelaPrecoResponse)
-def obter_tabela_preco(session: Session = Depends(get_session)) -> TabelaPrecoIngresso:
+def obter_tabela_preco(
+    principal: Principal = Depends(usuario_autenticado), session: Session = Depends(get_session)
+) -> TabelaPrecoIngresso:
     tabela = TabelaPrecoService.listar_ativas(session)
     if not tabela:
         raise HTTPException(status_code=404, detail="Nenhuma tabela de preços ativa encontrada.")
+    metricas.registrar_sincronizacao(principal.cliente)
     return tabela[0]
 
 
 @app.post("/registros")
-def criar_registro(payload: RegistroVisitaPayload, session: Session = Depends(get_session)) -> dict:
+def criar_registro(
+    payload: RegistroVisitaPayload,
+    principal: Principal = Depends(usuario_autenticado),
+    session: Session = Depends(get_session),
+) -> dict:
     quantidades = {
         "qtde_estrangeiros": payload.qtde_estrangeiros,
         "qtde_mercosul": payload.qtde_mercosul,
@@ -103,15 +267,35 @@ def criar_registro(payload: RegistroVisitaPayload, session: Session = Depends(ge
         responsavel=payload.responsavel,
         observacao=payload.observacao,
     )
+    CanalAlteracoes.anotar(session, "registros_visita", "INSERT", [registro])
+    metricas.registros_recebidos.inc(cliente=principal.cliente)
+    metricas.registrar_sincronizacao(principal.cliente)
     return {"id": registro.id, "valor_total": registro.valor_total}
 
 
+@app.post("/registros/lote")
+def criar_registros_lote(
+    payload: List[RegistroVisitaPayload],
+    principal: Principal = Depends(usuario_autenticado),
+    session: Session = Depends(get_session),
+) -> List[dict]:
+    metricas.lote_tamanho.observar(len(payload))
+    registros = RegistroVisitaService.criar_em_lote(
+        session, [item.model_dump() for item in payload]
+    )
+    CanalAlteracoes.anotar(session, "registros_visita", "INSERT", registros)
+    metricas.registros_recebidos.inc(len(payload), cliente=principal.cliente)
+    metricas.registrar_sincronizacao(principal.cliente)
+    return [{"id": registro.id, "valor_total": registro.valor_total} for registro in registros]
+
+
 @app.post("/documentos")
 def enviar_documento(
     empresa_id: int = Form(...),
     tipo: str = Form(...),
     arquivo: UploadFile = File(...),
     registro_visita_id: Optional[int] = Form(None),
+    principal: Principal = Depends(usuario_autenticado),
     session: Session = Depends(get_session),
 ) -> dict:
     if not arquivo.filename:
@@ -124,8 +308,13 @@ def enviar_documento(
     nome_seguro = f"{uuid4().hex}_{Path(arquivo.filename).name}"
     destino = destino_dir / nome_seguro
 
+    inicio = time.perf_counter()
     with destino.open("wb") as buffer:
-        buffer.write(arquivo.file.read())
+        conteudo = arquivo.file.read()
+        buffer.write(conteudo)
+    metricas.upload_bytes.inc(len(conteudo), tipo=tipo)
+    metricas.upload_tamanho.observar(len(conteudo), tipo=tipo)
+    metricas.upload_duracao.observar(time.perf_counter() - inicio, tipo=tipo)
 
     documento = DocumentoAuditoriaService.criar(
         session,
@@ -135,4 +324,5 @@ def enviar_documento(
         nome_arquivo=arquivo.filename,
         caminho_arquivo=str(destino),
     )
+    metricas.registrar_sincronizacao(principal.cliente)
     return {"id": documento.id, "arquivo": documento.nome_arquivo}
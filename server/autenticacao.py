@@ -0,0 +1,64 @@
+"""
+Cache dos tokens da API: valida o token em O(1) sem consultar o banco a cada requisição
+
+A senha é verificada (bcrypt) uma única vez, na emissão do token. Cada
+requisição calcula apenas o SHA-256 do token e o procura neste cache LRU;
+o banco (tabela tokens_api) só é consultado na primeira vez ou após o
+prazo de revalidação, que limita por quanto tempo uma revogação feita por
+outro processo ainda pode ser aceita.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Usuário autenticado por um token"""
+    usuario_id: int
+    username: str
+    is_admin: bool
+    expira_em: datetime
+    token_hash: str
+    # Identificação do app cliente nas métricas: usuário e descrição do token
+    cliente: str = ''
+
+
+class CacheTokens:
+    """LRU de token_hash -> Principal com prazo de revalidação no banco"""
+
+    def __init__(self, capacidade: int = 1024, revalidar_segundos: float = 60.0):
+        self.capacidade = capacidade
+        self.revalidar_segundos = revalidar_segundos
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, token_hash: str) -> Optional[Principal]:
+        with self._lock:
+            item = self._itens.get(token_hash)
+            if item is None:
+                return None
+            principal, validado_em = item
+            if (time.monotonic() - validado_em > self.revalidar_segundos
+                    or principal.expira_em <= datetime.now()):
+                del self._itens[token_hash]
+                return None
+            self._itens.move_to_end(token_hash)
+            return principal
+
+    def guardar(self, principal: Principal):
+        with self._lock:
+            self._itens[principal.token_hash] = (principal, time.monotonic())
+            self._itens.move_to_end(principal.token_hash)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def remover(self, token_hash: str):
+        with self._lock:
+            self._itens.pop(token_hash, None)
+
+    def __len__(self):
+        return len(self._itens)
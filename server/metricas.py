@@ -0,0 +1,278 @@
+"""
+Métricas do servidor de sincronização no formato de exposição do Prometheus
+
+Coleta em processo, sem dependências externas: cada métrica guarda seus
+valores por combinação de rótulos sob um lock próprio, e o texto é montado
+apenas quando GET /metrics é chamado.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Tuple
+
+
+# Clientes acompanhados no atraso de sincronização: os que não sincronizam há
+# mais de CLIENTE_EXPIRA_SEGUNDOS saem das métricas, e no máximo MAXIMO_CLIENTES
+# (os mais recentes) são mantidos
+MAXIMO_CLIENTES = 256
+CLIENTE_EXPIRA_SEGUNDOS = 7 * 24 * 3600
+
+# Faixas (segundos) dos histogramas de latência
+FAIXAS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes: Tuple[str, ...], valores: Tuple, extra: str = '') -> str:
+    partes = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        partes.append(extra)
+    return '{' + ','.join(partes) + '}' if partes else ''
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = ''
+
+    def __init__(self, nome: str, descricao: str, rotulos: Iterable[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos: dict) -> tuple:
+        return tuple(rotulos.get(nome, '') for nome in self.rotulos)
+
+    def cabecalho(self) -> list:
+        return [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} {self.tipo}']
+
+
+class _MetricaSimples(_Metrica):
+    """Um valor por combinação de rótulos, opcionalmente lido de uma função na coleta"""
+
+    def __init__(self, nome: str, descricao: str, rotulos: Iterable[str] = (),
+                 funcao: Callable[[], Dict[tuple, float]] = None):
+        super().__init__(nome, descricao, rotulos)
+        # funcao() retorna {tupla de rótulos: valor}
+        self.funcao = funcao
+
+    def inc(self, valor: float = 1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valor(self, **rotulos) -> float:
+        return self._valores.get(self._chave(rotulos), 0)
+
+    def exposicao(self) -> list:
+        if self.funcao is not None:
+            itens = list(self.funcao().items())
+        else:
+            with self._lock:
+                itens = list(self._valores.items())
+        return self.cabecalho() + [
+            f'{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(valor)}'
+            for chave, valor in itens
+        ]
+
+
+class Contador(_MetricaSimples):
+    """Valor que só cresce (requisições, bytes recebidos...)"""
+    tipo = 'counter'
+
+
+class Medidor(_MetricaSimples):
+    """Valor instantâneo (conexões em uso, atraso de sincronização...)"""
+    tipo = 'gauge'
+
+    def dec(self, valor: float = 1, **rotulos):
+        self.inc(-valor, **rotulos)
+
+    def definir(self, valor: float, **rotulos):
+        with self._lock:
+            self._valores[self._chave(rotulos)] = valor
+
+
+class Histograma(_Metrica):
+    """Distribuição de observações em faixas cumulativas (_bucket, _sum, _count)"""
+    tipo = 'histogram'
+
+    def __init__(self, nome: str, descricao: str, rotulos: Iterable[str] = (),
+                 faixas: Iterable[float] = FAIXAS_DURACAO):
+        super().__init__(nome, descricao, rotulos)
+        self.faixas = tuple(sorted(faixas)) + (float('inf'),)
+
+    def observar(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            dados = self._valores.get(chave)
+            if dados is None:
+                dados = self._valores[chave] = [[0] * len(self.faixas), 0.0, 0]
+            for i, limite in enumerate(self.faixas):
+                if valor <= limite:
+                    dados[0][i] += 1
+                    break
+            dados[1] += valor
+            dados[2] += 1
+
+    def contagem(self, **rotulos) -> int:
+        dados = self._valores.get(self._chave(rotulos))
+        return dados[2] if dados else 0
+
+    def exposicao(self) -> list:
+        with self._lock:
+            itens = [(chave, list(d[0]), d[1], d[2]) for chave, d in self._valores.items()]
+        linhas = self.cabecalho()
+        for chave, contagens, soma, total in itens:
+            acumulado = 0
+            for limite, quantidade in zip(self.faixas, contagens):
+                acumulado += quantidade
+                rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{_formatar_numero(limite)}"')
+                linhas.append(f'{self.nome}_bucket{rotulos} {acumulado}')
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            linhas.append(f'{self.nome}_sum{rotulos} {_formatar_numero(soma)}')
+            linhas.append(f'{self.nome}_count{rotulos} {total}')
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas expostas por um processo"""
+
+    def __init__(self):
+        self.metricas = []
+
+    def _adicionar(self, metrica):
+        self.metricas.append(metrica)
+        return metrica
+
+    def contador(self, *args, **kwargs) -> Contador:
+        return self._adicionar(Contador(*args, **kwargs))
+
+    def medidor(self, *args, **kwargs) -> Medidor:
+        return self._adicionar(Medidor(*args, **kwargs))
+
+    def histograma(self, *args, **kwargs) -> Histograma:
+        return self._adicionar(Histograma(*args, **kwargs))
+
+    def exposicao(self) -> str:
+        """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)"""
+        linhas = []
+        for metrica in self.metricas:
+            linhas.extend(metrica.exposicao())
+        return '\n'.join(linhas) + '\n'
+
+
+class MetricasSincronizacao:
+    """Métricas do servidor de sincronização (uma instância por app)"""
+
+    def __init__(self, engine=None):
+        self.registro = RegistroMetricas()
+        registro = self.registro
+
+        self.requisicoes = registro.contador(
+            'abrolhos_http_requisicoes_total', 'Requisições atendidas', ('metodo', 'rota', 'status'))
+        self.duracao_requisicoes = registro.histograma(
+            'abrolhos_http_duracao_segundos', 'Duração das requisições', ('metodo', 'rota'))
+        self.em_andamento = registro.medidor(
+            'abrolhos_http_requisicoes_em_andamento', 'Requisições sendo processadas')
+
+        self.upload_bytes = registro.contador(
+            'abrolhos_upload_bytes_total', 'Bytes recebidos em documentos', ('tipo',))
+        self.upload_duracao = registro.histograma(
+            'abrolhos_upload_duracao_segundos', 'Tempo de gravação dos documentos recebidos', ('tipo',))
+        self.upload_tamanho = registro.histograma(
+            'abrolhos_upload_tamanho_bytes', 'Tamanho dos documentos recebidos', ('tipo',),
+            faixas=(10_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 50_000_000))
+
+        self.lote_tamanho = registro.histograma(
+            'abrolhos_lote_registros', 'Registros por requisição de /registros/lote', (),
+            faixas=(1, 10, 50, 100, 500, 1000, 5000, 10000))
+        self.registros_recebidos = registro.contador(
+            'abrolhos_registros_recebidos_total', 'Registros de visita recebidos', ('cliente',))
+
+        # Sincronização por cliente autenticado (ver registrar_sincronizacao)
+        self._ultima_sincronizacao = OrderedDict()
+        self._lock_clientes = threading.Lock()
+        registro.medidor(
+            'abrolhos_sync_ultimo_contato_timestamp_segundos',
+            'Momento (epoch) da última sincronização bem-sucedida do cliente', ('cliente',),
+            funcao=lambda: {(c,): t for c, t in self._clientes()})
+        registro.medidor(
+            'abrolhos_sync_atraso_segundos', 'Segundos desde a última sincronização do cliente',
+            ('cliente',), funcao=self._atrasos)
+
+        if engine is not None:
+            self._registrar_pool(engine)
+        self._registrar_monitor_sql()
+
+    def _registrar_pool(self, engine):
+        pool = engine.pool
+
+        def leitura(atributo):
+            def ler():
+                funcao = getattr(pool, atributo, None)
+                # overflow() fica negativo enquanto o pool não está cheio
+                return {(): max(0, funcao())} if callable(funcao) else {}
+            return ler
+
+        self.registro.medidor('abrolhos_db_pool_tamanho', 'Tamanho configurado do pool',
+                              funcao=leitura('size'))
+        self.registro.medidor('abrolhos_db_pool_em_uso', 'Conexões emprestadas pelo pool',
+                              funcao=leitura('checkedout'))
+        self.registro.medidor('abrolhos_db_pool_ociosas', 'Conexões disponíveis no pool',
+                              funcao=leitura('checkedin'))
+        self.registro.medidor('abrolhos_db_pool_excedentes', 'Conexões além do tamanho do pool',
+                              funcao=leitura('overflow'))
+
+    def _registrar_monitor_sql(self):
+        """Consultas por operação do monitor SQL (vazias se ele não estiver ativo)"""
+        from models.instrumentacao import MONITOR_SQL
+
+        def ler(campo, escala=1):
+            def funcao():
+                operacoes = MONITOR_SQL.resumo()['operacoes'] if MONITOR_SQL.ativo else {}
+                return {(nome,): dados[campo] * escala for nome, dados in operacoes.items()}
+            return funcao
+
+        self.registro.contador('abrolhos_sql_consultas_total', 'Consultas SQL por operação',
+                               ('operacao',), funcao=ler('consultas'))
+        self.registro.contador('abrolhos_sql_duracao_segundos_total', 'Tempo em consultas SQL por operação',
+                               ('operacao',), funcao=ler('tempo_sql_ms', 0.001))
+
+    # --- Clientes ---------------------------------------------------------
+
+    def registrar_sincronizacao(self, cliente: str):
+        """
+        Anota uma sincronização bem-sucedida (envio de registros ou documentos,
+        leitura de preços) do cliente autenticado
+        """
+        if not cliente:
+            return
+        with self._lock_clientes:
+            self._ultima_sincronizacao[cliente] = time.time()
+            self._ultima_sincronizacao.move_to_end(cliente)
+            while len(self._ultima_sincronizacao) > MAXIMO_CLIENTES:
+                self._ultima_sincronizacao.popitem(last=False)
+
+    def _clientes(self) -> list:
+        limite = time.time() - CLIENTE_EXPIRA_SEGUNDOS
+        with self._lock_clientes:
+            # Ordenado da sincronização mais antiga para a mais recente
+            while self._ultima_sincronizacao and next(iter(self._ultima_sincronizacao.values())) < limite:
+                self._ultima_sincronizacao.popitem(last=False)
+            return list(self._ultima_sincronizacao.items())
+
+    def _atrasos(self) -> dict:
+        agora = time.time()
+        return {(cliente,): agora - momento for cliente, momento in self._clientes()}
+
+    def exposicao(self) -> str:
+        return self.registro.exposicao()
@@ -0,0 +1,144 @@
+"""
+Canal de notificações de alterações (Server-Sent Events)
+
+Os endpoints que gravam registros anotam na sessão o que alteraram; depois do
+commit, get_session publica uma notificação compacta por tabela (ids, período
+das datas e versão da tabela antes/depois, ver versoes_tabelas). Os apps
+desktop conectados a GET /eventos recebem a notificação e atualizam apenas as
+linhas e totais afetados, sem recarregar as abas.
+
+Cada assinante tem uma fila limitada. Um assinante que não acompanha o ritmo
+(ou que se reconecta com um Last-Event-ID fora do histórico) recebe o evento
+`ressincronizar` e deve recarregar os dados pelo caminho normal (F5).
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from models.services import VersaoTabelaService
+
+
+class Assinatura:
+    """Fila de eventos de uma conexão SSE (consumida no event loop do servidor)"""
+
+    def __init__(self, capacidade: int):
+        self._loop = asyncio.get_running_loop()
+        self._fila = asyncio.Queue(maxsize=capacidade)
+
+    def entregar(self, evento: dict):
+        """Chamado de qualquer thread"""
+        self._loop.call_soon_threadsafe(self._colocar, evento)
+
+    def _colocar(self, evento: dict):
+        try:
+            self._fila.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente atrasado: descarta a fila e pede que recarregue tudo
+            while not self._fila.empty():
+                self._fila.get_nowait()
+            self._fila.put_nowait({'id': evento['id'], 'tipo': 'ressincronizar'})
+
+    async def proximo(self, timeout: float) -> Optional[dict]:
+        """Próximo evento, ou None após `timeout` segundos sem eventos"""
+        try:
+            return await asyncio.wait_for(self._fila.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class CanalAlteracoes:
+    """Publica notificações de alteração para as conexões abertas em /eventos"""
+
+    def __init__(self, historico: int = 256, capacidade_fila: int = 100):
+        self.capacidade_fila = capacidade_fila
+        self._historico = deque(maxlen=historico)
+        self._assinantes = set()
+        # Ids crescentes também entre reinícios do servidor: a reconexão com um
+        # id de antes do reinício não encontra continuidade e ressincroniza
+        self._ultimo_id = int(time.time() * 1000)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._assinantes)
+
+    # --- Endpoints (thread da requisição) -----------------------------------
+
+    @staticmethod
+    def anotar(session: Session, tabela: str, acao: str, registros: list):
+        """Anota na sessão as linhas gravadas; publicadas só após o commit"""
+        if registros:
+            session.info.setdefault('notificacoes', []).append((tabela, acao, registros))
+
+    @staticmethod
+    def preparar(session: Session) -> List[dict]:
+        """
+        Monta as notificações anotadas na sessão (antes do commit, para ler a
+        versão da tabela na mesma transação das gravações)
+        """
+        anotacoes = session.info.pop('notificacoes', [])
+        if not anotacoes:
+            return []
+        session.flush()
+        versoes = VersaoTabelaService.versoes(session)
+        eventos = []
+        for tabela, acao, registros in anotacoes:
+            datas = [r.data for r in registros]
+            versao = versoes.get(tabela, 0)
+            eventos.append({
+                'tipo': 'alteracao',
+                'tabela': tabela,
+                'acao': acao,
+                'ids': [r.id for r in registros],
+                'data_inicio': min(datas).isoformat(),
+                'data_fim': max(datas).isoformat(),
+                # Uma linha inserida incrementa a versão uma vez: se o cliente
+                # estava em `antes`, esta notificação é a única diferença
+                'versao': [versao - len(registros), versao],
+            })
+        return eventos
+
+    def publicar(self, eventos: List[dict]):
+        if not eventos:
+            return
+        with self._lock:
+            for evento in eventos:
+                self._ultimo_id += 1
+                evento['id'] = self._ultimo_id
+                self._historico.append(evento)
+            assinantes = list(self._assinantes)
+        for evento in eventos:
+            for assinante in assinantes:
+                assinante.entregar(evento)
+
+    # --- Conexões SSE (event loop) ------------------------------------------
+
+    def assinar(self, ultimo_id: Optional[int] = None) -> Assinatura:
+        """
+        Nova assinatura; com `ultimo_id` (cabeçalho Last-Event-ID da reconexão)
+        os eventos perdidos são reenviados a partir do histórico
+        """
+        assinatura = Assinatura(self.capacidade_fila)
+        with self._lock:
+            self._assinantes.add(assinatura)
+            if ultimo_id is not None and ultimo_id != self._ultimo_id:
+                perdidos = [e for e in self._historico if e['id'] > ultimo_id]
+                if not perdidos or perdidos[0]['id'] != ultimo_id + 1:
+                    perdidos = [{'id': self._ultimo_id, 'tipo': 'ressincronizar'}]
+                for evento in perdidos:
+                    assinatura._colocar(evento)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura):
+        with self._lock:
+            self._assinantes.discard(assinatura)
+
+
+def formatar_evento(evento: dict) -> str:
+    """Evento no formato text/event-stream"""
+    dados = {chave: valor for chave, valor in evento.items() if chave not in ('id', 'tipo')}
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(dados)}\n\n"
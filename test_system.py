@@ -193,6 +193,417 @@ def test_calculation():
         return False
 
 
+def test_calculo_lote():
+    """Testa o cálculo vetorizado (MotorPrecos.calcular_lote) contra o cálculo unitário"""
+    print("\n=== Testando Cálculo em Lote ===")
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("- numpy não instalado (cálculo em lote indisponível)")
+        return True
+
+    from models.precificacao import MotorPrecos
+
+    precos = {'valor_estrangeiro': 100.0, 'valor_mercosul': 75.0, 'valor_brasileiro': 50.0,
+              'valor_entorno': 10.0, 'valor_isento': 0.0, 'valor_fundeio_ate8': 20.0,
+              'valor_fundeio_8a15': 40.0, 'valor_fundeio_acima15': 80.0}
+    # A primeira tabela que cobre o ano prevalece; 2022 fica sem tabela
+    tabelas = [
+        dict(precos, id=1, ano_inicio=2025, ano_fim=None),
+        dict(precos, id=2, ano_inicio=2023, ano_fim=2024, valor_brasileiro=40.0, valor_fundeio_8a15=None),
+        dict(precos, id=3, ano_inicio=2024, ano_fim=2024, valor_brasileiro=999.0),
+    ]
+    linhas = [
+        (date(2025, 1, 15), {'qtde_estrangeiros': 2, 'qtde_isentos': 1}, 1, 7.9),
+        (date(2025, 6, 1), {'qtde_brasileiros': 3, 'qtde_mercosul': 1}, 2, 8.0),
+        (date(2024, 3, 10), {'qtde_brasileiros': 1, 'qtde_entorno': 4}, 3, 15.0),
+        (date(2023, 12, 31), {'qtde_mercosul': 2}, 1, 15.1),
+        (date(2022, 5, 5), {'qtde_estrangeiros': 1}, 1, 10.0),
+        (date(2025, 2, 2), {'qtde_entorno': 1}, 2, None),
+    ]
+
+    resultado = MotorPrecos.calcular_lote(
+        tabelas,
+        [data for data, _, _, _ in linhas],
+        {coluna: [q.get(coluna, 0) for _, q, _, _ in linhas]
+         for coluna in ('qtde_estrangeiros', 'qtde_mercosul', 'qtde_brasileiros',
+                        'qtde_entorno', 'qtde_isentos')},
+        permanencias=[p for _, _, p, _ in linhas],
+        comprimentos=[float('nan') if c is None else c for _, _, _, c in linhas],
+    )
+    for i, (data, quantidades, permanencia, comprimento) in enumerate(linhas):
+        esperado = MotorPrecos.calcular_registro(
+            MotorPrecos.tabela_vigente(tabelas, data), quantidades, permanencia, comprimento
+        )
+        obtido = {chave: resultado[chave][i] for chave in esperado}
+        assert obtido == esperado, (data, obtido, esperado)
+    print(f"✓ {len(linhas)} registros idênticos ao cálculo unitário (faixas de fundeio, "
+          "tabelas sobrepostas, ano sem tabela)")
+
+    return True
+
+
+def test_arquivamento():
+    """Testa o arquivamento de temporadas: consultas iguais antes e depois (união com o arquivo)"""
+    print("\n=== Testando Arquivamento de Temporadas ===")
+
+    import os
+    import tempfile
+    from models.database import init_db, RegistroVisita
+    from models.arquivamento import ArquivamentoService, anos_arquivados, caminho_arquivo, fonte_registros
+    from models.services import (EmpresaService, EmbarcacaoService, EstatisticaService,
+                                 RegistroVisitaService, RelatorioService)
+
+    ano = date.today().year
+    inicio, fim = date(ano - 2, 1, 1), date(ano, 12, 31)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, 'arquivamento.db')
+        engine, SessionLocal = init_db(db_path)
+        session = SessionLocal()
+        empresa = EmpresaService.criar(session, 'Empresa Arquivo')
+        barco = EmbarcacaoService.criar(session, empresa.id, 'Barco Arquivo', 'Lancha')
+        RegistroVisitaService.criar_em_lote(session, [
+            {'data': data, 'empresa_id': empresa.id, 'embarcacao_id': barco.id, 'permanencia': 1,
+             'qtde_brasileiros': qtde, 'cod_registro': cod}
+            for data, qtde, cod in ((date(ano, 1, 1), 5, None), (date(ano - 2, 3, 1), 4, 'ARQ-1'),
+                                    (date(ano - 2, 12, 31), 2, None))
+        ])
+
+        def consultas():
+            return (
+                sorted((r.id, r.data, r.qtde_brasileiros)
+                       for r in RegistroVisitaService.listar_por_periodo(session, inicio, fim)),
+                EstatisticaService.serie_temporal(session, inicio, fim, 'mes'),
+                EstatisticaService.rankings(session, inicio, fim),
+                RelatorioService.dados_exportacao(session, inicio, fim),
+            )
+
+        antes = consultas()
+        id_arquivado = antes[0][1][0]
+
+        try:
+            ArquivamentoService.arquivar(session, [ano])
+            print("✗ Temporada atual aceita para arquivamento")
+            return False
+        except ValueError:
+            print("✓ Temporada atual recusada")
+
+        movidos = ArquivamentoService.arquivar(session, [ano - 2])
+        assert movidos == {ano - 2: 2}, movidos
+        assert os.path.exists(caminho_arquivo(db_path))
+        assert anos_arquivados(session) == [ano - 2]
+        assert session.query(RegistroVisita).count() == 1
+        print("✓ 2 registros movidos para o banco de arquivo")
+
+        assert consultas() == antes
+        assert RegistroVisitaService.buscar_por_id(session, id_arquivado).cod_registro == 'ARQ-1'
+        print("✓ Listagem, série, rankings e relatório iguais aos de antes do arquivamento")
+
+        # Períodos sem anos arquivados continuam lendo só a tabela principal
+        assert fonte_registros(session, date(ano, 1, 1), fim) is RegistroVisita
+
+        # Sem registros acima dos arquivados, um novo registro não reutiliza os ids deles
+        RegistroVisitaService.deletar(session, antes[0][0][0])
+        novo = RegistroVisitaService.criar_em_lote(session, [
+            {'data': date(ano, 2, 1), 'empresa_id': empresa.id, 'embarcacao_id': barco.id,
+             'permanencia': 1, 'qtde_isentos': 1},
+        ])[0]
+        assert novo.id > max(id_ for id_, _, _ in antes[0]), novo.id
+        assert RegistroVisitaService.buscar_por_id(session, id_arquivado).cod_registro == 'ARQ-1'
+        arquivados = sorted(r.id for r in RegistroVisitaService.listar_por_periodo(
+            session, date(ano - 2, 1, 1), date(ano - 2, 12, 31)))
+        assert arquivados == [id_ for id_, data, _ in antes[0] if data.year == ano - 2], arquivados
+        session.close()
+        engine.dispose()
+        print("✓ Períodos sem temporadas arquivadas consultam apenas o banco principal")
+        print("✓ Ids arquivados não são reutilizados por registros novos")
+
+        # Backups completo e incremental levam o banco de arquivo, restaurado junto
+        import sqlite3
+        from models.backup import BackupBanco, BackupIncremental, restaurar
+        incremental = BackupIncremental(os.path.join(pasta, 'backups')).executar(db_path, pausa=0)
+        for origem, destino in (
+            (BackupBanco.executar(db_path, os.path.join(pasta, 'backup.db.gz'), 'gzip', pausa=0)['arquivo'],
+             os.path.join(pasta, 'restaurado.db')),
+            (incremental['manifesto'], os.path.join(pasta, 'restaurado_inc.db')),
+        ):
+            restaurado = restaurar(origem, destino)
+            conexao = sqlite3.connect(restaurado['arquivo_temporadas'])
+            try:
+                assert conexao.execute('SELECT count(*) FROM registros_visita').fetchone()[0] == 2
+            finally:
+                conexao.close()
+        print("✓ Backups incluem as temporadas arquivadas")
+
+    return True
+
+
+def test_backup_incremental():
+    """Testa a cadeia de backups incrementais e a restauração de cada ponto"""
+    print("\n=== Testando Backup Incremental ===")
+
+    import gzip
+    import os
+    import sqlite3
+    import tempfile
+    from models.backup import BackupIncremental, restaurar
+    from models.database import init_db
+    from models.services import EmpresaService
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, 'backup.db')
+        engine, SessionLocal = init_db(db_path)
+        session = SessionLocal()
+        backups = BackupIncremental(os.path.join(pasta, 'backups'))
+
+        def empresas(caminho):
+            conexao = sqlite3.connect(caminho)
+            try:
+                return [nome for nome, in conexao.execute('SELECT nome FROM empresas ORDER BY id')]
+            finally:
+                conexao.close()
+
+        pontos = []
+        for i in range(3):
+            EmpresaService.criar(session, f'Empresa Backup {i}')
+            resultado = backups.executar(db_path, pausa=0)
+            pontos.append((resultado, empresas(db_path)))
+        session.close()
+        engine.dispose()
+
+        tipos = [resultado['tipo'] for resultado, _ in pontos]
+        assert tipos == ['completo', 'incremental', 'incremental'], tipos
+        assert all(r['paginas_gravadas'] < r['total_paginas'] for r, _ in pontos[1:]), pontos
+        print("✓ Backups seguintes gravam só as páginas alteradas")
+
+        for i, (resultado, esperado) in enumerate(pontos):
+            destino = os.path.join(pasta, f'restaurado_{i}.db')
+            restaurado = restaurar(resultado['manifesto'], destino)
+            assert restaurado['backups_aplicados'] == i + 1 and restaurado['integridade'] == 'ok', restaurado
+            assert empresas(destino) == esperado, (i, empresas(destino))
+        print("✓ Cada ponto da cadeia restaurado com o conteúdo da época")
+
+        # Página adulterada em um incremental: o resumo do banco não confere
+        paginas = pontos[1][0]['manifesto'][:-len('.json')] + '.paginas.gz'
+        with gzip.open(paginas, 'rb') as f:
+            dados = bytearray(f.read())
+        dados[-1] ^= 0xFF
+        with gzip.open(paginas, 'wb') as f:
+            f.write(dados)
+        destino = os.path.join(pasta, 'adulterado.db')
+        try:
+            restaurar(pontos[1][0]['manifesto'], destino)
+            print("✗ Cadeia adulterada restaurada sem erro")
+            return False
+        except RuntimeError:
+            assert not os.path.exists(destino)
+            print("✓ Cadeia adulterada recusada sem criar o banco de destino")
+
+    return True
+
+
+def test_busca():
+    """Testa a busca global (FTS5 com prefixos, sem acentos) e a alternativa com LIKE"""
+    print("\n=== Testando Busca ===")
+
+    import os
+    import tempfile
+    from models.busca import BuscaService, consulta_fts
+    from models.database import init_db
+    from models.services import EmpresaService, EmbarcacaoService, RegistroVisitaService
+
+    assert consulta_fts('São Jo') == '"São"* "Jo"*'
+    assert consulta_fts('" OR x*') == '"OR"* "x"*'
+    assert consulta_fts(' -- ') is None
+    print("✓ Termos convertidos em prefixos, sem operadores do FTS5")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        engine, SessionLocal = init_db(os.path.join(pasta, 'busca.db'))
+        session = SessionLocal()
+        empresa = EmpresaService.criar(session, 'São José Turismo', cnpj='12.345.678/0001-90')
+        inativa = EmpresaService.criar(session, 'São João Passeios')
+        EmpresaService.desativar(session, inativa.id)
+        barco = EmbarcacaoService.criar(session, empresa.id, 'Netuno', 'Escuna', inscricao='ABC-123')
+        registro, = RegistroVisitaService.criar_em_lote(session, [
+            {'data': date(2025, 1, 15), 'empresa_id': empresa.id, 'embarcacao_id': barco.id,
+             'permanencia': 1, 'qtde_brasileiros': 2, 'observacao': 'Passeio até a Ilha Siriba'},
+        ])
+
+        def encontrados(texto, buscar=BuscaService.buscar):
+            return sorted((r.tipo, r.id) for r in buscar(session, texto, 20))
+
+        if not BuscaService.disponivel(session):
+            print("- SQLite sem FTS5: apenas a busca com LIKE")
+        else:
+            assert encontrados('sao jo') == [('empresa', empresa.id)], encontrados('sao jo')
+            assert encontrados('abc') == [('embarcacao', barco.id)]
+            registros = BuscaService.buscar(session, 'ilha sir', 20)
+            assert [r.tipo for r in registros] == ['registro'] and registros[0].data == date(2025, 1, 15)
+            print("✓ Empresa, embarcação e registro encontrados por prefixo, sem acentos")
+
+            EmpresaService.atualizar(session, empresa.id, nome='Abrolhos Turismo')
+            assert encontrados('sao jose') == [] and encontrados('abrolhos') == [('empresa', empresa.id)]
+            print("✓ Índice atualizado pelos gatilhos ao renomear")
+
+        # Alternativa sem FTS5: mesmos itens, sem ordenação por relevância
+        assert encontrados('turismo', BuscaService._buscar_like) == [('empresa', empresa.id)]
+        assert encontrados('siriba', BuscaService._buscar_like) == [('registro', registro.id)]
+        session.close()
+        engine.dispose()
+        print("✓ Busca com LIKE encontra os mesmos itens")
+
+    return True
+
+
+def test_resolucao_nomes():
+    """Testa a resolução de nomes da importação de CSV (exatos, aproximados e numerados)"""
+    print("\n=== Testando Resolução de Nomes ===")
+
+    from utils.resolucao_nomes import IndiceNomes
+
+    indice = IndiceNomes([
+        ('Apecatu Expedições', 1), ('Barco Push', 2),
+        ('Pegasus I', 3), ('Siriba II', 4), ('Rafaela 3R', 5),
+    ])
+
+    resolucao = indice.resolver('  apecatu expedicoes. ')
+    assert resolucao.item == 1 and not resolucao.aproximado, resolucao
+    print("✓ Nome sem acentos/pontuação resolvido")
+
+    resolucao = indice.resolver('Barco Pusj')
+    assert resolucao.item == 2 and resolucao.aproximado, resolucao
+    print("✓ Nome com erro de digitação aceito como aproximação")
+
+    # Numeração diferente é outra embarcação: só sugestão, nunca aceite automático
+    for digitado, cadastrado in (('Pegasus II', 'Pegasus I'), ('Siriba I', 'Siriba II'),
+                                 ('Rafaela 2R', 'Rafaela 3R')):
+        resolucao = indice.resolver(digitado)
+        assert resolucao.item is None and cadastrado in resolucao.sugestoes, (digitado, resolucao)
+    print("✓ Nomes com numeração diferente enviados para resolução manual")
+
+    return True
+
+
+def test_exportacao_parquet():
+    """Testa a exportação em Parquet com atributos opcionais vazios (empresa sem CNPJ)"""
+    print("\n=== Testando Exportação Parquet ===")
+
+    try:
+        import pyarrow.dataset as ds
+    except ImportError:
+        print("- pyarrow não instalado (exportação Parquet é opcional)")
+        return True
+
+    import os
+    import tempfile
+    from models.database import init_db
+    from models.services import EmpresaService, EmbarcacaoService, RegistroVisitaService
+    from models.exportacao_parquet import ExportacaoParquet
+
+    with tempfile.TemporaryDirectory() as pasta:
+        engine, SessionLocal = init_db(os.path.join(pasta, 'origem.db'))
+        session = SessionLocal()
+        empresa = EmpresaService.criar(session, 'Empresa Sem CNPJ')
+        barco = EmbarcacaoService.criar(session, empresa.id, 'Barco Teste', 'Lancha', comprimento_m=8.0)
+        RegistroVisitaService.criar_em_lote(session, [
+            {'data': date(2025, 1, 15), 'empresa_id': empresa.id, 'embarcacao_id': barco.id,
+             'permanencia': 1, 'qtde_brasileiros': 3},
+        ])
+
+        destino = os.path.join(pasta, 'parquet')
+        resultado = ExportacaoParquet.exportar(session, destino, date(2025, 1, 1), date(2025, 12, 31))
+        session.close()
+        engine.dispose()
+
+        linhas = ds.dataset(destino, partitioning='hive').to_table().to_pylist()
+        assert resultado['linhas'] == 1 and len(linhas) == 1, resultado
+        assert linhas[0]['empresa'] == 'Empresa Sem CNPJ' and linhas[0]['empresa_cnpj'] is None, linhas[0]
+        assert (linhas[0]['ano'], linhas[0]['mes']) == (2025, 1), linhas[0]
+        print("✓ Empresa sem CNPJ exportada (CNPJ nulo)")
+
+        # Migração para um banco com registros: o id 1 já existe e nada é perdido
+        engine, SessionLocal = init_db(os.path.join(pasta, 'destino.db'))
+        session = SessionLocal()
+        outra = EmpresaService.criar(session, 'Outra Empresa')
+        outro_barco = EmbarcacaoService.criar(session, outra.id, 'Outro Barco', 'Escuna')
+        RegistroVisitaService.criar_em_lote(session, [
+            {'data': date(2025, 2, 1), 'empresa_id': outra.id, 'embarcacao_id': outro_barco.id,
+             'permanencia': 1, 'qtde_isentos': 1},
+        ])
+        try:
+            ExportacaoParquet.importar(session, destino, manter_ids=True)
+            print("✗ Importação com ids originais aceita em banco com registros")
+            return False
+        except ValueError:
+            print("✓ Ids originais recusados em banco com registros")
+        resultado = ExportacaoParquet.importar(session, destino)
+        registros = RegistroVisitaService.listar_por_periodo(session, date(2025, 1, 1), date(2025, 12, 31))
+        assert resultado['inseridos'] == 1 and len(registros) == 2, (resultado, registros)
+        assert resultado['empresas_criadas'] == 1, resultado
+        session.close()
+        engine.dispose()
+        print("✓ Migração com novos ids preserva os registros existentes")
+
+    return True
+
+
+# Módulos carregados na abertura do app (main.py e as abas criadas por MainWindow)
+MODULOS_INICIALIZACAO = [
+    'views.login_dialog', 'views.main_window', 'views.dashboard_tab', 'views.empresas_tab',
+    'views.embarcacoes_tab', 'views.precos_tab', 'views.registros_tab',
+    'views.relatorios_tab', 'views.usuarios_tab',
+]
+
+# Dependências pesadas que só devem ser carregadas no primeiro uso
+IMPORTACOES_ADIADAS = ['pandas', 'numpy', 'openpyxl', 'selenium', 'webdriver_manager']
+
+
+def test_startup_imports():
+    """Testa o custo de importação da inicialização (python -X importtime)"""
+    print("\n=== Testando Importações da Inicialização ===")
+    
+    import os
+    import subprocess
+    
+    # Orçamento total (ms) das importações da inicialização; ajustável por máquina
+    orcamento_ms = float(os.getenv('ABROLHOS_ORCAMENTO_IMPORTACAO_MS', '1500'))
+    
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(MODULOS_INICIALIZACAO)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    )
+    assert resultado.returncode == 0, resultado.stderr[-2000:]
+    
+    # Linhas "import time: <própria> | <acumulada> | <módulo>", indentadas por nível
+    modulos = {}
+    total_us = 0
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        modulos[nome.strip()] = int(acumulado)
+        if not nome.startswith('  '):
+            total_us += int(acumulado)
+    
+    carregadas = [m for m in IMPORTACOES_ADIADAS if m in modulos]
+    assert not carregadas, f"Dependências pesadas importadas na inicialização: {', '.join(carregadas)}"
+    print("✓ Dependências pesadas adiadas")
+    
+    maiores = sorted(
+        ((us, nome) for nome, us in modulos.items() if nome in MODULOS_INICIALIZACAO), reverse=True
+    )[:3]
+    print(f"✓ Importações da inicialização: {total_us / 1000:.0f} ms (orçamento {orcamento_ms:.0f} ms); "
+          f"maiores: {', '.join(f'{nome} {us / 1000:.0f} ms' for us, nome in maiores)}")
+    assert total_us / 1000 <= orcamento_ms, (
+        f"Importações da inicialização levaram {total_us / 1000:.0f} ms (orçamento {orcamento_ms:.0f} ms)"
+    )
+    
+    return True
+
+
 def main():
     """Executa todos os testes"""
     print("╔═══════════════════════════════════════════╗")
@@ -204,6 +615,13 @@ def main():
         ("Banco de Dados", test_database),
         ("Validadores", test_validators),
         ("Cálculo de Valores", test_calculation),
+        ("Cálculo em Lote", test_calculo_lote),
+        ("Arquivamento de Temporadas", test_arquivamento),
+        ("Backup Incremental", test_backup_incremental),
+        ("Busca", test_busca),
+        ("Importações da Inicialização", test_startup_imports),
+        ("Resolução de Nomes", test_resolucao_nomes),
+        ("Exportação Parquet", test_exportacao_parquet),
     ]
     
     results = []
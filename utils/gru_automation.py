@@ -2,13 +2,6 @@ import time
 import os
 from datetime import date, datetime
 from typing import Dict, Any, Optional
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 
 class GRUAutomation:
     """Automatiza o preenchimento da GRU no portal PagTesouro"""
@@ -29,6 +22,15 @@ class GRUAutomation:
         - valor: float
         - download_dir: str (opcional)
         """
+        # Selenium é importado só aqui para não pesar na inicialização do app
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from webdriver_manager.chrome import ChromeDriverManager
+
         def log(msg):
             print(msg)
             if log_callback:
@@ -0,0 +1,203 @@
+"""
+Leitura e validação de registros de visita a partir de arquivos CSV
+"""
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from models.referencias import CACHE_REFERENCIAS
+from utils.resolucao_nomes import IndiceNomes, Resolucao
+
+# Colunas de quantidade opcionais no CSV (ausentes ou vazias contam 0)
+COLUNAS_QUANTIDADE_CSV = ['qtde_estrangeiros', 'qtde_mercosul', 'qtde_brasileiros', 'qtde_entorno', 'qtde_isentos']
+
+
+class ColunasFaltandoError(ValueError):
+    """O CSV não contém todas as colunas obrigatórias"""
+
+    def __init__(self, faltando: List[str], encontradas: List[str]):
+        super().__init__(f"Colunas faltando: {', '.join(faltando)}")
+        self.faltando = faltando
+        self.encontradas = encontradas
+
+
+class ImportadorCSV:
+    """Converte as linhas de um CSV em dicts prontos para RegistroVisitaService.criar_em_lote"""
+
+    # Mapeamento de colunas do CSV (minúsculas, sem espaços nas pontas) para colunas internas
+    COLUNAS_MAP = {
+        'data': 'data',
+        'empresa': 'empresa',
+        'embarcacao': 'embarcacao',  # ou embarcação
+        'embarcação': 'embarcacao',
+        'permanencia': 'permanencia',  # ou permanência
+        'permanência': 'permanencia',
+        'estrangeiros': 'qtde_estrangeiros',
+        'mercosul': 'qtde_mercosul',
+        'brasileiros': 'qtde_brasileiros',
+        'entorno': 'qtde_entorno',
+        'isentos': 'qtde_isentos'
+    }
+
+    COLUNAS_OBRIGATORIAS = ['data', 'empresa', 'embarcacao', 'permanencia']
+
+    @staticmethod
+    def ler_arquivo(caminho: str):
+        """Lê o CSV com pandas (importado aqui para não pesar na inicialização)"""
+        import pandas as pd
+        return pd.read_csv(caminho)
+
+    @staticmethod
+    def mapear_colunas(df) -> dict:
+        """
+        Normaliza os nomes das colunas do DataFrame e mapeia para as colunas internas
+
+        Raises:
+            ColunasFaltandoError: se faltar alguma coluna obrigatória
+        """
+        df.columns = df.columns.str.strip().str.lower()
+
+        colunas_encontradas = {}
+        for col_csv in df.columns:
+            if col_csv in ImportadorCSV.COLUNAS_MAP:
+                colunas_encontradas[ImportadorCSV.COLUNAS_MAP[col_csv]] = col_csv
+
+        faltando = [req for req in ImportadorCSV.COLUNAS_OBRIGATORIAS if req not in colunas_encontradas]
+        if faltando:
+            raise ColunasFaltandoError(faltando, list(df.columns))
+        return colunas_encontradas
+
+    @staticmethod
+    def _nao_encontrado(tipo: str, nome: str, sugestoes: List[str]) -> ValueError:
+        mensagem = f"{tipo} não encontrada: {nome}"
+        if sugestoes:
+            mensagem += f" (sugestões: {', '.join(sugestoes)})"
+        return ValueError(mensagem)
+
+    @staticmethod
+    def _resolucao(chave: tuple, resolucao: Resolucao, tipo: str, descricao: str) -> tuple:
+        """Linha da tabela de resoluções: (*chave, id, nome cadastrado, aproximado, erro)"""
+        item, aproximado, sugestoes = resolucao
+        if item is None:
+            return (*chave, None, None, False, str(ImportadorCSV._nao_encontrado(tipo, descricao, sugestoes)))
+        return (*chave, item.id, item.nome, aproximado, None)
+
+    @staticmethod
+    def _inteiros(df, coluna: Optional[str], padrao: int):
+        """Coluna numérica truncada para inteiro; vazios e textos inválidos viram `padrao`"""
+        import numpy as np
+        import pandas as pd
+
+        if coluna is None:
+            return pd.Series(padrao, index=df.index, dtype='int64')
+        valores = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+        return np.trunc(valores.where(np.isfinite(valores), padrao)).astype('int64')
+
+    @staticmethod
+    def preparar_registros(session: Session, df) -> dict:
+        """
+        Valida as linhas do CSV e resolve empresa/embarcação pelo nome
+
+        A validação é feita por colunas: datas e números são convertidos de
+        uma vez pelo pandas e cada nome distinto é resolvido uma única vez e
+        unido às linhas (merge). Os nomes são comparados sem acentos,
+        pontuação e maiúsculas; nomes muito parecidos com um único cadastrado
+        são aceitos e listados em aproximacoes (ver utils.resolucao_nomes).
+
+        Returns:
+            dict com registros (linhas válidas), erros (mensagens por linha),
+            aproximacoes (nomes resolvidos por semelhança), data_min e data_max
+
+        Raises:
+            ColunasFaltandoError: se faltar alguma coluna obrigatória
+        """
+        import pandas as pd
+
+        colunas_encontradas = ImportadorCSV.mapear_colunas(df)
+        referencias = CACHE_REFERENCIAS.obter(session)
+
+        # 1. Datas: DD/MM/AAAA ou AAAA-MM-DD
+        texto_data = df[colunas_encontradas['data']].astype(str)
+        datas = pd.to_datetime(texto_data, format='%d/%m/%Y', errors='coerce').fillna(
+            pd.to_datetime(texto_data, format='%Y-%m-%d', errors='coerce')
+        )
+
+        tabela = pd.DataFrame({
+            'linha': df.index + 2,  # +1 do header, +1 do índice 0-based
+            'data': datas,
+            'erro': ('Formato de data inválido: ' + texto_data + '. Use DD/MM/YYYY.').where(datas.isna()),
+            'empresa': df[colunas_encontradas['empresa']].astype(str).str.strip(),
+            'embarcacao': df[colunas_encontradas['embarcacao']].astype(str).str.strip(),
+            'permanencia': ImportadorCSV._inteiros(df, colunas_encontradas['permanencia'], 1),
+            **{
+                coluna: ImportadorCSV._inteiros(df, colunas_encontradas.get(coluna), 0)
+                for coluna in COLUNAS_QUANTIDADE_CSV
+            },
+        })
+
+        # 2. Empresas: cada nome distinto das linhas válidas é resolvido uma vez
+        indice_empresas = IndiceNomes((e.nome, e) for e in referencias.empresas.values())
+        valida = tabela['erro'].isna()
+        empresas = pd.DataFrame.from_records(
+            [ImportadorCSV._resolucao((nome,), indice_empresas.resolver(nome), 'Empresa', nome)
+             for nome in tabela.loc[valida, 'empresa'].unique()],
+            columns=['empresa', 'empresa_id', 'empresa_cadastrada', 'empresa_aproximada', 'erro_empresa']
+        )
+        tabela = tabela.merge(empresas, on='empresa', how='left')
+        tabela['empresa_aproximada'] = valida.to_numpy() & tabela['empresa_aproximada'].eq(True)
+        tabela['erro'] = tabela['erro'].fillna(tabela['erro_empresa'])
+
+        # 3. Embarcações, entre as da empresa encontrada (índices por empresa, sob demanda)
+        indices_embarcacoes = {}
+
+        def resolver_embarcacao(empresa_id, empresa_nome, nome):
+            indice = indices_embarcacoes.get(empresa_id)
+            if indice is None:
+                indice = indices_embarcacoes[empresa_id] = IndiceNomes(
+                    (b.nome, b) for b in referencias.embarcacoes_da_empresa(empresa_id, apenas_ativas=False)
+                )
+            return ImportadorCSV._resolucao((empresa_id, nome), indice.resolver(nome), 'Embarcação',
+                                            f"{nome} (empresa {empresa_nome})")
+
+        valida = tabela['erro'].isna()
+        pares = tabela.loc[valida, ['empresa_id', 'empresa_cadastrada', 'embarcacao']].drop_duplicates()
+        embarcacoes = pd.DataFrame.from_records(
+            [resolver_embarcacao(*par) for par in pares.itertuples(index=False)],
+            columns=['empresa_id', 'embarcacao', 'embarcacao_id', 'embarcacao_cadastrada',
+                     'embarcacao_aproximada', 'erro_embarcacao']
+        )
+        tabela = tabela.merge(embarcacoes.astype({'empresa_id': tabela['empresa_id'].dtype}),
+                              on=['empresa_id', 'embarcacao'], how='left')
+        tabela['embarcacao_aproximada'] = valida.to_numpy() & tabela['embarcacao_aproximada'].eq(True)
+        tabela['erro'] = tabela['erro'].fillna(tabela['erro_embarcacao'])
+
+        # 4. Linhas válidas, já tipadas, e mensagens das demais (na ordem do arquivo)
+        valida = tabela['erro'].isna()
+        validos = tabela.loc[valida, ['data', 'empresa_id', 'embarcacao_id', 'permanencia',
+                                      *COLUNAS_QUANTIDADE_CSV]]
+        validos = validos.astype({'empresa_id': 'int64', 'embarcacao_id': 'int64'})
+        validos['data'] = validos['data'].dt.date
+        invalidos = tabela.loc[~valida]
+        erros = [f"Linha {linha}: {erro}" for linha, erro in zip(invalidos['linha'], invalidos['erro'])]
+
+        # (primeira linha, tipo, mensagem) de cada nome resolvido por semelhança
+        aproximacoes = []
+        for ordem, (tipo, coluna) in enumerate((('Empresa', 'empresa'), ('Embarcação', 'embarcacao'))):
+            grupos = tabela[tabela[f'{coluna}_aproximada']].groupby(
+                [coluna, f'{coluna}_cadastrada'], sort=False
+            )['linha'].agg(['size', 'min'])
+            aproximacoes += [
+                (primeira, ordem, f"{tipo} '{digitado}' considerada '{cadastrado}' "
+                                  f"({quantidade} linha(s), a partir da linha {primeira})")
+                for (digitado, cadastrado), quantidade, primeira in zip(grupos.index, grupos['size'], grupos['min'])
+            ]
+
+        # Intervalo de datas lidas (inclusive de linhas recusadas por nome)
+        datas_lidas = tabela['data'].dropna()
+        return {
+            'registros': validos.to_dict('records'),
+            'erros': erros,
+            'aproximacoes': [mensagem for _, _, mensagem in sorted(aproximacoes)],
+            'data_min': datas_lidas.min().date() if len(datas_lidas) else None,
+            'data_max': datas_lidas.max().date() if len(datas_lidas) else None,
+        }
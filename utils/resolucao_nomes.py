@@ -0,0 +1,126 @@
+"""
+Resolução de nomes de empresas e embarcações digitados em planilhas
+
+Os nomes são normalizados (minúsculas, sem acentos, pontuação e espaços
+repetidos) e procurados em um dicionário, de modo que "Apecatu Expedicoes" e
+"Apecatu  Expedições." resolvem para a mesma empresa. Quando não há nome
+igual, os candidatos que compartilham trigramas com o nome digitado são
+comparados pela distância de Levenshtein: um candidato muito parecido e sem
+concorrente próximo é aceito (e informado como aproximação); nos demais
+casos os mais parecidos voltam como sugestões.
+"""
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+
+def normalizar_nome(nome: str) -> str:
+    """'  Apecatu Expedições - ME ' -> 'apecatu expedicoes me'"""
+    decomposto = unicodedata.normalize('NFKD', str(nome))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'\w+', sem_acentos.casefold()))
+
+
+def trigramas(nome_normalizado: str) -> set:
+    texto = f'  {nome_normalizado} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Número mínimo de inserções, remoções e trocas de caracteres entre a e b"""
+    if len(a) < len(b):
+        a, b = b, a
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i]
+        for j, cb in enumerate(b, 1):
+            atual.append(min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        anterior = atual
+    return anterior[-1]
+
+
+# Números arábicos (com sufixo, como "2R") e romanos, que distinguem embarcações
+# e empresas de nomes iguais ("Pegasus I" e "Pegasus II")
+_NUMERO = re.compile(r'^(\d+\w*|(?=[ivxlcdm])m{0,3}(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3}))$')
+
+
+def numeracao(nome_normalizado: str) -> Tuple[str, ...]:
+    """'pegasus ii' -> ('ii',); 'rafaela 2r' -> ('2r',)"""
+    return tuple(t for t in nome_normalizado.split() if _NUMERO.match(t))
+
+
+def similaridade(a: str, b: str) -> float:
+    """1.0 para nomes iguais, 0.0 para nomes sem nada em comum"""
+    if not a and not b:
+        return 1.0
+    return 1 - levenshtein(a, b) / max(len(a), len(b))
+
+
+class Resolucao(NamedTuple):
+    """Resultado da busca de um nome no índice"""
+    item: Any  # None se não resolvido
+    aproximado: bool  # True se resolvido por semelhança (não pelo nome exato)
+    sugestoes: List[str]  # nomes cadastrados mais parecidos, quando não resolvido
+
+
+class IndiceNomes:
+    """Dicionário nome normalizado -> item, com busca aproximada por trigramas"""
+
+    # Semelhança mínima para aceitar um nome diferente sem intervenção
+    SIMILARIDADE_ACEITE = 0.85
+    # Diferença mínima para o segundo candidato (evita escolher entre dois parecidos)
+    MARGEM_ACEITE = 0.05
+    # Semelhança mínima para sugerir um nome
+    SIMILARIDADE_SUGESTAO = 0.5
+
+    def __init__(self, itens: Iterable[Tuple[str, Any]]):
+        self._exatos: Dict[str, Any] = {}
+        self._nomes: Dict[str, str] = {}  # normalizado -> nome cadastrado
+        ambiguos = set()
+        for nome, item in itens:
+            chave = normalizar_nome(nome)
+            if chave in self._exatos and self._exatos[chave] != item:
+                ambiguos.add(chave)
+            self._exatos[chave] = item
+            self._nomes[chave] = nome
+        # Nomes que só diferem por acento/pontuação não são resolvidos automaticamente
+        for chave in ambiguos:
+            del self._exatos[chave]
+
+        self._por_trigrama: Dict[str, List[str]] = {}
+        for chave in self._nomes:
+            for trigrama in trigramas(chave):
+                self._por_trigrama.setdefault(trigrama, []).append(chave)
+
+        # Cada nome distinto da planilha é resolvido uma única vez
+        self._memoria: Dict[str, Resolucao] = {}
+
+    def resolver(self, nome: str) -> Resolucao:
+        chave = normalizar_nome(nome)
+        resolucao = self._memoria.get(chave)
+        if resolucao is None:
+            resolucao = self._resolver(chave)
+            self._memoria[chave] = resolucao
+        return resolucao
+
+    def _resolver(self, chave: str) -> Resolucao:
+        if chave in self._exatos:
+            return Resolucao(self._exatos[chave], False, [])
+
+        # Candidatos com mais trigramas em comum; Levenshtein só para os 10 primeiros.
+        # Nomes com numeração diferente nunca são aceitos sem intervenção
+        # (apenas sugeridos): são outras embarcações/empresas
+        comuns = Counter(c for t in trigramas(chave) for c in self._por_trigrama.get(t, ()))
+        candidatos = sorted(
+            ((similaridade(chave, c), c) for c, _ in comuns.most_common(10)),
+            reverse=True
+        )
+        if candidatos:
+            melhor, nome_melhor = candidatos[0]
+            segundo = candidatos[1][0] if len(candidatos) > 1 else 0.0
+            if (melhor >= self.SIMILARIDADE_ACEITE and melhor - segundo >= self.MARGEM_ACEITE
+                    and nome_melhor in self._exatos and numeracao(nome_melhor) == numeracao(chave)):
+                return Resolucao(self._exatos[nome_melhor], True, [])
+        sugestoes = [self._nomes[c] for s, c in candidatos[:3] if s >= self.SIMILARIDADE_SUGESTAO]
+        return Resolucao(None, False, sugestoes)
@@ -3,8 +3,11 @@ Cliente de sincronização para comunicação com o app servidor.
 """
 from __future__ import annotations
 
+import json
+import socket
+import threading
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional
 
 import requests
 
@@ -12,14 +15,76 @@ import requests
 class SyncClient:
     """Cliente HTTP para sincronização de preços, registros e documentos."""
 
-    def __init__(self, base_url: str, timeout: int = 20) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 20,
+        cliente_id: Optional[str] = None,
+        token: Optional[str] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        # Descrição do token emitido; o servidor a usa nas métricas por cliente
+        self.cliente_id = cliente_id or socket.gethostname()
+        self.headers: dict[str, str] = {}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+
+    def autenticar(self, username: str, password: str) -> dict[str, Any]:
+        """Obtém um token de acesso (a senha é verificada só nesta chamada)."""
+        response = requests.post(
+            f"{self.base_url}/auth/token",
+            json={"username": username, "password": password, "descricao": self.cliente_id},
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        dados = response.json()
+        self.headers["Authorization"] = f"Bearer {dados['access_token']}"
+        return dados
+
+    def escutar_eventos(
+        self, ultimo_id: Optional[int] = None, timeout_leitura: float = 60
+    ) -> Iterator[dict[str, Any]]:
+        """Produz as notificações de alteração do servidor (GET /eventos, Server-Sent Events).
+
+        O servidor envia um keep-alive a cada 15 s; sem nada em `timeout_leitura`
+        segundos a conexão é considerada perdida (requests.ReadTimeout).
+        """
+        headers = dict(self.headers, Accept="text/event-stream")
+        if ultimo_id is not None:
+            headers["Last-Event-ID"] = str(ultimo_id)
+        with requests.get(
+            f"{self.base_url}/eventos",
+            headers=headers,
+            stream=True,
+            timeout=(self.timeout, timeout_leitura),
+        ) as response:
+            response.raise_for_status()
+            evento: dict[str, Any] = {}
+            for linha in response.iter_lines(decode_unicode=True):
+                if not linha:
+                    # Linha em branco encerra o evento
+                    if "tipo" in evento:
+                        yield evento
+                    evento = {}
+                    continue
+                if linha.startswith(":"):
+                    continue
+                campo, _, valor = linha.partition(":")
+                valor = valor[1:] if valor.startswith(" ") else valor
+                if campo == "id":
+                    evento["id"] = int(valor)
+                elif campo == "event":
+                    evento["tipo"] = valor
+                elif campo == "data":
+                    evento.update(json.loads(valor))
 
     def obter_tabela_preco(self) -> dict[str, Any]:
         """Obtém a tabela de preços ativa do servidor."""
         response = requests.get(
             f"{self.base_url}/precos/ativo",
+            headers=self.headers,
             timeout=self.timeout,
         )
         response.raise_for_status()
@@ -30,6 +95,18 @@ class SyncClient:
         response = requests.post(
             f"{self.base_url}/registros",
             json=payload,
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def enviar_registros(self, payloads: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Envia vários registros de visita em uma única requisição."""
+        response = requests.post(
+            f"{self.base_url}/registros/lote",
+            json=payloads,
+            headers=self.headers,
             timeout=self.timeout,
         )
         response.raise_for_status()
@@ -57,7 +134,65 @@ class SyncClient:
                 f"{self.base_url}/documentos",
                 data=data,
                 files=files,
+                headers=self.headers,
                 timeout=self.timeout,
             )
         response.raise_for_status()
         return response.json()
+
+
+class OuvinteEventos:
+    """Mantém a conexão com /eventos em uma thread, reconectando após quedas.
+
+    Na reconexão o último id recebido é enviado (Last-Event-ID) e o servidor
+    reenvia o que foi perdido ou, se não puder, um evento `ressincronizar`.
+    `ao_receber` é chamado na thread do ouvinte. Se o token for recusado (401),
+    `renovar_token`, quando informado, fornece um novo antes da reconexão.
+    """
+
+    def __init__(
+        self,
+        cliente: SyncClient,
+        ao_receber: Callable[[dict[str, Any]], None],
+        espera_maxima: float = 60,
+        renovar_token: Optional[Callable[[], Optional[str]]] = None,
+    ) -> None:
+        self.cliente = cliente
+        self.ao_receber = ao_receber
+        self.espera_maxima = espera_maxima
+        self.renovar_token = renovar_token
+        self.ultimo_id: Optional[int] = None
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="ouvinte-eventos")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def parar(self) -> None:
+        # A thread termina no próximo evento ou keep-alive
+        self._parar.set()
+
+    def _executar(self) -> None:
+        espera = 1.0
+        while not self._parar.is_set():
+            try:
+                for evento in self.cliente.escutar_eventos(self.ultimo_id):
+                    if self._parar.is_set():
+                        return
+                    espera = 1.0
+                    self.ultimo_id = evento.get("id", self.ultimo_id)
+                    self.ao_receber(evento)
+            except requests.HTTPError as e:
+                if (e.response is not None and e.response.status_code == 401
+                        and self.renovar_token and not self._parar.is_set()):
+                    token = self.renovar_token()
+                    if token:
+                        self.cliente.headers["Authorization"] = f"Bearer {token}"
+            except (requests.RequestException, ValueError):
+                pass
+            # Servidor fora do ar ou conexão perdida: nova tentativa com espera crescente
+            self._parar.wait(espera)
+            espera = min(espera * 2, self.espera_maxima)
@@ -1,57 +1,78 @@
-from datetime import date
-from models.database import init_db
-from models.services import TabelaPrecoService, RegistroVisitaService
-
-def verify():
-    # Setup in-memory db
-    engine, SessionLocal = init_db(':memory:')
-    session = SessionLocal()
-    
-    try:
-        # Create pricing table (using 2025 values from seed_data logic)
-        TabelaPrecoService.criar(
-            session,
-            ano_inicio=2026,
-            valores={
-                'valor_estrangeiro': 96.00,
-                'valor_mercosul': 72.00,
-                'valor_brasileiro': 5.00,
-                'valor_entorno': 13.00,
-                'valor_isento': 0.00,
-                'valor_maior12': 43.00,
-                'valor_menor12': 28.00
-            }
-        )
-        
-        print("=== Verification Results ===")
-        
-        # Scenario 1: Boat < 12m, 0 Visitors
-        # Expected: 28.00 (boat fee only)
-        val1 = RegistroVisitaService.calcular_valor_total(
-            session, date(2026, 2, 2), {}, 
-            permanencia=1, comprimento_embarcacao_m=11.0
-        )
-        print(f"Scenario 1 (<12m, 0 pax): Ex: 28.00 | Got: {val1} -> {'PASS' if val1 == 28.0 else 'FAIL'}")
-        
-        # Scenario 2: Boat >= 12m, 0 Visitors
-        # Expected: 43.00
-        val2 = RegistroVisitaService.calcular_valor_total(
-            session, date(2026, 2, 2), {}, 
-            permanencia=1, comprimento_embarcacao_m=12.0
-        )
-        print(f"Scenario 2 (>=12m, 0 pax): Ex: 43.00 | Got: {val2} -> {'PASS' if val2 == 43.0 else 'FAIL'}")
-        
-        # Scenario 3: Boat < 12m, 1 Brasileiro (5.00)
-        # Expected: 28.00 + 5.00 = 33.00
-        qtde = {'qtde_brasileiros': 1}
-        val3 = RegistroVisitaService.calcular_valor_total(
-            session, date(2026, 2, 2), qtde, 
-            permanencia=1, comprimento_embarcacao_m=11.0
-        )
-        print(f"Scenario 3 (<12m, 1 Bra): Ex: 33.00 | Got: {val3} -> {'PASS' if val3 == 33.0 else 'FAIL'}")
-        
-    finally:
-        session.close()
-
-if __name__ == "__main__":
-    verify()
+from datetime import date
+from models.database import init_db
+from models.services import TabelaPrecoService, RegistroVisitaService
+from models.precificacao import MotorPrecos
+
+def verify():
+    # Setup in-memory db
+    engine, SessionLocal = init_db(':memory:')
+    session = SessionLocal()
+
+    try:
+        # Create pricing table (using 2025 values from seed_data logic)
+        TabelaPrecoService.criar(
+            session,
+            ano_inicio=2026,
+            valores={
+                'valor_estrangeiro': 96.00,
+                'valor_mercosul': 72.00,
+                'valor_brasileiro': 5.00,
+                'valor_entorno': 13.00,
+                'valor_isento': 0.00,
+                'valor_fundeio_ate8': 20.00,
+                'valor_fundeio_8a15': 28.00,
+                'valor_fundeio_acima15': 43.00
+            }
+        )
+
+        print("=== Verification Results ===")
+
+        # (descrição, quantidades, permanência, comprimento, esperado)
+        cenarios = [
+            ("<8m, 0 pax", {}, 1, 7.5, 20.00),
+            ("8-15m, 0 pax", {}, 1, 8.0, 28.00),
+            ("=15m, 0 pax", {}, 1, 15.0, 28.00),
+            (">15m, 0 pax", {}, 1, 15.5, 43.00),
+            ("8-15m, 1 Bra", {'qtde_brasileiros': 1}, 1, 11.0, 33.00),
+            ("sem comprimento, 2 Est", {'qtde_estrangeiros': 2}, 1, None, 192.00),
+            ("8-15m, 1 Mer + 1 Ent, pernoite", {'qtde_mercosul': 1, 'qtde_entorno': 1}, 2, 12.0, 226.00),
+        ]
+
+        falhas = 0
+        for descricao, qtde, permanencia, comprimento, esperado in cenarios:
+            valor = RegistroVisitaService.calcular_valor_total(
+                session, date(2026, 2, 2), qtde,
+                permanencia=permanencia, comprimento_embarcacao_m=comprimento
+            )
+            ok = valor == esperado
+            falhas += not ok
+            print(f"{descricao}: Ex: {esperado:.2f} | Got: {valor} -> {'PASS' if ok else 'FAIL'}")
+
+        # Sem tabela vigente para o ano: valor zero
+        valor = RegistroVisitaService.calcular_valor_total(
+            session, date(2019, 2, 2), {'qtde_brasileiros': 1}, comprimento_embarcacao_m=10.0
+        )
+        falhas += valor != 0.0
+        print(f"sem tabela (2019): Ex: 0.00 | Got: {valor} -> {'PASS' if valor == 0.0 else 'FAIL'}")
+
+        # O cálculo em lote deve produzir exatamente os mesmos valores
+        lote = MotorPrecos.calcular_lote(
+            TabelaPrecoService.listar_snapshots(session),
+            [date(2026, 2, 2)] * len(cenarios),
+            {col: [c[1].get(col, 0) for c in cenarios] for col in
+             ['qtde_estrangeiros', 'qtde_mercosul', 'qtde_brasileiros', 'qtde_entorno', 'qtde_isentos']},
+            [c[2] for c in cenarios],
+            [c[3] for c in cenarios],
+        )
+        iguais = lote['valor_total'].tolist() == [c[4] for c in cenarios]
+        falhas += not iguais
+        print(f"lote vetorizado == unitário -> {'PASS' if iguais else 'FAIL'}")
+
+        print(f"\n{'OK' if not falhas else f'{falhas} falha(s)'}")
+        return falhas == 0
+
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    verify()
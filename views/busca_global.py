@@ -0,0 +1,103 @@
+"""
+Barra de busca global (empresas, embarcações e registros)
+"""
+from PyQt6.QtWidgets import QLineEdit, QCompleter
+from PyQt6.QtCore import Qt, QTimer, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
+import threading
+
+from models.busca import BuscaService, ResultadoBusca
+
+
+# Ícone exibido antes de cada resultado, por tipo
+ICONES_RESULTADO = {'empresa': '🏢', 'embarcacao': '⛵', 'registro': '📝'}
+
+
+class BuscaGlobal(QLineEdit):
+    """Campo de busca que consulta o índice a cada pausa na digitação"""
+
+    # Emitido com o ResultadoBusca escolhido na lista
+    resultado_escolhido = pyqtSignal(object)
+
+    # Sinal interno: (geração da consulta, resultados)
+    _resultados_prontos = pyqtSignal(int, list)
+
+    # Pausa na digitação antes de consultar (ms)
+    DEBOUNCE_MS = 200
+
+    def __init__(self, SessionLocal, parent=None):
+        super().__init__(parent)
+        self.SessionLocal = SessionLocal
+
+        self.setPlaceholderText('🔍 Buscar empresa, embarcação, código ou responsável (Ctrl+F)')
+        self.setClearButtonEnabled(True)
+        self.setMinimumWidth(380)
+
+        # Só a consulta mais recente é exibida (respostas antigas são descartadas)
+        self._geracao = 0
+
+        self.modelo = QStandardItemModel(self)
+        self.completer = QCompleter(self.modelo, self)
+        # A lista mostra os resultados da busca como vieram, sem refiltrar pelo texto
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setMaxVisibleItems(12)
+        self.completer.activated[QModelIndex].connect(self._on_ativado)
+        self.setCompleter(self.completer)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS)
+        self._timer.timeout.connect(self._buscar)
+
+        self.textEdited.connect(lambda _: self._timer.start())
+        self._resultados_prontos.connect(self._exibir_resultados)
+
+    def _buscar(self):
+        """Dispara a consulta em uma thread de trabalho"""
+        texto = self.text().strip()
+        self._geracao += 1
+        geracao = self._geracao
+        if len(texto) < 2:
+            self.modelo.clear()
+            return
+
+        def worker():
+            session = self.SessionLocal()
+            try:
+                resultados = BuscaService.buscar(session, texto)
+            except Exception as e:
+                print(f"Erro na busca: {e}")
+                resultados = []
+            finally:
+                session.close()
+            try:
+                self._resultados_prontos.emit(geracao, resultados)
+            except RuntimeError:
+                pass  # Widget destruído
+
+        t = threading.Thread(target=worker)
+        t.daemon = True
+        t.start()
+
+    def _exibir_resultados(self, geracao: int, resultados: list):
+        """Preenche a lista de sugestões (chamado via sinal)"""
+        if geracao != self._geracao:
+            return
+
+        self.modelo.clear()
+        for resultado in resultados:
+            item = QStandardItem(f"{ICONES_RESULTADO[resultado.tipo]} {resultado.titulo}  —  {resultado.detalhe}")
+            item.setData(resultado, Qt.ItemDataRole.UserRole)
+            self.modelo.appendRow(item)
+
+        if resultados:
+            self.completer.complete()
+        else:
+            self.completer.popup().hide()
+
+    def _on_ativado(self, index: QModelIndex):
+        resultado: ResultadoBusca = index.data(Qt.ItemDataRole.UserRole)
+        # O completer coloca o texto da sugestão no campo: limpa depois do evento
+        QTimer.singleShot(0, self.clear)
+        if resultado is not None:
+            self.resultado_escolhido.emit(resultado)
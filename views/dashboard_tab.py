@@ -3,15 +3,30 @@ Aba de Dashboard com resumo e estatísticas
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame,
-    QGridLayout, QPushButton
+    QGridLayout, QPushButton, QComboBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 from datetime import datetime, date
 from calendar import monthrange
+import threading
 
-from models.services import RegistroVisitaService
+from models.services import RegistroVisitaService, EstatisticaService
 from models.database import Empresa, Embarcacao, TabelaPrecoIngresso, RegistroVisita
+from models.instrumentacao import PERFIL
+from models.referencias import CACHE_REFERENCIAS
+from utils.validators import Formatadores
+from views.graficos import GraficoSerieTemporal, GraficoRanking, CORES_SERIES
+
+
+# Categorias exibidas na série empilhada de visitantes: (chave, rótulo)
+CATEGORIAS_SERIE = [
+    ('estrangeiros', 'Estrangeiros'),
+    ('mercosul', 'Mercosul'),
+    ('brasileiros', 'Brasileiros'),
+    ('entorno', 'Entorno'),
+    ('isentos', 'Isentos'),
+]
 
 
 class StatCard(QFrame):
@@ -45,13 +60,13 @@ class StatCard(QFrame):
         layout.addWidget(title_label)
         
         # Valor
-        value_label = QLabel(value)
+        self.value_label = QLabel(value)
         value_font = QFont()
         value_font.setPointSize(20)
         value_font.setBold(True)
-        value_label.setFont(value_font)
-        value_label.setStyleSheet('color: #0078d4;')
-        layout.addWidget(value_label)
+        self.value_label.setFont(value_font)
+        self.value_label.setStyleSheet('color: #0078d4;')
+        layout.addWidget(self.value_label)
         
         self.setLayout(layout)
         self.setStyleSheet("""
@@ -62,14 +77,56 @@ class StatCard(QFrame):
             }
         """)
 
+    def definir_valor(self, value: str):
+        """Atualiza o valor exibido apenas se ele mudou (evita repintura)"""
+        if self.value_label.text() != value:
+            self.value_label.setText(value)
+
+
+def _definir_texto(label: QLabel, texto: str):
+    """Atualiza o texto de um label apenas se ele mudou"""
+    if label.text() != texto:
+        label.setText(texto)
+
 
 class DashboardTab(QWidget):
     """Aba de Dashboard"""
     
+    # Sinais para comunicação entre a thread de consulta e a UI
+    dados_carregados = pyqtSignal(dict)
+    erro_carregamento = pyqtSignal(str)
+    tendencias_carregadas = pyqtSignal(object, dict)  # ((geração, período), dados)
+    erro_tendencias = pyqtSignal(object, str)  # ((geração, período), mensagem)
+    
+    # Intervalo para agrupar rajadas de pedidos de atualização (ms)
+    DEBOUNCE_MS = 300
+    
     def __init__(self, SessionLocal):
         super().__init__()
         self.SessionLocal = SessionLocal
         
+        self._carregando = False
+        self._atualizacao_pendente = False
+        # Último resumo exibido, base das atualizações incrementais (somar_registros)
+        self._resumo = None
+        
+        # Cache de tendências por período: (data_inicio, data_fim) -> dados.
+        # É limpo a cada atualização de dados (salvar, importar, F5).
+        self._cache_tendencias = {}
+        self._tendencias_em_consulta = set()
+        self._geracao_cache = 0
+        
+        # Rajadas de pedidos (salvar, importar, F5) viram uma única consulta
+        self._timer_atualizacao = QTimer(self)
+        self._timer_atualizacao.setSingleShot(True)
+        self._timer_atualizacao.setInterval(self.DEBOUNCE_MS)
+        self._timer_atualizacao.timeout.connect(self._iniciar_carregamento)
+        
+        self.dados_carregados.connect(self._aplicar_dados)
+        self.erro_carregamento.connect(self._on_erro_carregamento)
+        self.tendencias_carregadas.connect(self._aplicar_tendencias)
+        self.erro_tendencias.connect(self._on_erro_tendencias)
+        
         self.init_ui()
         self.carregar_dados()
         
@@ -148,10 +205,12 @@ class DashboardTab(QWidget):
             detail_layout.addWidget(label)
         
         self.detail_frame.setLayout(detail_layout)
-        layout.addWidget(self.detail_frame)
         
-        # Botão de atualizar
-        layout.addStretch()
+        detalhes_tendencias = QHBoxLayout()
+        detalhes_tendencias.setSpacing(15)
+        detalhes_tendencias.addWidget(self.detail_frame, 1)
+        detalhes_tendencias.addWidget(self.create_tendencias_panel(), 3)
+        layout.addLayout(detalhes_tendencias, 1)
         
         btn_layout = QHBoxLayout()
         btn_layout.addStretch()
@@ -178,58 +237,280 @@ class DashboardTab(QWidget):
         layout.addLayout(btn_layout)
         
         self.setLayout(layout)
+    
+    def create_tendencias_panel(self):
+        """Cria o painel de gráficos de tendência"""
+        frame = QFrame()
+        frame.setObjectName('painel_tendencias')
+        frame.setFrameStyle(QFrame.Shape.StyledPanel)
+        frame.setStyleSheet("""
+            QFrame#painel_tendencias {
+                background-color: white;
+                border-radius: 8px;
+                border: 1px solid #ddd;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        
+        controles = QHBoxLayout()
+        controles.addWidget(QLabel('<b>Tendências</b>'))
+        controles.addStretch()
+        
+        controles.addWidget(QLabel('Período:'))
+        self.combo_periodo = QComboBox()
+        for meses in (3, 6, 12, 24, 60):
+            self.combo_periodo.addItem(f'Últimos {meses} meses', meses)
+        self.combo_periodo.setCurrentIndex(2)
+        self.combo_periodo.currentIndexChanged.connect(self.carregar_tendencias)
+        controles.addWidget(self.combo_periodo)
+        
+        controles.addWidget(QLabel('Exibir:'))
+        self.combo_metrica = QComboBox()
+        self.combo_metrica.addItem('Visitantes por categoria', 'visitantes')
+        self.combo_metrica.addItem('Receita', 'receita')
+        self.combo_metrica.currentIndexChanged.connect(self.carregar_tendencias)
+        controles.addWidget(self.combo_metrica)
+        
+        layout.addLayout(controles)
+        
+        self.grafico_serie = GraficoSerieTemporal('Visitantes')
+        layout.addWidget(self.grafico_serie, 2)
+        
+        rankings = QHBoxLayout()
+        self.grafico_empresas = GraficoRanking('Top empresas (visitantes)', '#0078d4')
+        self.grafico_embarcacoes = GraficoRanking('Top embarcações (visitantes)', '#2e7d32')
+        rankings.addWidget(self.grafico_empresas)
+        rankings.addWidget(self.grafico_embarcacoes)
+        layout.addLayout(rankings, 1)
+        
+        frame.setLayout(layout)
+        return frame
         
     def carregar_dados(self):
-        """Carrega os dados do dashboard"""
-        session = self.SessionLocal()
+        """Agenda a atualização do dashboard em segundo plano.
+        
+        Pedidos feitos dentro do intervalo de debounce são agrupados em uma
+        única consulta, que roda fora da thread da interface.
+        """
+        self._cache_tendencias.clear()
+        self._geracao_cache += 1
+        self._timer_atualizacao.start()
+    
+    def _iniciar_carregamento(self):
+        """Dispara a consulta em uma thread de trabalho"""
+        if self._carregando:
+            # Já existe uma consulta em andamento: repete ao terminar
+            self._atualizacao_pendente = True
+            return
+        
+        self._carregando = True
+        self._atualizacao_pendente = False
+        
+        t = threading.Thread(target=self._worker_carregamento)
+        t.daemon = True
+        t.start()
+        
+        self.carregar_tendencias()
+    
+    def periodo_tendencias(self) -> tuple:
+        """Retorna (data_inicio, data_fim) dos últimos N meses selecionados (meses completos)"""
+        meses = self.combo_periodo.currentData() or 12
+        hoje = date.today()
+        indice = hoje.year * 12 + (hoje.month - 1) - (meses - 1)
+        fim = date(hoje.year, hoje.month, monthrange(hoje.year, hoje.month)[1])
+        return date(indice // 12, indice % 12 + 1, 1), fim
+    
+    def carregar_tendencias(self, *args):
+        """Exibe as tendências do período, consultando apenas se não houver cache"""
+        chave = self.periodo_tendencias()
+        
+        if chave in self._cache_tendencias:
+            self._desenhar_tendencias(self._cache_tendencias[chave])
+            return
         
+        # A geração evita guardar no cache resultados anteriores a uma atualização
+        consulta = (self._geracao_cache, chave)
+        if consulta in self._tendencias_em_consulta:
+            return
+        self._tendencias_em_consulta.add(consulta)
+        
+        def worker():
+            try:
+                with PERFIL.medir('dashboard.carregar_tendencias'):
+                    dados = self.consultar_tendencias(self.SessionLocal, *chave)
+            except Exception as e:
+                sinal, argumentos = self.erro_tendencias, (consulta, str(e))
+            else:
+                sinal, argumentos = self.tendencias_carregadas, (consulta, dados)
+            try:
+                sinal.emit(*argumentos)
+            except RuntimeError:
+                # Widget destruído antes do fim da consulta (fechamento da janela)
+                pass
+        
+        t = threading.Thread(target=worker)
+        t.daemon = True
+        t.start()
+    
+    @staticmethod
+    def consultar_tendencias(SessionLocal, data_inicio: date, data_fim: date) -> dict:
+        """Consulta a série temporal e os rankings (consultas agregadas)"""
+        session = SessionLocal()
         try:
-            # Data atual
-            hoje = date.today()
-            ano = hoje.year
-            mes = hoje.month
-            
-            # Buscar resumo mensal
-            resumo = RegistroVisitaService.relatorio_mensal(session, ano, mes)
-            
-            # Atualizar cards (ícone=0, título=1, valor=2)
-            labels_visitantes = self.card_visitantes_mes.findChildren(QLabel)
-            labels_visitantes[2].setText(f"{resumo['total_visitantes']:,}".replace(',', '.'))
-            
-            labels_receita = self.card_receita_mes.findChildren(QLabel)
-            labels_receita[2].setText(f"R$ {resumo['receita_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'))
-            
-            # Contar empresas e embarcações ativas
-            qtd_empresas = session.query(Empresa).filter_by(ativo=True).count()
-            qtd_embarcacoes = session.query(Embarcacao).filter_by(ativo=True).count()
-            
-            labels_empresas = self.card_empresas.findChildren(QLabel)
-            labels_empresas[2].setText(str(qtd_empresas))
-            
-            labels_embarcacoes = self.card_embarcacoes.findChildren(QLabel)
-            labels_embarcacoes[2].setText(str(qtd_embarcacoes))
-            
-            # Atualizar detalhes
-            self.label_estrangeiros.setText(
-                f"Estrangeiros: {resumo['total_estrangeiros']:,}".replace(',', '.')
-            )
-            self.label_mercosul.setText(
-                f"Mercosul: {resumo['total_mercosul']:,}".replace(',', '.')
-            )
-            self.label_brasileiros.setText(
-                f"Brasileiros: {resumo['total_brasileiros']:,}".replace(',', '.')
-            )
-            self.label_entorno.setText(
-                f"Comunidade do Entorno: {resumo['total_entorno']:,}".replace(',', '.')
-            )
-            self.label_isentos.setText(
-                f"Isentos: {resumo['total_isentos']:,}".replace(',', '.')
+            dados = EstatisticaService.rankings(session, data_inicio, data_fim)
+            dados['granularidade'] = EstatisticaService.granularidade_para_periodo(data_inicio, data_fim)
+            dados['serie'] = EstatisticaService.serie_temporal(session, data_inicio, data_fim)
+            return dados
+        finally:
+            session.close()
+    
+    def _aplicar_tendencias(self, consulta, dados: dict):
+        """Guarda as tendências no cache e redesenha (chamado via sinal)"""
+        self._tendencias_em_consulta.discard(consulta)
+        geracao, chave = consulta
+        if geracao != self._geracao_cache:
+            return
+        
+        self._cache_tendencias[chave] = dados
+        if chave == self.periodo_tendencias():
+            self._desenhar_tendencias(dados)
+    
+    def _on_erro_tendencias(self, consulta, err_msg: str):
+        """Erro na consulta das tendências (chamado via sinal); o período pode ser consultado de novo"""
+        self._tendencias_em_consulta.discard(consulta)
+        print(f"Erro ao carregar tendências do dashboard: {err_msg}")
+    
+    def _desenhar_tendencias(self, dados: dict):
+        """Repassa os dados aos gráficos (sem criar widgets por ponto)"""
+        serie = dados['serie']
+        if dados['granularidade'] == 'mes':
+            rotulos = [p['periodo'].strftime('%m/%Y') for p in serie]
+        else:
+            rotulos = [p['periodo'].strftime('%d/%m/%y') for p in serie]
+        
+        if self.combo_metrica.currentData() == 'receita':
+            self.grafico_serie.titulo = 'Receita'
+            self.grafico_serie.definir_dados(
+                rotulos, [('Receita', CORES_SERIES[0], [p['receita'] for p in serie])],
+                empilhado=True, formatador=Formatadores.formatar_moeda
             )
-            self.label_total_registros.setText(
-                f"Total de registros: {resumo['quantidade_registros']:,}".replace(',', '.')
+        else:
+            self.grafico_serie.titulo = 'Visitantes'
+            series = [
+                (rotulo, CORES_SERIES[i], [p[chave] for p in serie])
+                for i, (chave, rotulo) in enumerate(CATEGORIAS_SERIE)
+            ]
+            self.grafico_serie.definir_dados(
+                rotulos, series, empilhado=True,
+                formatador=lambda v: f"{v:,.0f}".replace(',', '.')
             )
-            
+        
+        self.grafico_empresas.definir_dados([(e['nome'], e['visitantes']) for e in dados['empresas']])
+        self.grafico_embarcacoes.definir_dados([(e['nome'], e['visitantes']) for e in dados['embarcacoes']])
+    
+    def _worker_carregamento(self):
+        """Executa as consultas fora da thread da UI e emite o resultado"""
+        try:
+            with PERFIL.medir('dashboard.carregar_dados'):
+                dados = self.consultar_dados(self.SessionLocal)
         except Exception as e:
-            print(f"Erro ao carregar dados do dashboard: {e}")
+            sinal, argumento = self.erro_carregamento, str(e)
+        else:
+            sinal, argumento = self.dados_carregados, dados
+        try:
+            sinal.emit(argumento)
+        except RuntimeError:
+            # Widget destruído antes do fim da consulta (fechamento da janela)
+            pass
+    
+    @staticmethod
+    def consultar_dados(SessionLocal) -> dict:
+        """Consulta os números exibidos no dashboard
+        
+        Returns:
+            dict com o resumo mensal e a contagem de empresas/embarcações ativas
+        """
+        session = SessionLocal()
+        try:
+            hoje = date.today()
+            resumo = RegistroVisitaService.relatorio_mensal(session, hoje.year, hoje.month)
+            referencias = CACHE_REFERENCIAS.obter(session)
+            resumo['qtd_empresas'] = len(referencias.empresas_ativas())
+            resumo['qtd_embarcacoes'] = len(referencias.embarcacoes_ativas())
+            return resumo
         finally:
             session.close()
+    
+    def _aplicar_dados(self, resumo: dict):
+        """Atualiza os cards e detalhes (chamado via sinal, na thread da UI)"""
+        self._carregando = False
+        self._resumo = resumo
+        
+        def fmt_int(valor):
+            return f"{valor:,}".replace(',', '.')
+        
+        # Cards (só repinta o que mudou)
+        self.card_visitantes_mes.definir_valor(fmt_int(resumo['total_visitantes']))
+        self.card_receita_mes.definir_valor(
+            f"R$ {resumo['receita_total']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        )
+        self.card_empresas.definir_valor(str(resumo['qtd_empresas']))
+        self.card_embarcacoes.definir_valor(str(resumo['qtd_embarcacoes']))
+        
+        # Detalhes
+        _definir_texto(self.label_estrangeiros, f"Estrangeiros: {fmt_int(resumo['total_estrangeiros'])}")
+        _definir_texto(self.label_mercosul, f"Mercosul: {fmt_int(resumo['total_mercosul'])}")
+        _definir_texto(self.label_brasileiros, f"Brasileiros: {fmt_int(resumo['total_brasileiros'])}")
+        _definir_texto(self.label_entorno, f"Comunidade do Entorno: {fmt_int(resumo['total_entorno'])}")
+        _definir_texto(self.label_isentos, f"Isentos: {fmt_int(resumo['total_isentos'])}")
+        _definir_texto(
+            self.label_total_registros,
+            f"Total de registros: {fmt_int(resumo['quantidade_registros'])}"
+        )
+        
+        if self._atualizacao_pendente:
+            self._timer_atualizacao.start()
+    
+    def somar_registros(self, registros: list):
+        """
+        Soma registros recém-gravados aos totais exibidos, sem consultar o
+        banco (usado pelas notificações do servidor). Com uma carga em
+        andamento, que pode ou não incluí-los, recarrega os totais.
+        """
+        if self._resumo is None or self._carregando or self._timer_atualizacao.isActive():
+            self.carregar_dados()
+            return
+        
+        hoje = date.today()
+        resumo = dict(self._resumo)
+        for r in registros:
+            if (r.data.year, r.data.month) != (hoje.year, hoje.month):
+                continue
+            resumo['total_estrangeiros'] += r.qtde_estrangeiros
+            resumo['total_mercosul'] += r.qtde_mercosul
+            resumo['total_brasileiros'] += r.qtde_brasileiros
+            resumo['total_entorno'] += r.qtde_entorno
+            resumo['total_isentos'] += r.qtde_isentos
+            resumo['total_visitantes'] += (
+                r.qtde_estrangeiros + r.qtde_mercosul + r.qtde_brasileiros +
+                r.qtde_entorno + r.qtde_isentos
+            )
+            resumo['receita_total'] += r.valor_total
+            resumo['quantidade_registros'] += 1
+        self._aplicar_dados(resumo)
+        
+        # Gráficos: só o período exibido é consultado de novo, se os registros caem nele
+        data_inicio, data_fim = self.periodo_tendencias()
+        if any(data_inicio <= r.data <= data_fim for r in registros):
+            self._cache_tendencias.clear()
+            self._geracao_cache += 1
+            self.carregar_tendencias()
+    
+    def _on_erro_carregamento(self, err_msg: str):
+        """Erro na consulta do dashboard (chamado via sinal)"""
+        self._carregando = False
+        print(f"Erro ao carregar dados do dashboard: {err_msg}")
+        
+        if self._atualizacao_pendente:
+            self._timer_atualizacao.start()
@@ -2,6 +2,7 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import Qt
 from models.services import EmbarcacaoService, EmpresaService
+from models.referencias import CACHE_REFERENCIAS
 
 class EmbarcacoesTab(QWidget):
     def __init__(self, SessionLocal, usuario_logado):
@@ -18,19 +19,15 @@ class EmbarcacoesTab(QWidget):
         self.carregar_embarcacoes()
     
     def carregar_embarcacoes(self):
-        session = self.SessionLocal()
-        try:
-            embarcacoes = EmbarcacaoService.listar_ativas(session)
-            self.table.setRowCount(0)
-            for emb in embarcacoes:
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                self.table.setItem(row, 0, QTableWidgetItem(str(emb.id)))
-                self.table.setItem(row, 1, QTableWidgetItem(emb.empresa.nome if emb.empresa else '-'))
-                self.table.setItem(row, 2, QTableWidgetItem(emb.nome))
-                self.table.setItem(row, 3, QTableWidgetItem(emb.tipo or '-'))
-                self.table.setItem(row, 4, QTableWidgetItem(str(emb.capacidade_pax or '-')))
-                self.table.setItem(row, 5, QTableWidgetItem(str(emb.comprimento_m or '-')))
-                self.table.setItem(row, 6, QTableWidgetItem(emb.inscricao or '-'))
-        finally:
-            session.close()
+        referencias = CACHE_REFERENCIAS.obter(self.SessionLocal)
+        self.table.setRowCount(0)
+        for emb in referencias.embarcacoes_ativas():
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            self.table.setItem(row, 0, QTableWidgetItem(str(emb.id)))
+            self.table.setItem(row, 1, QTableWidgetItem(referencias.nome_empresa(emb.empresa_id)))
+            self.table.setItem(row, 2, QTableWidgetItem(emb.nome))
+            self.table.setItem(row, 3, QTableWidgetItem(emb.tipo or '-'))
+            self.table.setItem(row, 4, QTableWidgetItem(str(emb.capacidade_pax or '-')))
+            self.table.setItem(row, 5, QTableWidgetItem(str(emb.comprimento_m or '-')))
+            self.table.setItem(row, 6, QTableWidgetItem(emb.inscricao or '-'))
@@ -334,6 +334,7 @@ class EmpresaDialog(QDialog):
 
 
 from models.services import EmpresaService, EmbarcacaoService, LogService
+from models.referencias import CACHE_REFERENCIAS
 from utils.validators import Validadores
 
 
@@ -410,24 +411,20 @@ class EmpresasTab(QWidget):
     
     def carregar_empresas(self):
         """Carrega empresas na tabela"""
-        session = self.SessionLocal()
-        try:
-            empresas = EmpresaService.listar_ativas(session)
-            
-            self.table.setRowCount(0)
+        empresas = CACHE_REFERENCIAS.obter(self.SessionLocal).empresas_ativas()
+        
+        self.table.setRowCount(0)
+        
+        for empresa in empresas:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
             
-            for empresa in empresas:
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                
-                self.table.setItem(row, 0, QTableWidgetItem(str(empresa.id)))
-                self.table.setItem(row, 1, QTableWidgetItem(empresa.nome))
-                self.table.setItem(row, 2, QTableWidgetItem(empresa.cnpj or '-'))
-                self.table.setItem(row, 3, QTableWidgetItem(empresa.contato_nome or '-'))
-                self.table.setItem(row, 4, QTableWidgetItem(empresa.contato_telefone or '-'))
-                self.table.setItem(row, 5, QTableWidgetItem(empresa.contato_email or '-'))
-        finally:
-            session.close()
+            self.table.setItem(row, 0, QTableWidgetItem(str(empresa.id)))
+            self.table.setItem(row, 1, QTableWidgetItem(empresa.nome))
+            self.table.setItem(row, 2, QTableWidgetItem(empresa.cnpj or '-'))
+            self.table.setItem(row, 3, QTableWidgetItem(empresa.contato_nome or '-'))
+            self.table.setItem(row, 4, QTableWidgetItem(empresa.contato_telefone or '-'))
+            self.table.setItem(row, 5, QTableWidgetItem(empresa.contato_email or '-'))
     
     def nova_empresa(self):
         """Abre dialog para criar nova empresa"""
@@ -0,0 +1,230 @@
+"""
+Gráficos leves desenhados com QPainter (sem um widget por ponto)
+"""
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtCore import Qt, QPointF, QRectF
+from PyQt6.QtGui import QPainter, QPainterPath, QColor, QPen, QFont
+
+
+# Paleta usada nas séries empilhadas (mesma ordem das categorias)
+CORES_SERIES = ['#0078d4', '#2e7d32', '#f9a825', '#8e24aa', '#9e9e9e', '#d32f2f']
+
+
+class GraficoSerieTemporal(QWidget):
+    """Gráfico de área (opcionalmente empilhado) para séries temporais"""
+
+    MARGEM_ESQ = 70
+    MARGEM_DIR = 15
+    MARGEM_TOPO = 30
+    MARGEM_BASE = 30
+
+    def __init__(self, titulo: str = '', parent=None):
+        super().__init__(parent)
+        self.titulo = titulo
+        self.rotulos = []
+        self.series = []  # lista de (nome, cor, valores)
+        self.empilhado = True
+        self.formatador = lambda v: f"{v:,.0f}".replace(',', '.')
+
+        self.setMinimumHeight(220)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+
+    def definir_dados(self, rotulos: list, series: list, empilhado: bool = True, formatador=None):
+        """
+        Define os dados do gráfico e agenda uma repintura
+
+        Args:
+            rotulos: Rótulos do eixo X (um por ponto)
+            series: Lista de tuplas (nome, cor, valores)
+            empilhado: Se True, as séries são somadas umas sobre as outras
+            formatador: Função para formatar os valores do eixo Y
+        """
+        self.rotulos = list(rotulos)
+        self.series = [(nome, cor, list(valores)) for nome, cor, valores in series]
+        self.empilhado = empilhado
+        if formatador:
+            self.formatador = formatador
+        self.update()
+
+    def _acumulados(self) -> list:
+        """Retorna os valores acumulados de cada série (topo de cada faixa)"""
+        n = len(self.rotulos)
+        base = [0.0] * n
+        acumulados = []
+        for _, _, valores in self.series:
+            if self.empilhado:
+                base = [base[i] + (valores[i] or 0) for i in range(n)]
+                acumulados.append(base)
+            else:
+                acumulados.append([float(v or 0) for v in valores])
+        return acumulados
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor('white'))
+
+        # Título
+        fonte_titulo = QFont()
+        fonte_titulo.setBold(True)
+        painter.setFont(fonte_titulo)
+        painter.setPen(QColor('#333'))
+        painter.drawText(QRectF(10, 5, self.width() - 20, 20), Qt.AlignmentFlag.AlignLeft, self.titulo)
+        painter.setFont(QFont())
+
+        area = QRectF(
+            self.MARGEM_ESQ, self.MARGEM_TOPO,
+            self.width() - self.MARGEM_ESQ - self.MARGEM_DIR,
+            self.height() - self.MARGEM_TOPO - self.MARGEM_BASE
+        )
+
+        n = len(self.rotulos)
+        if n == 0 or not self.series or area.width() <= 0 or area.height() <= 0:
+            painter.setPen(QColor('#999'))
+            painter.drawText(area, Qt.AlignmentFlag.AlignCenter, 'Sem dados no período')
+            painter.end()
+            return
+
+        acumulados = self._acumulados()
+        maximo = max((max(valores) for valores in acumulados), default=0) or 1.0
+
+        def x(i):
+            if n == 1:
+                return area.center().x()
+            return area.left() + area.width() * i / (n - 1)
+
+        def y(v):
+            return area.bottom() - area.height() * v / maximo
+
+        # Grade e eixo Y
+        painter.setPen(QPen(QColor('#e0e0e0'), 1))
+        for k in range(5):
+            valor = maximo * k / 4
+            yy = y(valor)
+            painter.drawLine(QPointF(area.left(), yy), QPointF(area.right(), yy))
+            painter.setPen(QColor('#666'))
+            painter.drawText(
+                QRectF(0, yy - 8, self.MARGEM_ESQ - 5, 16),
+                Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                self.formatador(valor)
+            )
+            painter.setPen(QPen(QColor('#e0e0e0'), 1))
+
+        # Rótulos do eixo X (no máximo ~8, espaçados)
+        painter.setPen(QColor('#666'))
+        passo = max(1, n // 8)
+        for i in range(0, n, passo):
+            painter.drawText(
+                QRectF(x(i) - 40, area.bottom() + 5, 80, 16),
+                Qt.AlignmentFlag.AlignHCenter, str(self.rotulos[i])
+            )
+
+        # Séries: um único path por faixa (de cima para baixo, para o empilhamento)
+        anteriores = [0.0] * n
+        faixas = []
+        for (nome, cor, _), topo in zip(self.series, acumulados):
+            path = QPainterPath()
+            path.moveTo(QPointF(x(0), y(topo[0])))
+            for i in range(1, n):
+                path.lineTo(QPointF(x(i), y(topo[i])))
+            if self.empilhado:
+                for i in range(n - 1, -1, -1):
+                    path.lineTo(QPointF(x(i), y(anteriores[i])))
+                path.closeSubpath()
+                anteriores = topo
+            faixas.append((nome, cor, path))
+
+        for nome, cor, path in faixas:
+            cor_q = QColor(cor)
+            painter.setPen(QPen(cor_q, 1.5))
+            if self.empilhado:
+                preenchimento = QColor(cor_q)
+                preenchimento.setAlpha(170)
+                painter.setBrush(preenchimento)
+            else:
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawPath(path)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        # Legenda
+        if len(self.series) > 1:
+            lx = area.right()
+            for nome, cor, _ in reversed(self.series):
+                largura = painter.fontMetrics().horizontalAdvance(nome) + 22
+                lx -= largura
+                painter.fillRect(QRectF(lx, 10, 10, 10), QColor(cor))
+                painter.setPen(QColor('#333'))
+                painter.drawText(QPointF(lx + 14, 19), nome)
+
+        painter.end()
+
+
+class GraficoRanking(QWidget):
+    """Gráfico de barras horizontais para rankings (top N)"""
+
+    def __init__(self, titulo: str = '', cor: str = '#0078d4', parent=None):
+        super().__init__(parent)
+        self.titulo = titulo
+        self.cor = cor
+        self.itens = []  # lista de (nome, valor)
+        self.formatador = lambda v: f"{v:,.0f}".replace(',', '.')
+
+        self.setMinimumHeight(160)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
+
+    def definir_dados(self, itens: list, formatador=None):
+        """Define os itens (nome, valor) e agenda uma repintura"""
+        self.itens = list(itens)
+        if formatador:
+            self.formatador = formatador
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor('white'))
+
+        fonte_titulo = QFont()
+        fonte_titulo.setBold(True)
+        painter.setFont(fonte_titulo)
+        painter.setPen(QColor('#333'))
+        painter.drawText(QRectF(10, 5, self.width() - 20, 20), Qt.AlignmentFlag.AlignLeft, self.titulo)
+        painter.setFont(QFont())
+
+        if not self.itens:
+            painter.setPen(QColor('#999'))
+            painter.drawText(
+                QRectF(0, 25, self.width(), self.height() - 25),
+                Qt.AlignmentFlag.AlignCenter, 'Sem dados no período'
+            )
+            painter.end()
+            return
+
+        topo = 30
+        altura_linha = min(28, max(14, (self.height() - topo - 5) / len(self.itens)))
+        largura_nome = min(140, self.width() * 0.35)
+        largura_valor = 70
+        largura_barra = max(1, self.width() - largura_nome - largura_valor - 30)
+        maximo = max(v for _, v in self.itens) or 1
+
+        for i, (nome, valor) in enumerate(self.itens):
+            yy = topo + i * altura_linha
+            painter.setPen(QColor('#333'))
+            painter.drawText(
+                QRectF(10, yy, largura_nome - 5, altura_linha),
+                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                painter.fontMetrics().elidedText(nome, Qt.TextElideMode.ElideRight, int(largura_nome - 5))
+            )
+            comprimento = largura_barra * valor / maximo
+            painter.fillRect(
+                QRectF(10 + largura_nome, yy + altura_linha * 0.2, comprimento, altura_linha * 0.6),
+                QColor(self.cor)
+            )
+            painter.setPen(QColor('#666'))
+            painter.drawText(
+                QRectF(15 + largura_nome + comprimento, yy, largura_valor, altura_linha),
+                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                self.formatador(valor)
+            )
+
+        painter.end()
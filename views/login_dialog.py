@@ -3,10 +3,11 @@ Tela de login do sistema
 """
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-    QLineEdit, QPushButton, QMessageBox, QWidget
+    QLineEdit, QPushButton, QMessageBox, QWidget, QProgressBar
 )
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QPixmap
+import threading
 
 from models.database import init_db
 from models.services import UsuarioService
@@ -17,11 +18,19 @@ class LoginDialog(QDialog):
     
     login_successful = pyqtSignal(str)  # Emite o username quando login é bem-sucedido
     
+    # Resultado da autenticação em segundo plano: (username, is_admin) ou None
+    autenticacao_concluida = pyqtSignal(object)
+    erro_autenticacao = pyqtSignal(str)
+    
     def __init__(self, db_path: str = 'abrolhos_ingressos.db'):
         super().__init__()
         self.db_path = db_path
         self.engine, self.SessionLocal = init_db(db_path)
         self.usuario_logado = None
+        self.autenticando = False
+        
+        self.autenticacao_concluida.connect(self._on_autenticacao_concluida)
+        self.erro_autenticacao.connect(self._on_erro_autenticacao)
         
         self.init_ui()
         
@@ -102,6 +111,14 @@ class LoginDialog(QDialog):
         self.login_button.clicked.connect(self.do_login)
         layout.addWidget(self.login_button)
         
+        # Indicador exibido enquanto a senha é verificada (bcrypt)
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 0)
+        self.progress.setTextVisible(False)
+        self.progress.setMaximumHeight(6)
+        self.progress.setVisible(False)
+        layout.addWidget(self.progress)
+        
         self.cancel_button = QPushButton('Cancelar')
         self.cancel_button.setCursor(Qt.CursorShape.PointingHandCursor)
         self.cancel_button.setFlat(True)
@@ -192,7 +209,10 @@ class LoginDialog(QDialog):
         self.cancel_button.setObjectName('cancel_button')
     
     def do_login(self):
-        """Executa o processo de login"""
+        """Executa o processo de login (verificação da senha fora da thread da UI)"""
+        if self.autenticando:
+            return
+        
         username = self.username_input.text().strip()
         password = self.password_input.text()
         
@@ -204,29 +224,58 @@ class LoginDialog(QDialog):
             )
             return
         
-        # Tenta autenticar
+        self._definir_autenticando(True)
+        
+        t = threading.Thread(target=self._worker_autenticacao, args=(username, password))
+        t.daemon = True
+        t.start()
+    
+    def _worker_autenticacao(self, username: str, password: str):
+        """Autentica (e re-hasheia a senha, se preciso) e emite o resultado"""
         session = self.SessionLocal()
         try:
             usuario = UsuarioService.autenticar(session, username, password)
-            
-            if usuario:
-                self.usuario_logado = usuario.username
-                self.is_admin = usuario.is_admin
-                self.login_successful.emit(usuario.username)
-                self.accept()
-            else:
-                QMessageBox.critical(
-                    self,
-                    'Erro de autenticação',
-                    'Usuário ou senha inválidos.'
-                )
-                self.password_input.clear()
-                self.password_input.setFocus()
         except Exception as e:
+            sinal, argumento = self.erro_autenticacao, str(e)
+        else:
+            sinal = self.autenticacao_concluida
+            argumento = (usuario.username, usuario.is_admin) if usuario else None
+        finally:
+            session.close()
+        try:
+            sinal.emit(argumento)
+        except RuntimeError:
+            # Diálogo destruído antes do fim da verificação
+            pass
+    
+    def _definir_autenticando(self, autenticando: bool):
+        self.autenticando = autenticando
+        self.username_input.setEnabled(not autenticando)
+        self.password_input.setEnabled(not autenticando)
+        self.login_button.setEnabled(not autenticando)
+        self.login_button.setText('VERIFICANDO...' if autenticando else 'ENTRAR')
+        self.progress.setVisible(autenticando)
+    
+    def _on_autenticacao_concluida(self, resultado):
+        self._definir_autenticando(False)
+        
+        if resultado:
+            self.usuario_logado, self.is_admin = resultado
+            self.login_successful.emit(self.usuario_logado)
+            self.accept()
+        else:
             QMessageBox.critical(
                 self,
-                'Erro',
-                f'Erro ao autenticar: {str(e)}'
+                'Erro de autenticação',
+                'Usuário ou senha inválidos.'
             )
-        finally:
-            session.close()
+            self.password_input.clear()
+            self.password_input.setFocus()
+    
+    def _on_erro_autenticacao(self, mensagem: str):
+        self._definir_autenticando(False)
+        QMessageBox.critical(
+            self,
+            'Erro',
+            f'Erro ao autenticar: {mensagem}'
+        )
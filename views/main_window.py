@@ -4,20 +4,46 @@ Janela principal do sistema Abrolhos Ingressos
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
     QMenuBar, QMenu, QStatusBar, QMessageBox, QLabel, QPushButton,
-    QFileDialog
+    QFileDialog, QProgressBar
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QAction, QFont, QIcon
-from datetime import datetime
-import shutil
+from datetime import datetime, date
 import os
+import threading
 
-from models.database import init_db
+from models.database import init_db, Usuario
+from models.auditoria import GravadorAuditoria
+from models.backup import BackupBanco, BackupAutomatico
+from models.instrumentacao import MONITOR_SQL, PERFIL
+from models.referencias import CACHE_REFERENCIAS
+from models.services import LogService, RegistroVisitaService, TokenAPIService, VersaoTabelaService
+
+
+# Intervalo da atualização automática ligada pelo menu sem ABROLHOS_ATUALIZACAO_AUTOMATICA
+INTERVALO_ATUALIZACAO_PADRAO = 10
+
+# Validade do token emitido para as notificações quando o servidor usa o mesmo
+# banco; é renovado pelo ouvinte ao expirar, e um token perdido (ex.: queda do
+# app) deixa de valer em poucas horas
+VALIDADE_TOKEN_EVENTOS_HORAS = 2
 
 
 class MainWindow(QMainWindow):
     """Janela principal do sistema"""
     
+    # Sinais do backup feito em segundo plano
+    backup_progresso = pyqtSignal(int, int)  # (páginas copiadas, total)
+    backup_concluido = pyqtSignal(dict)
+    backup_erro = pyqtSignal(str)
+    
+    # Sinais da verificação de alterações (versões lidas, verificação manual)
+    versoes_lidas = pyqtSignal(dict, bool)
+    versoes_erro = pyqtSignal(str, bool)
+    
+    # Notificação recebida do servidor de sincronização (GET /eventos)
+    evento_recebido = pyqtSignal(dict)
+    
     def __init__(self, usuario_logado: str, is_admin: bool = False, db_path: str = 'abrolhos_ingressos.db'):
         super().__init__()
         
@@ -26,8 +52,35 @@ class MainWindow(QMainWindow):
         self.db_path = db_path
         self.engine, self.SessionLocal = init_db(db_path)
         
+        # Log de auditoria gravado em lotes, fora da thread da UI
+        self.gravador_auditoria = GravadorAuditoria(self.SessionLocal)
+        self.gravador_auditoria.iniciar()
+        LogService.configurar_gravador(self.gravador_auditoria)
+        
+        # Backups automáticos com rotação (ABROLHOS_BACKUP_*)
+        self.backup_automatico = BackupAutomatico(db_path)
+        self.backup_automatico.iniciar()
+        
+        # Modo de perfilamento pela variável de ambiente ABROLHOS_PERFIL=1
+        self._monitor_instalado_pelo_perfil = False
+        if PERFIL.ativo:
+            self.alternar_perfilamento(True)
+        
+        # Versões das tabelas refletidas nas abas (lidas antes da carga inicial)
+        session = self.SessionLocal()
+        try:
+            self._versoes_carregadas = VersaoTabelaService.versoes(session)
+        finally:
+            session.close()
+        self._verificando_alteracoes = False
+        
         self.init_ui()
         
+        # Registros recebidos pelo servidor aparecem sem F5 (ABROLHOS_SERVIDOR_URL)
+        self.ouvinte_eventos = None
+        self._token_eventos = None
+        self._iniciar_ouvinte_eventos()
+        
     def init_ui(self):
         """Inicializa a interface do usuário"""
         self.setWindowTitle('Abrolhos Ingressos - Sistema de Gestão')
@@ -69,6 +122,11 @@ class MainWindow(QMainWindow):
         self.relatorios_tab = RelatoriosTab(self.SessionLocal) # Relatórios apenas leitura ou log interno
         self.usuarios_tab = UsuariosTab(self.SessionLocal, self.usuario_logado)
         
+        # Dashboard é atualizado em segundo plano após alterações nos registros
+        self.registros_tab.registros_alterados.connect(self.dashboard_tab.carregar_dados)
+        self.precos_tab.precos_alterados.connect(self.registros_tab.invalidar_tabela_precos)
+        self.precos_tab.recalculo_solicitado.connect(self.abrir_recalculo)
+        
         self.tabs.addTab(self.dashboard_tab, '📊 Dashboard')
         self.tabs.addTab(self.registros_tab, '📝 Registros Diários')
         self.tabs.addTab(self.empresas_tab, '🏢 Empresas')
@@ -79,6 +137,12 @@ class MainWindow(QMainWindow):
         if self.is_admin:
             self.tabs.addTab(self.usuarios_tab, '👥 Usuários')
         
+        # Busca global no canto da barra de abas
+        from views.busca_global import BuscaGlobal
+        self.busca_global = BuscaGlobal(self.SessionLocal)
+        self.busca_global.resultado_escolhido.connect(self.abrir_resultado_busca)
+        self.tabs.setCornerWidget(self.busca_global, Qt.Corner.TopRightCorner)
+        
         layout.addWidget(self.tabs)
         self.central_widget.setLayout(layout)
         
@@ -120,6 +184,32 @@ class MainWindow(QMainWindow):
         atualizar_action.triggered.connect(self.atualizar_dados)
         tools_menu.addAction(atualizar_action)
         
+        self.auto_atualizar_action = QAction('Atualização A&utomática', self)
+        self.auto_atualizar_action.setCheckable(True)
+        self.auto_atualizar_action.toggled.connect(self.alternar_atualizacao_automatica)
+        tools_menu.addAction(self.auto_atualizar_action)
+        
+        buscar_action = QAction('&Buscar...', self)
+        buscar_action.setShortcut('Ctrl+F')
+        buscar_action.triggered.connect(lambda: (self.busca_global.setFocus(), self.busca_global.selectAll()))
+        tools_menu.addAction(buscar_action)
+        
+        recalculo_action = QAction('&Recalcular Valores dos Registros...', self)
+        recalculo_action.triggered.connect(lambda: self.abrir_recalculo())
+        tools_menu.addAction(recalculo_action)
+        
+        tools_menu.addSeparator()
+        
+        monitor_action = QAction('&Monitor SQL...', self)
+        monitor_action.triggered.connect(self.abrir_monitor_sql)
+        tools_menu.addAction(monitor_action)
+        
+        self.perfil_action = QAction('Modo de &Perfilamento', self)
+        self.perfil_action.setCheckable(True)
+        self.perfil_action.setChecked(PERFIL.ativo)
+        self.perfil_action.toggled.connect(self.alternar_perfilamento)
+        tools_menu.addAction(self.perfil_action)
+        
         # Menu Ajuda
         help_menu = menubar.addMenu('&Ajuda')
         
@@ -142,12 +232,35 @@ class MainWindow(QMainWindow):
         self.datetime_label.setStyleSheet('padding: 5px;')
         self.statusBar.addPermanentWidget(self.datetime_label)
         
+        # Progresso do backup manual
+        self.backup_progress = QProgressBar()
+        self.backup_progress.setMaximumWidth(200)
+        self.backup_progress.setFormat('Backup %p%')
+        self.backup_progress.hide()
+        self.statusBar.addPermanentWidget(self.backup_progress)
+        self.backup_progresso.connect(self._atualizar_progresso_backup)
+        self.backup_concluido.connect(self._backup_concluido)
+        self.backup_erro.connect(self._backup_falhou)
+        
         # Atualizar data/hora a cada segundo
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_datetime)
         self.timer.start(1000)
         self.update_datetime()
         
+        # Atualização automática: verifica as versões das tabelas periodicamente
+        self.versoes_lidas.connect(self._aplicar_alteracoes)
+        self.versoes_erro.connect(self._verificacao_falhou)
+        self.timer_alteracoes = QTimer(self)
+        self.timer_alteracoes.timeout.connect(self.verificar_alteracoes)
+        try:
+            intervalo = int(os.getenv('ABROLHOS_ATUALIZACAO_AUTOMATICA', '0'))
+        except ValueError:
+            intervalo = 0
+        if intervalo > 0:
+            self.timer_alteracoes.setInterval(intervalo * 1000)
+            self.auto_atualizar_action.setChecked(True)
+        
         self.statusBar.showMessage('Sistema iniciado com sucesso')
         
     def update_datetime(self):
@@ -156,54 +269,346 @@ class MainWindow(QMainWindow):
         self.datetime_label.setText(now.strftime('%d/%m/%Y %H:%M:%S'))
         
     def fazer_backup(self):
-        """Realiza backup do banco de dados"""
+        """Realiza backup do banco de dados
+        
+        Usa a API de backup online do SQLite em segundo plano, de modo que a
+        interface e a API de sincronização continuam gravando durante a cópia.
+        """
+        if self.backup_progress.isVisible():
+            QMessageBox.information(self, 'Backup', 'Já existe um backup em andamento.')
+            return
+        
+        # Abre dialog para escolher onde salvar
+        file_path, filtro = QFileDialog.getSaveFileName(
+            self,
+            'Salvar Backup do Banco de Dados',
+            f'abrolhos_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db',
+            'Database Files (*.db);;Compactado gzip (*.db.gz);;Compactado zstd (*.db.zst)'
+        )
+        
+        if not file_path:
+            return
+        
+        if file_path.endswith('.gz') or 'gzip' in filtro:
+            compressao = 'gzip'
+        elif file_path.endswith('.zst') or 'zstd' in filtro:
+            compressao = 'zstd'
+        else:
+            compressao = None
+        extensao = {'gzip': '.gz', 'zstd': '.zst'}.get(compressao, '')
+        if extensao and not file_path.endswith(extensao):
+            file_path += extensao
+        
+        self.backup_progress.setRange(0, 0)
+        self.backup_progress.show()
+        self.statusBar.showMessage('Realizando backup...')
+        
+        t = threading.Thread(target=self._worker_backup, args=(file_path, compressao))
+        t.daemon = True
+        t.start()
+    
+    def _worker_backup(self, file_path: str, compressao: str):
+        """Copia e verifica o banco fora da thread da UI"""
         try:
-            # Abre dialog para escolher onde salvar
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                'Salvar Backup do Banco de Dados',
-                f'abrolhos_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db',
-                'Database Files (*.db)'
+            resultado = BackupBanco.executar(
+                self.db_path, file_path, compressao,
+                progresso=lambda copiadas, total: self.backup_progresso.emit(copiadas, total)
             )
-            
-            if file_path:
-                # Copia o arquivo do banco
-                shutil.copy2(self.db_path, file_path)
-                
-                QMessageBox.information(
-                    self,
-                    'Backup realizado',
-                    f'Backup salvo com sucesso em:\n{file_path}'
-                )
-                
-                self.statusBar.showMessage(f'Backup realizado: {os.path.basename(file_path)}', 5000)
-                
+            self.backup_concluido.emit(resultado)
         except Exception as e:
-            QMessageBox.critical(
-                self,
-                'Erro no backup',
-                f'Erro ao realizar backup:\n{str(e)}'
-            )
+            try:
+                self.backup_erro.emit(str(e))
+            except RuntimeError:
+                # Janela destruída durante o backup
+                pass
+    
+    def _atualizar_progresso_backup(self, copiadas: int, total: int):
+        self.backup_progress.setRange(0, max(total, 1))
+        self.backup_progress.setValue(copiadas)
+    
+    def _backup_concluido(self, resultado: dict):
+        self.backup_progress.hide()
+        file_path = resultado['arquivo']
+        arquivo_temporadas = resultado.get('arquivo_temporadas')
+        complemento = (
+            f'\n\nTemporadas arquivadas salvas em:\n{arquivo_temporadas["arquivo"]}'
+            if arquivo_temporadas else ''
+        )
+        QMessageBox.information(
+            self,
+            'Backup realizado',
+            f'Backup salvo com sucesso em:\n{file_path}\n\n'
+            f'Tamanho: {resultado["tamanho"] / 1024 / 1024:.1f} MB — '
+            f'integridade verificada ({resultado["duracao"]:.1f} s){complemento}'
+        )
+        self.statusBar.showMessage(f'Backup realizado: {os.path.basename(file_path)}', 5000)
+    
+    def _backup_falhou(self, mensagem: str):
+        self.backup_progress.hide()
+        self.statusBar.clearMessage()
+        QMessageBox.critical(
+            self,
+            'Erro no backup',
+            f'Erro ao realizar backup:\n{mensagem}'
+        )
             
     def atualizar_dados(self):
-        """Atualiza os dados em todas as abas"""
+        """Recarrega as abas cujas tabelas foram alteradas (F5)"""
+        self.verificar_alteracoes(manual=True)
+    
+    def verificar_alteracoes(self, manual: bool = False):
+        """Lê as versões das tabelas em segundo plano (uma consulta)"""
+        if self._verificando_alteracoes:
+            return
+        self._verificando_alteracoes = True
+        
+        t = threading.Thread(target=self._worker_versoes, args=(manual,))
+        t.daemon = True
+        t.start()
+    
+    def _worker_versoes(self, manual: bool):
+        """Executado na thread de trabalho; o resultado volta por sinal"""
         try:
-            # Atualiza cada aba
-            self.dashboard_tab.carregar_dados()
-            self.empresas_tab.carregar_empresas()
-            self.embarcacoes_tab.carregar_embarcacoes()
-            self.precos_tab.carregar_precos()
-            self.registros_tab.carregar_registros()
+            session = self.SessionLocal()
+            try:
+                versoes = VersaoTabelaService.versoes(session)
+            finally:
+                session.close()
+            self.versoes_lidas.emit(versoes, manual)
+        except Exception as e:
+            try:
+                self.versoes_erro.emit(str(e), manual)
+            except RuntimeError:
+                pass  # Janela já destruída
+    
+    def _aplicar_alteracoes(self, versoes: dict, manual: bool):
+        """Recarrega apenas as abas afetadas pelas tabelas alteradas"""
+        self._verificando_alteracoes = False
+        alteradas = VersaoTabelaService.alteradas(self._versoes_carregadas, versoes)
+        self._versoes_carregadas = versoes
+        
+        if not alteradas:
+            if manual:
+                self.statusBar.showMessage('Nenhuma alteração desde a última atualização', 3000)
+            return
+        
+        try:
+            with PERFIL.medir('atualizar_dados'):
+                self.recarregar_abas(alteradas)
             
             self.statusBar.showMessage('Dados atualizados', 3000)
             
         except Exception as e:
+            if manual:
+                QMessageBox.warning(
+                    self,
+                    'Erro ao atualizar',
+                    f'Erro ao atualizar dados:\n{str(e)}'
+                )
+            else:
+                self.statusBar.showMessage(f'Erro na atualização automática: {e}', 5000)
+    
+    def _verificacao_falhou(self, mensagem: str, manual: bool):
+        self._verificando_alteracoes = False
+        if manual:
             QMessageBox.warning(
                 self,
                 'Erro ao atualizar',
-                f'Erro ao atualizar dados:\n{str(e)}'
+                f'Erro ao atualizar dados:\n{mensagem}'
             )
+    
+    def recarregar_abas(self, tabelas: set):
+        """Recarrega as abas que exibem alguma das tabelas informadas"""
+        referencias = {'empresas', 'embarcacoes'}
+        registros = {'registros_visita'} | referencias
+        
+        if tabelas & referencias:
+            # Empresas/embarcações alteradas (possivelmente por outro computador)
+            CACHE_REFERENCIAS.invalidar(self.SessionLocal)
+        
+        # O dashboard carrega em segundo plano
+        if tabelas & registros:
+            self.dashboard_tab.carregar_dados()
+        if 'empresas' in tabelas:
+            self.empresas_tab.carregar_empresas()
+        if tabelas & referencias:
+            self.embarcacoes_tab.carregar_embarcacoes()
+        if 'tabela_preco_ingresso' in tabelas:
+            self.precos_tab.carregar_precos()
+            self.registros_tab.invalidar_tabela_precos()
+        if tabelas & registros:
+            self.registros_tab.carregar_registros()
+        if 'usuarios' in tabelas and self.is_admin:
+            self.usuarios_tab.carregar_usuarios()
+    
+    def _iniciar_ouvinte_eventos(self):
+        """Conecta às notificações do servidor, se configurado"""
+        url = os.getenv('ABROLHOS_SERVIDOR_URL')
+        if not url:
+            return
+        from utils.sync_client import SyncClient, OuvinteEventos
+        
+        token = os.getenv('ABROLHOS_SERVIDOR_TOKEN')
+        renovar_token = None
+        if not token:
+            # Um token gravado neste banco só vale se o servidor usar o mesmo banco
+            if os.getenv('ABROLHOS_SERVIDOR_BANCO_COMPARTILHADO') != '1':
+                print('Notificações do servidor desativadas: defina ABROLHOS_SERVIDOR_TOKEN '
+                      '(ou ABROLHOS_SERVIDOR_BANCO_COMPARTILHADO=1)')
+                return
+            token = self._emitir_token_eventos()
+            if token is None:
+                return
+            renovar_token = self._emitir_token_eventos
+        
+        self.evento_recebido.connect(self._aplicar_evento)
+        self.ouvinte_eventos = OuvinteEventos(
+            SyncClient(url, token=token), self._preparar_evento, renovar_token=renovar_token
+        )
+        self.ouvinte_eventos.iniciar()
+    
+    def _emitir_token_eventos(self):
+        """
+        Emite um token de curta duração para o usuário logado, revogando o
+        anterior (também chamado pela thread do ouvinte, ao expirar)
+        """
+        session = self.SessionLocal()
+        try:
+            usuario = session.query(Usuario).filter_by(username=self.usuario_logado, ativo=True).first()
+            if usuario is None:
+                return None
+            if self._token_eventos:
+                TokenAPIService.revogar(session, self._token_eventos, commit=False)
+            token, _ = TokenAPIService.emitir(
+                session, usuario, validade_horas=VALIDADE_TOKEN_EVENTOS_HORAS,
+                descricao='Notificações (app desktop)'
+            )
+            self._token_eventos = TokenAPIService.hash_token(token)
+            return token
+        except Exception as e:
+            session.rollback()
+            print(f"Erro ao emitir o token das notificações: {e}")
+            return None
+        finally:
+            session.close()
+    
+    def _parar_ouvinte_eventos(self):
+        if self.ouvinte_eventos is None:
+            return
+        self.ouvinte_eventos.parar()
+        if self._token_eventos:
+            session = self.SessionLocal()
+            try:
+                TokenAPIService.revogar(session, self._token_eventos)
+            finally:
+                session.close()
+    
+    def _preparar_evento(self, evento: dict):
+        """Na thread do ouvinte: lê os registros notificados antes de passar o evento à UI"""
+        incremental = (
+            evento.get('tipo') == 'alteracao'
+            and evento.get('tabela') == 'registros_visita'
+            and evento.get('acao') == 'INSERT'
+        )
+        registros = None
+        if incremental:
+            session = self.SessionLocal()
+            try:
+                registros = RegistroVisitaService.listar_por_ids(session, evento['ids'])
+            except Exception as e:
+                print(f"Erro ao ler os registros notificados: {e}")
+            finally:
+                session.close()
+            if registros is not None and len(registros) != len(evento['ids']):
+                # Registros já alterados/excluídos ou banco diferente do servidor
+                registros = None
+        
+        try:
+            self.evento_recebido.emit(dict(evento, registros=registros))
+        except RuntimeError:
+            pass  # Janela já destruída
+    
+    def _aplicar_evento(self, evento: dict):
+        """Registros gravados pelo servidor: inclui as linhas e soma os totais, sem recarregar"""
+        registros = evento['registros']
+        if registros is None:
+            # `ressincronizar` (eventos perdidos) ou alteração sem tratamento próprio
+            self.verificar_alteracoes()
+            return
+        
+        self.registros_tab.incluir_registros(registros)
+        self.dashboard_tab.somar_registros(registros)
+        
+        # A notificação era a única diferença: evita recarregar as abas no próximo F5
+        antes, depois = evento['versao']
+        if self._versoes_carregadas.get('registros_visita') == antes:
+            self._versoes_carregadas['registros_visita'] = depois
+    
+    def alternar_atualizacao_automatica(self, ativo: bool):
+        """Liga/desliga a verificação periódica de alterações (ex.: feitas pelo servidor)"""
+        if ativo:
+            if self.timer_alteracoes.interval() <= 0:
+                self.timer_alteracoes.setInterval(INTERVALO_ATUALIZACAO_PADRAO * 1000)
+            self.timer_alteracoes.start()
+        else:
+            self.timer_alteracoes.stop()
+        
+        if isinstance(self.statusBar, QStatusBar):
+            estado = (f'ativada (a cada {self.timer_alteracoes.interval() // 1000} s)'
+                      if ativo else 'desativada')
+            self.statusBar.showMessage(f'Atualização automática {estado}', 5000)
             
+    def abrir_resultado_busca(self, resultado):
+        """Mostra na aba correspondente o item escolhido na busca global"""
+        if resultado.tipo == 'registro':
+            self.tabs.setCurrentWidget(self.registros_tab)
+            self.registros_tab.mostrar_registro(resultado.id, resultado.data)
+            return
+        
+        aba = self.empresas_tab if resultado.tipo == 'empresa' else self.embarcacoes_tab
+        self.tabs.setCurrentWidget(aba)
+        for row in range(aba.table.rowCount()):
+            if aba.table.item(row, 0).text() == str(resultado.id):
+                aba.table.selectRow(row)
+                aba.table.scrollToItem(aba.table.item(row, 0))
+                break
+    
+    def abrir_recalculo(self, ano_inicio: int = None, ano_fim: int = None):
+        """Abre o diálogo de recálculo em lote (padrão: ano corrente)"""
+        from views.recalculo_dialog import RecalculoDialog
+        
+        ano_atual = datetime.now().year
+        data_inicio = date(ano_inicio or ano_atual, 1, 1)
+        data_fim = date(ano_fim or ano_inicio or ano_atual, 12, 31)
+        
+        dialog = RecalculoDialog(self.SessionLocal, self.usuario_logado, data_inicio, data_fim, self)
+        dialog.valores_recalculados.connect(self.dashboard_tab.carregar_dados)
+        dialog.valores_recalculados.connect(self.registros_tab.carregar_registros)
+        dialog.exec()
+        
+    def abrir_monitor_sql(self):
+        """Abre o painel do monitor SQL (não modal, para acompanhar as outras telas)"""
+        from views.monitor_sql_dialog import MonitorSQLDialog
+        
+        if getattr(self, 'monitor_sql_dialog', None) is None:
+            self.monitor_sql_dialog = MonitorSQLDialog(self.engine, self)
+        self.monitor_sql_dialog.show()
+        self.monitor_sql_dialog.raise_()
+        
+    def alternar_perfilamento(self, ativo: bool):
+        """Liga/desliga o modo de perfilamento (instala o monitor SQL para contar as consultas)"""
+        PERFIL.ativar(ativo)
+        if ativo and self.engine not in MONITOR_SQL.engines:
+            MONITOR_SQL.instalar(self.engine)
+            self._monitor_instalado_pelo_perfil = True
+        elif not ativo and self._monitor_instalado_pelo_perfil:
+            MONITOR_SQL.remover(self.engine)
+            self._monitor_instalado_pelo_perfil = False
+        
+        if isinstance(self.statusBar, QStatusBar):
+            estado = f'ativado (gravando em {os.path.abspath(PERFIL.arquivo)})' if ativo else 'desativado'
+            self.statusBar.showMessage(f'Modo de perfilamento {estado}', 5000)
+        
     def mostrar_sobre(self):
         """Mostra dialog sobre o sistema"""
         about_text = """
@@ -274,161 +679,77 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            # Garante que as entradas de auditoria pendentes sejam gravadas
+            self.gravador_auditoria.parar()
+            LogService.configurar_gravador(None)
+            self.backup_automatico.parar()
+            self.timer_alteracoes.stop()
+            self._parar_ouvinte_eventos()
             event.accept()
         else:
             event.ignore()
 
     def importar_csv(self):
         """Importa registros de um arquivo CSV"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            'Importar Registros (CSV)',
+            '',
+            'Arquivos CSV (*.csv);;Todos os Arquivos (*)'
+        )
+        
+        if file_path:
+            self.importar_arquivo_csv(file_path)
+    
+    @PERFIL.medir('importacao.csv')
+    def importar_arquivo_csv(self, file_path: str):
+        """Valida e grava os registros do CSV escolhido"""
         try:
-            file_path, _ = QFileDialog.getOpenFileName(
-                self,
-                'Importar Registros (CSV)',
-                '',
-                'Arquivos CSV (*.csv);;Todos os Arquivos (*)'
-            )
-            
-            if not file_path:
-                return
-                
-            # Importar pandas aqui para não pesar na inicialização se não for usado
-            import pandas as pd
-            from models.database import Empresa, Embarcacao
             from models.services import RegistroVisitaService
-            from sqlalchemy import func
+            from utils.importacao_csv import ImportadorCSV, ColunasFaltandoError
             
             # Ler CSV
             try:
-                df = pd.read_csv(file_path)
+                df = ImportadorCSV.ler_arquivo(file_path)
             except Exception as e:
                 QMessageBox.critical(self, 'Erro ao ler arquivo', f'Não foi possível ler o arquivo CSV:\n{str(e)}')
                 return
             
-            # Normalizar colunas (remover espaços e converter para minúsculas para verificação)
-            df.columns = df.columns.str.strip().str.lower()
-            
-            # Mapeamento de colunas esperadas para colunas internas
-            colunas_map = {
-                'data': 'data',
-                'empresa': 'empresa',
-                'embarcacao': 'embarcacao', # ou embarcação
-                'embarcação': 'embarcacao',
-                'permanencia': 'permanencia', # ou permanência
-                'permanência': 'permanencia',
-                'estrangeiros': 'qtde_estrangeiros',
-                'mercosul': 'qtde_mercosul',
-                'brasileiros': 'qtde_brasileiros',
-                'entorno': 'qtde_entorno',
-                'isentos': 'qtde_isentos'
-            }
-            
-            # Verificar colunas obrigatórias
-            colunas_encontradas = {}
-            for col_csv in df.columns:
-                if col_csv in colunas_map:
-                    colunas_encontradas[colunas_map[col_csv]] = col_csv
-            
-            required = ['data', 'empresa', 'embarcacao', 'permanencia']
-            missing = [req for req in required if req not in colunas_encontradas]
-            
-            if missing:
-                QMessageBox.warning(
-                    self, 
-                    'Colunas faltando', 
-                    f'O arquivo CSV deve conter as colunas:\n{", ".join(missing)}\n\n'
-                    f'Colunas encontradas: {", ".join(df.columns)}'
-                )
-                return
-            
             session = self.SessionLocal()
-            sucessos = 0
-            erros = []
-            
-            # Para rastrear o intervalo de datas importado
-            min_date = None
-            max_date = None
             
             try:
-                for index, row in df.iterrows():
-                    linha = index + 2  # +1 do header, +1 do índice 0-based
-                    
-                    try:
-                        # 1. Parse Data
-                        data_str = str(row[colunas_encontradas['data']])
-                        try:
-                            # Tenta dd/mm/yyyy
-                            data_visita = datetime.strptime(data_str, '%d/%m/%Y').date()
-                        except ValueError:
-                            try:
-                                # Tenta yyyy-mm-dd
-                                data_visita = datetime.strptime(data_str, '%Y-%m-%d').date()
-                            except ValueError:
-                                raise ValueError(f"Formato de data inválido: {data_str}. Use DD/MM/YYYY.")
-                        
-                        # Atualiza range de datas
-                        if min_date is None or data_visita < min_date:
-                            min_date = data_visita
-                        if max_date is None or data_visita > max_date:
-                            max_date = data_visita
-                            
-                        # 2. Buscar Empresa (Case insensitive)
-                        nome_empresa = str(row[colunas_encontradas['empresa']]).strip()
-                        empresa = session.query(Empresa).filter(
-                            func.lower(Empresa.nome) == nome_empresa.lower()
-                        ).first()
-                        
-                        if not empresa:
-                            raise ValueError(f"Empresa não encontrada: {nome_empresa}")
-                        
-                        # 3. Buscar Embarcação (Case insensitive, na empresa encontrada)
-                        nome_embarcacao = str(row[colunas_encontradas['embarcacao']]).strip()
-                        embarcacao = session.query(Embarcacao).filter(
-                            func.lower(Embarcacao.nome) == nome_embarcacao.lower(),
-                            Embarcacao.empresa_id == empresa.id
-                        ).first()
-                        
-                        if not embarcacao:
-                            raise ValueError(f"Embarcação não encontrada nesta empresa: {nome_embarcacao}")
-                        
-                        # 4. Dados numéricos
-                        try:
-                            permanencia = int(row[colunas_encontradas['permanencia']])
-                        except:
-                            permanencia = 1
-                            
-                        def get_int(key):
-                            if key in colunas_encontradas:
-                                try:
-                                    val = row[colunas_encontradas[key]]
-                                    return int(val) if pd.notna(val) else 0
-                                except:
-                                    return 0
-                            return 0
-                            
-                        quantidades = {
-                            'qtde_estrangeiros': get_int('qtde_estrangeiros'),
-                            'qtde_mercosul': get_int('qtde_mercosul'),
-                            'qtde_brasileiros': get_int('qtde_brasileiros'),
-                            'qtde_entorno': get_int('qtde_entorno'),
-                            'qtde_isentos': get_int('qtde_isentos')
-                        }
-                        
-                        # 5. Criar Registro
-                        RegistroVisitaService.criar(
-                            session,
-                            data=data_visita,
-                            empresa_id=empresa.id,
-                            embarcacao_id=embarcacao.id,
-                            permanencia=permanencia,
-                            quantidades=quantidades
-                        )
-                        sucessos += 1
-                        
-                    except Exception as row_error:
-                        erros.append(f"Linha {linha}: {str(row_error)}")
+                try:
+                    resultado = ImportadorCSV.preparar_registros(session, df)
+                except ColunasFaltandoError as e:
+                    QMessageBox.warning(
+                        self, 
+                        'Colunas faltando', 
+                        f'O arquivo CSV deve conter as colunas:\n{", ".join(e.faltando)}\n\n'
+                        f'Colunas encontradas: {", ".join(e.encontradas)}'
+                    )
+                    return
+                
+                novos_registros = resultado['registros']
+                erros = resultado['erros']
+                aproximacoes = resultado['aproximacoes']
+                min_date = resultado['data_min']
+                max_date = resultado['data_max']
+                
+                # Precificação vetorizada; registros e log gravados em um único commit
+                RegistroVisitaService.criar_em_lote(session, novos_registros, commit=False)
+                sucessos = len(novos_registros)
+                if sucessos:
+                    LogService.registrar(
+                        session, self.usuario_logado, 'INSERT', 'registros_visita',
+                        descricao=f"Importou {sucessos} registro(s) de {os.path.basename(file_path)}",
+                        commit=False
+                    )
+                session.commit()
                 
                 # Feedback Final
                 msg = f"Importação concluída.\n\nRegistros importados com sucesso: {sucessos}"
+                if aproximacoes:
+                    msg += "\n\nNomes reconhecidos por semelhança (confira):\n" + "\n".join(aproximacoes[:10])
                 if erros:
                     msg += f"\n\nErros ({len(erros)}):\n" + "\n".join(erros[:10])
                     if len(erros) > 10:
@@ -0,0 +1,167 @@
+"""
+Painel do monitor de consultas SQL (Ferramentas > Monitor SQL)
+"""
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox,
+    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QPlainTextEdit,
+    QSplitter
+)
+from PyQt6.QtCore import Qt, QTimer
+
+from models.instrumentacao import MONITOR_SQL, FAIXAS_LATENCIA_MS
+
+
+class MonitorSQLDialog(QDialog):
+    """Exibe consultas por operação, latência por comando e consultas lentas"""
+
+    INTERVALO_ATUALIZACAO_MS = 2000
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.init_ui()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.INTERVALO_ATUALIZACAO_MS)
+        self._timer.timeout.connect(self.atualizar)
+
+    def init_ui(self):
+        self.setWindowTitle('Monitor SQL')
+        self.setMinimumSize(900, 550)
+
+        layout = QVBoxLayout()
+
+        controles = QHBoxLayout()
+        self.check_ativo = QCheckBox('Monitoramento ativo')
+        self.check_ativo.setChecked(self.engine in MONITOR_SQL.engines)
+        self.check_ativo.toggled.connect(self.alternar_monitoramento)
+        controles.addWidget(self.check_ativo)
+
+        self.label_resumo = QLabel()
+        controles.addWidget(self.label_resumo)
+        controles.addStretch()
+
+        btn_limpar = QPushButton('🗑️ Limpar')
+        btn_limpar.clicked.connect(self.limpar)
+        controles.addWidget(btn_limpar)
+
+        btn_atualizar = QPushButton('🔄 Atualizar')
+        btn_atualizar.clicked.connect(self.atualizar)
+        controles.addWidget(btn_atualizar)
+        layout.addLayout(controles)
+
+        self.abas = QTabWidget()
+
+        self.tabela_operacoes = self._criar_tabela(
+            ['Operação', 'Execuções', 'Consultas', 'Consultas/exec.', 'Tempo total (ms)', 'Tempo SQL (ms)']
+        )
+        self.abas.addTab(self.tabela_operacoes, 'Operações')
+
+        faixas = ['≤' + (f'{f:g}' if f != float('inf') else '∞') for f in FAIXAS_LATENCIA_MS]
+        self.tabela_comandos = self._criar_tabela(
+            ['SQL', 'Execuções', 'Total (ms)', 'Média (ms)', 'Máx. (ms)'] + faixas, coluna_expansivel=0
+        )
+        self.abas.addTab(self.tabela_comandos, 'Comandos')
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.tabela_lentas = self._criar_tabela(['Quando', 'Operação', 'Duração (ms)', 'SQL'], coluna_expansivel=3)
+        self.tabela_lentas.itemSelectionChanged.connect(self.mostrar_detalhe_lenta)
+        splitter.addWidget(self.tabela_lentas)
+        self.detalhe_lenta = QPlainTextEdit()
+        self.detalhe_lenta.setReadOnly(True)
+        splitter.addWidget(self.detalhe_lenta)
+        self.abas.addTab(splitter, 'Consultas lentas')
+
+        layout.addWidget(self.abas)
+        self.setLayout(layout)
+
+    @staticmethod
+    def _criar_tabela(colunas: list, coluna_expansivel: int = 0) -> QTableWidget:
+        tabela = QTableWidget()
+        tabela.setColumnCount(len(colunas))
+        tabela.setHorizontalHeaderLabels(colunas)
+        tabela.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        tabela.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        header = tabela.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(coluna_expansivel, QHeaderView.ResizeMode.Stretch)
+        return tabela
+
+    @staticmethod
+    def _preencher(tabela: QTableWidget, linhas: list):
+        tabela.setRowCount(len(linhas))
+        for row, valores in enumerate(linhas):
+            for col, valor in enumerate(valores):
+                if isinstance(valor, float):
+                    texto = f'{valor:.1f}'
+                else:
+                    texto = '-' if valor is None else str(valor)
+                item = QTableWidgetItem(texto)
+                if not isinstance(valor, str):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                tabela.setItem(row, col, item)
+
+    def alternar_monitoramento(self, ativo: bool):
+        if ativo:
+            MONITOR_SQL.instalar(self.engine)
+        else:
+            MONITOR_SQL.remover(self.engine)
+        self.atualizar()
+
+    def limpar(self):
+        MONITOR_SQL.limpar()
+        self.detalhe_lenta.clear()
+        self.atualizar()
+
+    def atualizar(self):
+        resumo = MONITOR_SQL.resumo()
+        self._lentas = resumo['lentas'][::-1]
+
+        total = sum(op['consultas'] for op in resumo['operacoes'].values())
+        estado = 'ativo' if resumo['ativo'] else 'desativado'
+        self.label_resumo.setText(
+            f"  {estado} — {total} consulta(s) desde {resumo['desde'].replace('T', ' ')}, "
+            f"lentas: ≥ {resumo['limite_lento_ms']:g} ms"
+        )
+
+        operacoes = sorted(resumo['operacoes'].items(), key=lambda item: item[1]['tempo_sql_ms'], reverse=True)
+        self._preencher(self.tabela_operacoes, [
+            (nome, op['execucoes'], op['consultas'],
+             round(op['consultas_por_execucao'], 1) if op['consultas_por_execucao'] is not None else None,
+             op['tempo_total_ms'], op['tempo_sql_ms'])
+            for nome, op in operacoes
+        ])
+        self._preencher(self.tabela_comandos, [
+            (c['sql'], c['execucoes'], c['tempo_total_ms'], c['tempo_medio_ms'], c['tempo_max_ms'], *c['histograma'])
+            for c in resumo['comandos']
+        ])
+
+        selecionada = self.tabela_lentas.currentRow()
+        self.tabela_lentas.blockSignals(True)
+        self._preencher(self.tabela_lentas, [
+            (lenta['quando'].replace('T', ' '), lenta['operacao'], lenta['duracao_ms'], ' '.join(lenta['sql'].split()))
+            for lenta in self._lentas
+        ])
+        if 0 <= selecionada < len(self._lentas):
+            self.tabela_lentas.selectRow(selecionada)
+        self.tabela_lentas.blockSignals(False)
+
+    def mostrar_detalhe_lenta(self):
+        row = self.tabela_lentas.currentRow()
+        if not 0 <= row < len(self._lentas):
+            return
+        lenta = self._lentas[row]
+        self.detalhe_lenta.setPlainText(
+            f"{lenta['sql']}\n\nParâmetros: {lenta['parametros']}\n\n"
+            f"Plano de execução:\n{lenta['plano'] or '(não disponível)'}"
+        )
+
+    def showEvent(self, event):
+        # Atualiza periodicamente apenas enquanto o painel estiver visível
+        self.atualizar()
+        self._timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
@@ -1,11 +1,17 @@
 """Aba de Tabela de Preços com ajuste rápido anual"""
 from PyQt6.QtWidgets import *
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 from datetime import datetime
-from models.services import TabelaPrecoService, LogService
+from models.services import TabelaPrecoService, LogService, RegistroVisitaService
 from utils.validators import Formatadores
 
 class PrecosTab(QWidget):
+    # Emitido após alterar a tabela de preços (invalida snapshots de preço)
+    precos_alterados = pyqtSignal()
+    # Emitido com (ano_inicio, ano_fim) quando os preços de uma tabela existente
+    # foram editados e os valores já gravados precisam ser recalculados
+    recalculo_solicitado = pyqtSignal(int, int)
+    
     def __init__(self, SessionLocal, usuario_logado):
         super().__init__()
         self.SessionLocal = SessionLocal
@@ -140,6 +146,7 @@ class PrecosTab(QWidget):
             return
             
         session = self.SessionLocal()
+        tabela_editada = None
         try:
             # 1. Buscar tabela atual e encerrar se for ano diferente
             todas = TabelaPrecoService.listar_ativas(session)
@@ -147,7 +154,7 @@ class PrecosTab(QWidget):
                 p_anterior = todas[0]
                 if p_anterior.ano_inicio == ano_novo:
                     # Apenas atualizar se for o mesmo ano
-                    TabelaPrecoService.atualizar(session, p_anterior.id, 
+                    TabelaPrecoService.atualizar(session, p_anterior.id, commit=False,
                         valor_estrangeiro=self.input_estrangeiro.value(),
                         valor_mercosul=self.input_mercosul.value(),
                         valor_brasileiro=self.input_brasileiro.value(),
@@ -156,10 +163,16 @@ class PrecosTab(QWidget):
                         valor_fundeio_8a15=self.input_fundeio_8a15.value(),
                         valor_fundeio_acima15=self.input_fundeio_acima15.value()
                     )
+                    ano_fim = p_anterior.ano_fim
+                    if ano_fim is None:
+                        # Tabela em aberto: vale também para registros já lançados em anos seguintes
+                        ultima_data = RegistroVisitaService.ultima_data(session)
+                        ano_fim = max(ano_novo, datetime.now().year, ultima_data.year if ultima_data else ano_novo)
+                    tabela_editada = (p_anterior.ano_inicio, ano_fim)
                 else:
                     # Encerrar anterior e criar nova
                     if p_anterior.ano_fim is None:
-                        TabelaPrecoService.atualizar(session, p_anterior.id, ano_fim=ano_novo-1)
+                        TabelaPrecoService.atualizar(session, p_anterior.id, ano_fim=ano_novo-1, commit=False)
                     
                     valores = {
                         'valor_estrangeiro': self.input_estrangeiro.value(),
@@ -170,7 +183,7 @@ class PrecosTab(QWidget):
                         'valor_fundeio_8a15': self.input_fundeio_8a15.value(),
                         'valor_fundeio_acima15': self.input_fundeio_acima15.value()
                     }
-                    TabelaPrecoService.criar(session, ano_novo, valores)
+                    TabelaPrecoService.criar(session, ano_novo, valores, commit=False)
             else:
                 # Primeira tabela
                 valores = {
@@ -182,13 +195,27 @@ class PrecosTab(QWidget):
                     'valor_fundeio_8a15': self.input_fundeio_8a15.value(),
                     'valor_fundeio_acima15': self.input_fundeio_acima15.value()
                 }
-                TabelaPrecoService.criar(session, ano_novo, valores)
+                TabelaPrecoService.criar(session, ano_novo, valores, commit=False)
 
             LogService.registrar(session, self.usuario_logado, 'UPDATE', 'tabela_preco_ingresso', 
-                               descricao=f"Ajustou preços para o ano {ano_novo}")
+                               descricao=f"Ajustou preços para o ano {ano_novo}", commit=False)
+            # Encerramento da tabela anterior, nova tabela e log em uma única transação
+            session.commit()
             
+            self.precos_alterados.emit()
             QMessageBox.information(self, "Sucesso", "Tabela de preços atualizada!")
             self.carregar_precos()
+            
+            # Registros já gravados com a tabela editada ficaram com valores antigos
+            if tabela_editada:
+                reply = QMessageBox.question(
+                    self, 'Recalcular Registros',
+                    'Os registros já lançados neste período foram calculados com os preços anteriores.\n'
+                    'Deseja revisar e recalcular os valores agora?',
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+                )
+                if reply == QMessageBox.StandardButton.Yes:
+                    self.recalculo_solicitado.emit(*tabela_editada)
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao aplicar preços:\n{str(e)}")
         finally:
@@ -0,0 +1,190 @@
+"""
+Diálogo de recálculo em lote dos valores dos registros
+"""
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QDateEdit,
+    QProgressBar, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
+)
+from PyQt6.QtCore import Qt, QDate, pyqtSignal
+from datetime import date
+import threading
+
+from models.services import RecalculoService, LogService
+from utils.validators import Formatadores
+
+
+class RecalculoDialog(QDialog):
+    """Simula e aplica o recálculo de valor_total para um período"""
+
+    # Linhas exibidas no relatório de diferenças (o total é sempre informado)
+    MAX_LINHAS_RELATORIO = 500
+
+    progresso_signal = pyqtSignal(int, int)
+    concluido_signal = pyqtSignal(bool, dict)  # (simulação, resultado)
+    erro_signal = pyqtSignal(str)
+
+    # Emitido após gravar novos valores (para atualizar as demais telas)
+    valores_recalculados = pyqtSignal()
+
+    def __init__(self, SessionLocal, usuario_logado, data_inicio: date, data_fim: date, parent=None):
+        super().__init__(parent)
+        self.SessionLocal = SessionLocal
+        self.usuario_logado = usuario_logado
+        self.executando = False
+
+        self.progresso_signal.connect(self._on_progresso)
+        self.concluido_signal.connect(self._on_concluido)
+        self.erro_signal.connect(self._on_erro)
+
+        self.init_ui(data_inicio, data_fim)
+
+    def init_ui(self, data_inicio: date, data_fim: date):
+        self.setWindowTitle('Recalcular Valores dos Registros')
+        self.setMinimumSize(700, 500)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(
+            'Reprecifica os registros do período com a tabela de preços vigente.\n'
+            'Use "Simular" para ver as diferenças antes de gravar.'
+        ))
+
+        periodo_layout = QHBoxLayout()
+        periodo_layout.addWidget(QLabel('De:'))
+        self.input_inicio = QDateEdit()
+        self.input_inicio.setCalendarPopup(True)
+        self.input_inicio.setDisplayFormat('dd/MM/yyyy')
+        self.input_inicio.setDate(QDate(data_inicio.year, data_inicio.month, data_inicio.day))
+        periodo_layout.addWidget(self.input_inicio)
+
+        periodo_layout.addWidget(QLabel('Até:'))
+        self.input_fim = QDateEdit()
+        self.input_fim.setCalendarPopup(True)
+        self.input_fim.setDisplayFormat('dd/MM/yyyy')
+        self.input_fim.setDate(QDate(data_fim.year, data_fim.month, data_fim.day))
+        periodo_layout.addWidget(self.input_fim)
+        periodo_layout.addStretch()
+
+        self.btn_simular = QPushButton('🔍 Simular')
+        self.btn_simular.clicked.connect(lambda: self.iniciar(simular=True))
+        periodo_layout.addWidget(self.btn_simular)
+
+        self.btn_aplicar = QPushButton('✅ Aplicar')
+        self.btn_aplicar.setStyleSheet('background-color: #0078d4; color: white; font-weight: bold;')
+        self.btn_aplicar.clicked.connect(lambda: self.iniciar(simular=False))
+        periodo_layout.addWidget(self.btn_aplicar)
+        layout.addLayout(periodo_layout)
+
+        self.progress = QProgressBar()
+        self.progress.setValue(0)
+        layout.addWidget(self.progress)
+
+        self.label_resumo = QLabel('')
+        layout.addWidget(self.label_resumo)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(4)
+        self.table.setHorizontalHeaderLabels(['ID', 'Data', 'Valor Atual', 'Valor Recalculado'])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        btn_fechar = QPushButton('Fechar')
+        btn_fechar.clicked.connect(self.close)
+        layout.addWidget(btn_fechar, alignment=Qt.AlignmentFlag.AlignRight)
+
+        self.setLayout(layout)
+
+    def iniciar(self, simular: bool):
+        """Inicia a simulação ou o recálculo em segundo plano"""
+        if self.executando:
+            return
+
+        data_inicio = self.input_inicio.date().toPyDate()
+        data_fim = self.input_fim.date().toPyDate()
+        if data_inicio > data_fim:
+            QMessageBox.warning(self, 'Período inválido', 'A data inicial é posterior à data final.')
+            return
+
+        if not simular:
+            reply = QMessageBox.question(
+                self, 'Confirmar Recálculo',
+                f'Gravar os valores recalculados dos registros de '
+                f'{Formatadores.formatar_data(data_inicio)} a {Formatadores.formatar_data(data_fim)}?',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.No:
+                return
+
+        self.executando = True
+        self.btn_simular.setEnabled(False)
+        self.btn_aplicar.setEnabled(False)
+        self.progress.setValue(0)
+        self.label_resumo.setText('Processando...')
+
+        t = threading.Thread(target=self._worker, args=(data_inicio, data_fim, simular))
+        t.daemon = True
+        t.start()
+
+    def _worker(self, data_inicio: date, data_fim: date, simular: bool):
+        """Executa o recálculo fora da thread da UI"""
+        session = self.SessionLocal()
+        try:
+            resultado = RecalculoService.recalcular_valores(
+                session, data_inicio, data_fim, simular=simular,
+                progresso=self.progresso_signal.emit, max_diferencas=self.MAX_LINHAS_RELATORIO
+            )
+            if not simular and resultado['alterados']:
+                LogService.registrar(
+                    session, self.usuario_logado, 'UPDATE', 'registros_visita',
+                    descricao=f"Recalculou {resultado['alterados']} registro(s) de "
+                              f"{Formatadores.formatar_data(data_inicio)} a {Formatadores.formatar_data(data_fim)}"
+                )
+            self.concluido_signal.emit(simular, resultado)
+        except Exception as e:
+            session.rollback()
+            self.erro_signal.emit(str(e))
+        finally:
+            session.close()
+
+    def _on_progresso(self, processados: int, total: int):
+        self.progress.setMaximum(max(total, 1))
+        self.progress.setValue(processados)
+
+    def _on_concluido(self, simular: bool, resultado: dict):
+        self.executando = False
+        self.btn_simular.setEnabled(True)
+        self.btn_aplicar.setEnabled(True)
+        self.progress.setValue(self.progress.maximum())
+
+        acao = 'seriam alterados' if simular else 'alterados'
+        diferencas = resultado['diferencas']
+        exibidos = (f" (exibindo os primeiros {len(diferencas)})"
+                    if resultado['alterados'] > len(diferencas) else '')
+        self.label_resumo.setText(
+            f"{resultado['analisados']} registro(s) analisado(s), {resultado['alterados']} {acao}{exibidos}. "
+            f"Diferença total: {Formatadores.formatar_moeda(resultado['diferenca_total'])}"
+        )
+
+        self.table.setRowCount(len(diferencas))
+        for row, (registro_id, data_registro, antigo, novo) in enumerate(diferencas):
+            self.table.setItem(row, 0, QTableWidgetItem(str(registro_id)))
+            self.table.setItem(row, 1, QTableWidgetItem(Formatadores.formatar_data(data_registro)))
+            self.table.setItem(row, 2, QTableWidgetItem(Formatadores.formatar_moeda(antigo or 0.0)))
+            self.table.setItem(row, 3, QTableWidgetItem(Formatadores.formatar_moeda(novo)))
+
+        if not simular and resultado['alterados']:
+            self.valores_recalculados.emit()
+
+    def _on_erro(self, mensagem: str):
+        self.executando = False
+        self.btn_simular.setEnabled(True)
+        self.btn_aplicar.setEnabled(True)
+        self.label_resumo.setText('')
+        QMessageBox.critical(self, 'Erro', f'Erro ao recalcular valores:\n{mensagem}')
+
+    def closeEvent(self, event):
+        if self.executando:
+            QMessageBox.information(self, 'Aguarde', 'O recálculo ainda está em andamento.')
+            event.ignore()
+            return
+        event.accept()
@@ -7,7 +7,7 @@ from PyQt6.QtWidgets import (
     QSpinBox, QTextEdit, QGroupBox, QFormLayout, QMessageBox,
     QLineEdit, QHeaderView, QAbstractItemView
 )
-from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtCore import Qt, QDate, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 from datetime import datetime, date
 
@@ -16,12 +16,20 @@ from models.services import (
     TabelaPrecoService, LogService
 )
 from models.database import RegistroVisita
+from models.instrumentacao import PERFIL
+from models.referencias import CACHE_REFERENCIAS
 from utils.validators import Formatadores
 
 
 class RegistrosTab(QWidget):
     """Aba para gerenciar registros diários de visitação"""
     
+    # Emitido após salvar/excluir registros (ex.: para atualizar o dashboard)
+    registros_alterados = pyqtSignal()
+    
+    # Intervalo para agrupar rajadas de alterações no formulário (ms)
+    DEBOUNCE_CALCULO_MS = 120
+    
     def __init__(self, SessionLocal, usuario_logado):
         super().__init__()
         self.SessionLocal = SessionLocal
@@ -29,6 +37,18 @@ class RegistrosTab(QWidget):
         self.registro_atual_id = None
         self.embarcacao_comprimento = {}  # id -> comprimento_m (para fator >=12 ou <12)
         
+        # Snapshot da tabela de preços vigente para a data do formulário.
+        # Só é recarregado quando a data sai da vigência da tabela ou quando
+        # os preços mudam (invalidar_tabela_precos).
+        self._tabela_preco = None
+        self._ano_tabela_preco = None
+        
+        # Alterações seguidas (ex.: segurar a seta de um spinbox) geram um único cálculo
+        self._timer_calculo = QTimer(self)
+        self._timer_calculo.setSingleShot(True)
+        self._timer_calculo.setInterval(self.DEBOUNCE_CALCULO_MS)
+        self._timer_calculo.timeout.connect(self.calcular_valor_total)
+        
         self.init_ui()
         self.carregar_registros()
         
@@ -104,7 +124,7 @@ class RegistrosTab(QWidget):
         # Embarcação
         self.combo_embarcacao = QComboBox()
         self.combo_embarcacao.setEnabled(False)
-        self.combo_embarcacao.currentIndexChanged.connect(self.calcular_valor_total)
+        self.combo_embarcacao.currentIndexChanged.connect(self.agendar_calculo)
         form.addRow('Embarcação:*', self.combo_embarcacao)
         
         # Permanência
@@ -113,7 +133,7 @@ class RegistrosTab(QWidget):
         self.input_permanencia.setMaximum(10)
         self.input_permanencia.setValue(1)
         self.input_permanencia.setToolTip('1 = Aberto, 2 = Pernoite, etc.')
-        self.input_permanencia.valueChanged.connect(self.calcular_valor_total)
+        self.input_permanencia.valueChanged.connect(self.agendar_calculo)
         form.addRow('Permanência:*', self.input_permanencia)
         
         layout.addLayout(form)
@@ -127,27 +147,27 @@ class RegistrosTab(QWidget):
         
         self.input_estrangeiros = QSpinBox()
         self.input_estrangeiros.setMaximum(999)
-        self.input_estrangeiros.valueChanged.connect(self.calcular_valor_total)
+        self.input_estrangeiros.valueChanged.connect(self.agendar_calculo)
         qtd_form.addRow('Estrangeiros:', self.input_estrangeiros)
         
         self.input_mercosul = QSpinBox()
         self.input_mercosul.setMaximum(999)
-        self.input_mercosul.valueChanged.connect(self.calcular_valor_total)
+        self.input_mercosul.valueChanged.connect(self.agendar_calculo)
         qtd_form.addRow('Mercosul:', self.input_mercosul)
         
         self.input_brasileiros = QSpinBox()
         self.input_brasileiros.setMaximum(999)
-        self.input_brasileiros.valueChanged.connect(self.calcular_valor_total)
+        self.input_brasileiros.valueChanged.connect(self.agendar_calculo)
         qtd_form.addRow('Brasileiros:', self.input_brasileiros)
         
         self.input_entorno = QSpinBox()
         self.input_entorno.setMaximum(999)
-        self.input_entorno.valueChanged.connect(self.calcular_valor_total)
+        self.input_entorno.valueChanged.connect(self.agendar_calculo)
         qtd_form.addRow('Comunidade Entorno:', self.input_entorno)
         
         self.input_isentos = QSpinBox()
         self.input_isentos.setMaximum(999)
-        self.input_isentos.valueChanged.connect(self.calcular_valor_total)
+        self.input_isentos.valueChanged.connect(self.agendar_calculo)
         qtd_form.addRow('Isentos:', self.input_isentos)
         
         layout.addLayout(qtd_form)
@@ -329,22 +349,17 @@ class RegistrosTab(QWidget):
     
     def carregar_empresas(self):
         """Carrega empresas no combobox"""
-        session = self.SessionLocal()
-        try:
-            empresas = EmpresaService.listar_ativas(session)
-            
-            self.combo_empresa.clear()
-            self.combo_empresa.addItem('-- Selecione uma empresa --', None)
-            
-            self.filter_combo_empresa.clear()
-            self.filter_combo_empresa.addItem('[Todas as empresas]', None)
-            
-            for empresa in empresas:
-                self.combo_empresa.addItem(empresa.nome, empresa.id)
-                self.filter_combo_empresa.addItem(empresa.nome, empresa.id)
-                
-        finally:
-            session.close()
+        empresas = CACHE_REFERENCIAS.obter(self.SessionLocal).empresas_ativas()
+        
+        self.combo_empresa.clear()
+        self.combo_empresa.addItem('-- Selecione uma empresa --', None)
+        
+        self.filter_combo_empresa.clear()
+        self.filter_combo_empresa.addItem('[Todas as empresas]', None)
+        
+        for empresa in empresas:
+            self.combo_empresa.addItem(empresa.nome, empresa.id)
+            self.filter_combo_empresa.addItem(empresa.nome, empresa.id)
     
     def on_empresa_changed(self, index):
         """Quando empresa é selecionada, carrega suas embarcações"""
@@ -355,31 +370,63 @@ class RegistrosTab(QWidget):
         self.combo_embarcacao.setEnabled(False)
         
         if empresa_id:
-            session = self.SessionLocal()
-            try:
-                embarcacoes = EmbarcacaoService.listar_por_empresa(session, empresa_id)
-                
-                self.combo_embarcacao.addItem('-- Selecione uma embarcação --', None)
-                
-                for embarcacao in embarcacoes:
-                    self.combo_embarcacao.addItem(embarcacao.nome, embarcacao.id)
-                    self.embarcacao_comprimento[embarcacao.id] = embarcacao.comprimento_m
-                
-                self.combo_embarcacao.setEnabled(True)
-                
-            finally:
-                session.close()
+            embarcacoes = CACHE_REFERENCIAS.obter(self.SessionLocal).embarcacoes_da_empresa(empresa_id)
+            
+            self.combo_embarcacao.addItem('-- Selecione uma embarcação --', None)
+            
+            for embarcacao in embarcacoes:
+                self.combo_embarcacao.addItem(embarcacao.nome, embarcacao.id)
+                self.embarcacao_comprimento[embarcacao.id] = embarcacao.comprimento_m
+            
+            self.combo_embarcacao.setEnabled(True)
         
-        self.calcular_valor_total()
+        self.agendar_calculo()
     
     def atualizar_tabela_precos(self):
         """Atualiza o cálculo quando a data muda"""
-        self.calcular_valor_total()
+        self.agendar_calculo()
+    
+    def agendar_calculo(self, *args):
+        """Agenda o recálculo do resumo (debounce dos sinais do formulário)"""
+        self._timer_calculo.start()
+    
+    def invalidar_tabela_precos(self):
+        """Descarta o snapshot de preços (chamado quando a tabela de preços muda)"""
+        self._tabela_preco = None
+        self._ano_tabela_preco = None
+        self.agendar_calculo()
+    
+    def tabela_preco_para_data(self, data_visita: date):
+        """Retorna o snapshot de preços vigente, consultando o banco só se necessário"""
+        ano = data_visita.year
+        
+        if self._ano_tabela_preco is not None:
+            tabela = self._tabela_preco
+            if tabela is None:
+                vigente = ano == self._ano_tabela_preco
+            else:
+                vigente = tabela['ano_inicio'] <= ano and (
+                    tabela['ano_fim'] is None or ano <= tabela['ano_fim']
+                )
+            if vigente:
+                return tabela
+        
+        session = self.SessionLocal()
+        try:
+            self._tabela_preco = TabelaPrecoService.snapshot(
+                TabelaPrecoService.buscar_por_data(session, data_visita)
+            )
+            self._ano_tabela_preco = ano
+        finally:
+            session.close()
+        
+        return self._tabela_preco
     
     def calcular_valor_total(self, *args):
         """Calcula ingressos, visitantes e valor total em tempo real.
         Ingressos = pagantes × permanência; Visitantes = (pagantes + isentos) × permanência.
-        Valor considera fator por comprimento da embarcação (>=12m ou <12m).
+        Valor considera a taxa de fundeio pelo comprimento da embarcação.
+        O cálculo é feito em memória, sobre o snapshot da tabela de preços.
         """
         try:
             qdate = self.input_data.date()
@@ -405,19 +452,15 @@ class RegistrosTab(QWidget):
                 quantidades, permanencia
             )
             
-            session = self.SessionLocal()
-            try:
-                valor_total = RegistroVisitaService.calcular_valor_total(
-                    session, data_visita, quantidades, permanencia, comprimento_m
-                )
-                
-                valor_fmt = Formatadores.formatar_moeda(valor_total)
-                self.label_valor_total.setText(
-                    f'<b style="font-size: 12pt; color: #0078d4;">Ingressos: {ingressos} | '
-                    f'Visitantes: {visitantes} | Valor Total: {valor_fmt}</b>'
-                )
-            finally:
-                session.close()
+            valor_total = RegistroVisitaService.calcular_valor_por_tabela(
+                self.tabela_preco_para_data(data_visita), quantidades, permanencia, comprimento_m
+            )
+            
+            valor_fmt = Formatadores.formatar_moeda(valor_total)
+            self.label_valor_total.setText(
+                f'<b style="font-size: 12pt; color: #0078d4;">Ingressos: {ingressos} | '
+                f'Visitantes: {visitantes} | Valor Total: {valor_fmt}</b>'
+            )
                 
         except Exception as e:
             print(f"Erro ao calcular valor: {e}")
@@ -485,21 +528,32 @@ class RegistrosTab(QWidget):
             try:
                 if self.registro_atual_id:
                     # Atualizar registro existente
-                    RegistroVisitaService.atualizar(
+                    registro = RegistroVisitaService.atualizar(
                         session,
                         self.registro_atual_id,
                         data=data_visita,
                         empresa_id=empresa_id,
                         embarcacao_id=embarcacao_id,
                         permanencia=permanencia,
+                        commit=False,
                         **quantidades,
                         **kwargs
                     )
+                    if registro is None:
+                        # Registros de temporadas arquivadas são somente leitura
+                        QMessageBox.warning(
+                            self,
+                            'Registro não editável',
+                            'O registro não foi encontrado ou pertence a uma temporada arquivada.'
+                        )
+                        return
                     
                     LogService.registrar(
                         session, self.usuario_logado, 'UPDATE', 'registros_visita', self.registro_atual_id,
-                        f"Atualizou visita de {data_visita} - Empresa ID {empresa_id}"
+                        f"Atualizou visita de {data_visita} - Empresa ID {empresa_id}",
+                        commit=False
                     )
+                    session.commit()
                     
                     QMessageBox.information(
                         self,
@@ -515,13 +569,16 @@ class RegistrosTab(QWidget):
                         embarcacao_id,
                         permanencia,
                         quantidades,
+                        commit=False,
                         **kwargs
                     )
                     
                     LogService.registrar(
                         session, self.usuario_logado, 'INSERT', 'registros_visita', novo_registro.id,
-                        f"Criou visita de {data_visita} - Empresa ID {empresa_id}"
+                        f"Criou visita de {data_visita} - Empresa ID {empresa_id}",
+                        commit=False
                     )
+                    session.commit()
                     
                     QMessageBox.information(
                         self,
@@ -532,6 +589,7 @@ class RegistrosTab(QWidget):
                 # Atualiza a listagem
                 self.carregar_registros()
                 self.limpar_formulario()
+                self.registros_alterados.emit()
                 
             finally:
                 session.close()
@@ -592,58 +650,111 @@ class RegistrosTab(QWidget):
     
     def carregar_registros(self):
         """Carrega os registros na tabela"""
-        session = self.SessionLocal()
-        try:
-            # Pega o período do filtro
-            qdate_inicio = self.filter_data_inicio.date()
-            data_inicio = date(qdate_inicio.year(), qdate_inicio.month(), qdate_inicio.day())
+        with PERFIL.medir('registros.carregar_registros'):
+            session = self.SessionLocal()
+            try:
+                # Pega o período do filtro
+                qdate_inicio = self.filter_data_inicio.date()
+                data_inicio = date(qdate_inicio.year(), qdate_inicio.month(), qdate_inicio.day())
             
-            qdate_fim = self.filter_data_fim.date()
-            data_fim = date(qdate_fim.year(), qdate_fim.month(), qdate_fim.day())
+                qdate_fim = self.filter_data_fim.date()
+                data_fim = date(qdate_fim.year(), qdate_fim.month(), qdate_fim.day())
             
-            # Filtro por empresa
-            empresa_id = self.filter_combo_empresa.currentData()
+                # Filtro por empresa
+                empresa_id = self.filter_combo_empresa.currentData()
             
-            # Busca registros
-            registros = RegistroVisitaService.listar_por_periodo(session, data_inicio, data_fim, empresa_id)
+                # Busca registros
+                registros = RegistroVisitaService.listar_por_periodo(session, data_inicio, data_fim, empresa_id)
+                referencias = CACHE_REFERENCIAS.obter(session)
             
-            # Limpa tabela
-            self.table_registros.setRowCount(0)
+                # Limpa tabela
+                self.table_registros.setRowCount(0)
             
-            # Popula tabela
-            for registro in registros:
-                row = self.table_registros.rowCount()
-                self.table_registros.insertRow(row)
-                
-                # Total de visitantes
-                total_visitantes = (
-                    registro.qtde_estrangeiros +
-                    registro.qtde_mercosul +
-                    registro.qtde_brasileiros +
-                    registro.qtde_entorno +
-                    registro.qtde_isentos
-                )
-                
-                self.table_registros.setItem(row, 0, QTableWidgetItem(str(registro.id)))
-                self.table_registros.setItem(row, 1, QTableWidgetItem(
-                    Formatadores.formatar_data(registro.data)
-                ))
-                self.table_registros.setItem(row, 2, QTableWidgetItem(registro.empresa.nome))
-                self.table_registros.setItem(row, 3, QTableWidgetItem(registro.embarcacao.nome))
-                self.table_registros.setItem(row, 4, QTableWidgetItem(str(registro.permanencia)))
-                self.table_registros.setItem(row, 5, QTableWidgetItem(str(total_visitantes)))
-                self.table_registros.setItem(row, 6, QTableWidgetItem(
-                    Formatadores.formatar_moeda(registro.valor_total)
-                ))
-                self.table_registros.setItem(row, 7, QTableWidgetItem(
-                    registro.responsavel or '-'
-                ))
-                self.table_registros.setItem(row, 8, QTableWidgetItem(
-                    registro.criado_em.strftime('%d/%m/%Y %H:%M') if registro.criado_em else '-'
-                ))
+                # Popula tabela
+                for registro in registros:
+                    row = self.table_registros.rowCount()
+                    self.table_registros.insertRow(row)
+                    self._preencher_linha(row, registro, referencias)
             
-        finally:
-            session.close()
+            finally:
+                session.close()
+    
+    def _preencher_linha(self, row: int, registro, referencias):
+        """Preenche uma linha da tabela com os dados do registro"""
+        # Total de visitantes
+        total_visitantes = (
+            registro.qtde_estrangeiros +
+            registro.qtde_mercosul +
+            registro.qtde_brasileiros +
+            registro.qtde_entorno +
+            registro.qtde_isentos
+        )
+        
+        self.table_registros.setItem(row, 0, QTableWidgetItem(str(registro.id)))
+        item_data = QTableWidgetItem(Formatadores.formatar_data(registro.data))
+        item_data.setData(Qt.ItemDataRole.UserRole, registro.data)
+        self.table_registros.setItem(row, 1, item_data)
+        self.table_registros.setItem(row, 2, QTableWidgetItem(referencias.nome_empresa(registro.empresa_id)))
+        self.table_registros.setItem(row, 3, QTableWidgetItem(referencias.nome_embarcacao(registro.embarcacao_id)))
+        self.table_registros.setItem(row, 4, QTableWidgetItem(str(registro.permanencia)))
+        self.table_registros.setItem(row, 5, QTableWidgetItem(str(total_visitantes)))
+        self.table_registros.setItem(row, 6, QTableWidgetItem(
+            Formatadores.formatar_moeda(registro.valor_total)
+        ))
+        self.table_registros.setItem(row, 7, QTableWidgetItem(
+            registro.responsavel or '-'
+        ))
+        self.table_registros.setItem(row, 8, QTableWidgetItem(
+            registro.criado_em.strftime('%d/%m/%Y %H:%M') if registro.criado_em else '-'
+        ))
+    
+    def incluir_registros(self, registros: list):
+        """
+        Acrescenta à tabela os registros novos que passam pelos filtros, na
+        posição da ordenação por data, sem recarregar a listagem (usado pelas
+        notificações do servidor)
+        """
+        data_inicio = self.filter_data_inicio.date().toPyDate()
+        data_fim = self.filter_data_fim.date().toPyDate()
+        empresa_id = self.filter_combo_empresa.currentData()
+        
+        ids_exibidos = {
+            self.table_registros.item(row, 0).text()
+            for row in range(self.table_registros.rowCount())
+        }
+        referencias = CACHE_REFERENCIAS.obter(self.SessionLocal)
+        
+        for registro in sorted(registros, key=lambda r: r.data):
+            if not data_inicio <= registro.data <= data_fim:
+                continue
+            if empresa_id and registro.empresa_id != empresa_id:
+                continue
+            if str(registro.id) in ids_exibidos:
+                continue
+            
+            # Listagem em ordem decrescente de data: entra antes do primeiro registro mais antigo
+            row = 0
+            while (row < self.table_registros.rowCount()
+                   and self.table_registros.item(row, 1).data(Qt.ItemDataRole.UserRole) > registro.data):
+                row += 1
+            self.table_registros.insertRow(row)
+            self._preencher_linha(row, registro, referencias)
+    
+    def mostrar_registro(self, registro_id: int, data_registro: date):
+        """Lista o dia do registro (todas as empresas) e o seleciona na tabela"""
+        qdate = QDate(data_registro.year, data_registro.month, data_registro.day)
+        self.filter_data_inicio.setDate(qdate)
+        self.filter_data_fim.setDate(qdate)
+        self.filter_combo_empresa.blockSignals(True)
+        self.filter_combo_empresa.setCurrentIndex(0)
+        self.filter_combo_empresa.blockSignals(False)
+        self.carregar_registros()
+        
+        for row in range(self.table_registros.rowCount()):
+            if self.table_registros.item(row, 0).text() == str(registro_id):
+                self.table_registros.selectRow(row)
+                self.table_registros.scrollToItem(self.table_registros.item(row, 0))
+                break
     
     def editar_registro(self):
         """Carrega um registro para edição"""
@@ -743,15 +854,17 @@ class RegistrosTab(QWidget):
 
             info_log = f"Excluiu visita de {registro.data} - Empresa ID {registro.empresa_id}"
             
-            if RegistroVisitaService.deletar(session, registro_id): # Assuming 'deletar' is the method, not 'excluir' as in instruction
+            if RegistroVisitaService.deletar(session, registro_id, commit=False): # Assuming 'deletar' is the method, not 'excluir' as in instruction
                 LogService.registrar(
                     session, self.usuario_logado, 'DELETE', 'registros_visita', registro_id,
-                    info_log
+                    info_log, commit=False
                 )
+                session.commit()
                 
                 QMessageBox.information(self, 'Sucesso', 'Registro deletado com sucesso!')
                 self.carregar_registros()
                 self.limpar_formulario()
+                self.registros_alterados.emit()
             else:
                 QMessageBox.warning(self, 'Erro', 'Não foi possível deletar o registro.')
                 
@@ -3,9 +3,10 @@ from PyQt6.QtWidgets import *
 from PyQt6.QtCore import QDate, Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 from datetime import date, datetime
-import pandas as pd
-from models.services import RegistroVisitaService, EmpresaService
+from models.services import RelatorioService
 from models.database import Empresa
+from models.instrumentacao import PERFIL
+from models.referencias import CACHE_REFERENCIAS
 from utils.validators import Formatadores
 from utils.gru_automation import GRUAutomation
 import threading
@@ -227,15 +228,11 @@ class RelatoriosTab(QWidget):
     
     def carregar_empresas(self):
         """Carrega as empresas no combobox"""
-        session = self.SessionLocal()
-        try:
-            empresas = EmpresaService.listar_ativas(session)
-            self.combo_empresa.clear()
-            self.combo_empresa.addItem('-- Selecione uma empresa --', None)
-            for emp in empresas:
-                self.combo_empresa.addItem(emp.nome, emp.id)
-        finally:
-            session.close()
+        empresas = CACHE_REFERENCIAS.obter(self.SessionLocal).empresas_ativas()
+        self.combo_empresa.clear()
+        self.combo_empresa.addItem('-- Selecione uma empresa --', None)
+        for emp in empresas:
+            self.combo_empresa.addItem(emp.nome, emp.id)
     
     def get_periodo(self):
         qd1 = self.data_inicio.date()
@@ -267,32 +264,12 @@ class RelatoriosTab(QWidget):
         if filepath:
             self.gerar_relatorio(inicio, fim, filepath, 'excel')
     
+    @PERFIL.medir('relatorios.exportar')
     def gerar_relatorio(self, inicio, fim, filepath, formato):
         session = self.SessionLocal()
         try:
-            registros = RegistroVisitaService.listar_por_periodo(session, inicio, fim)
-            
-            dados = []
-            for r in registros:
-                dados.append({
-                    'Data': Formatadores.formatar_data(r.data),
-                    'Empresa': r.empresa.nome,
-                    'Embarcação': r.embarcacao.nome,
-                    'Permanência': r.permanencia,
-                    'Estrangeiros': r.qtde_estrangeiros,
-                    'Mercosul': r.qtde_mercosul,
-                    'Brasileiros': r.qtde_brasileiros,
-                    'Entorno': r.qtde_entorno,
-                    'Isentos': r.qtde_isentos,
-                    'Valor Total': r.valor_total
-                })
-            
-            df = pd.DataFrame(dados)
-            
-            if formato == 'csv':
-                df.to_csv(filepath, index=False, encoding='utf-8-sig')
-            else:
-                df.to_excel(filepath, index=False, engine='openpyxl')
+            dados = RelatorioService.dados_exportacao(session, inicio, fim)
+            RelatoriosTab.salvar_relatorio(dados, filepath, formato)
             
             QMessageBox.information(self, 'Sucesso', f'Relatório exportado:\n{filepath}')
         except Exception as e:
@@ -300,6 +277,18 @@ class RelatoriosTab(QWidget):
         finally:
             session.close()
     
+    @staticmethod
+    def salvar_relatorio(dados: list, filepath: str, formato: str):
+        """Grava as linhas do relatório em CSV ou Excel"""
+        import pandas as pd  # importado aqui para não pesar na inicialização
+        df = pd.DataFrame(dados)
+        
+        if formato == 'csv':
+            df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        else:
+            df.to_excel(filepath, index=False, engine='openpyxl')
+    
+    @PERFIL.medir('relatorios.nota_pagamento')
     def gerar_dados_nota(self):
         """Gera os dados para a nota de pagamento"""
         empresa_id = self.combo_empresa.currentData()
@@ -312,77 +301,24 @@ class RelatoriosTab(QWidget):
         
         session = self.SessionLocal()
         try:
-            # Buscar empresa
-            empresa_obj = EmpresaService.buscar_por_id(session, empresa_id)
-            
-            # Extrair dados da empresa antes de fechar sessão
-            empresa = {
-                'nome': empresa_obj.nome,
-                'cnpj': empresa_obj.cnpj,
-                'contato_nome': empresa_obj.contato_nome,
-                'contato_telefone': empresa_obj.contato_telefone,
-                'contato_email': empresa_obj.contato_email
-            }
-            
-            # Buscar registros da empresa no período
-            registros_obj = RegistroVisitaService.listar_por_periodo(session, inicio, fim)
-            registros_empresa = [r for r in registros_obj if r.empresa_id == empresa_id]
+            dados = RelatorioService.dados_nota(session, empresa_id, inicio, fim)
+            if dados is None:
+                return None
             
-            if not registros_empresa:
+            if not dados['registros']:
                 QMessageBox.warning(
                     self, 'Aviso', 
-                    f'Nenhum registro encontrado para {empresa["nome"]}\n'
+                    f'Nenhum registro encontrado para {dados["empresa"]["nome"]}\n'
                     f'no período de {Formatadores.formatar_data(inicio)} a {Formatadores.formatar_data(fim)}.'
                 )
                 return None
             
-            # Extrair dados dos registros antes de fechar sessão
-            registros = []
-            for r in registros_empresa:
-                registros.append({
-                    'data': r.data,
-                    'embarcacao_nome': r.embarcacao.nome,
-                    'permanencia': r.permanencia,
-                    'qtde_estrangeiros': r.qtde_estrangeiros,
-                    'qtde_mercosul': r.qtde_mercosul,
-                    'qtde_brasileiros': r.qtde_brasileiros,
-                    'qtde_entorno': r.qtde_entorno,
-                    'qtde_isentos': r.qtde_isentos,
-                    'qtde_maior12': r.qtde_maior12,
-                    'qtde_menor12': r.qtde_menor12,
-                    'valor_total': r.valor_total
-                })
-            
-            # Calcular totais
-            totais = {
-                'estrangeiros': sum(r['qtde_estrangeiros'] for r in registros),
-                'mercosul': sum(r['qtde_mercosul'] for r in registros),
-                'brasileiros': sum(r['qtde_brasileiros'] for r in registros),
-                'entorno': sum(r['qtde_entorno'] for r in registros),
-                'isentos': sum(r['qtde_isentos'] for r in registros),
-                'maior12': sum(r['qtde_maior12'] for r in registros),
-                'menor12': sum(r['qtde_menor12'] for r in registros),
-                'valor_total': sum(r['valor_total'] for r in registros),
-                'qtd_registros': len(registros)
-            }
-            
-            totais['total_visitantes'] = (
-                totais['estrangeiros'] + totais['mercosul'] + totais['brasileiros'] +
-                totais['entorno'] + totais['isentos'] + totais['maior12'] + totais['menor12']
-            )
-            
-            return {
-                'empresa': empresa,
-                'registros': registros,
-                'totais': totais,
-                'periodo_inicio': inicio,
-                'periodo_fim': fim,
-                'data_geracao': datetime.now()
-            }
+            return dados
         finally:
             session.close()
     
-    def formatar_nota_texto(self, dados):
+    @staticmethod
+    def formatar_nota_texto(dados):
         """Formata a nota de pagamento como texto"""
         empresa = dados['empresa']
         totais = dados['totais']
@@ -516,6 +452,8 @@ Gestão: 44207
             return
         
         try:
+            import pandas as pd  # importado aqui para não pesar na inicialização
+            
             # Criar arquivo Excel com múltiplas abas
             with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
                 # Aba 1: Resumo